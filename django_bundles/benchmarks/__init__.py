@@ -0,0 +1,47 @@
+"""
+Micro-benchmarks for django_bundles' hot paths. Each module can be run on its own, e.g.
+
+    python -m django_bundles.benchmarks.processes
+"""
+import time
+
+
+def configure_settings(**overrides):
+    """
+    Minimal settings for running benchmarks outside of a project
+    """
+    from django.conf import settings
+
+    if not settings.configured:
+        options = {
+            'DEBUG': False,
+            'MEDIA_URL': '/media/',
+            'MEDIA_ROOT': '/tmp',
+            'BUNDLES': (),
+            'BUNDLES_VERSION_FILE': None,
+        }
+        options.update(overrides)
+        settings.configure(**options)
+
+        import django
+        if hasattr(django, 'setup'):
+            # Django 1.7+ - call_command needs the app registry populated
+            django.setup()
+
+
+def best_time(fn, repeat=3):
+    """
+    Runs fn repeat times and returns the fastest wall time in seconds
+    """
+    times = []
+    for _ in xrange(repeat):
+        start = time.time()
+        fn()
+        times.append(time.time() - start)
+    return min(times)
+
+
+def print_results(title, results, unit):
+    print title
+    for name, value in results:
+        print '\t%-50s %10.1f %s' % (name, value, unit)
@@ -0,0 +1,71 @@
+"""
+Building a bundle without any processors - through make_bundle's chunked reads (1KB, as FileChunkGenerator used to
+read, and BUNDLES_FILE_CHUNK_SIZE) and through make_concatenated_bundle - hashing the output, and with a version known
+before the build (so nothing is hashed and the files can be copied by the kernel):
+
+    python -m django_bundles.benchmarks.concatenation [files] [size_mb]
+"""
+from django_bundles.benchmarks import best_time, configure_settings, print_results
+
+import os
+import shutil
+import sys
+import tempfile
+
+
+def run(files=100, size_mb=100):
+    configure_settings()
+
+    from django.test.utils import override_settings
+    from django_bundles.core import Bundle
+    from django_bundles.management.commands.create_bundles import make_bundle, make_concatenated_bundle
+    from django_bundles.utils import files as files_module
+
+    root = tempfile.mkdtemp()
+    try:
+        file_size = size_mb * 1024 * 1024 / files
+        line = '.selector { color: #fff; margin: 0 auto; }\n'
+        contents = line * (file_size / len(line))
+        os.makedirs(os.path.join(root, 'css'))
+        os.makedirs(os.path.join(root, 'output'))
+        for i in xrange(files):
+            with open(os.path.join(root, 'css', 'file%03d.css' % i), 'wb') as output_file:
+                output_file.write(contents)
+
+        bundle = Bundle(('benchmark', {
+            'type': 'css',
+            'files': ('css/*.css',),
+            'files_root': root,
+            'bundle_file_root': os.path.join(root, 'output'),
+            'processors': (),
+        }))
+        total_mb = float(len(contents) * files) / (1024 * 1024)
+
+        if files_module.copy_file_range:
+            copy = 'copy_file_range'
+        elif files_module.sendfile:
+            copy = 'sendfile'
+        else:
+            copy = 'mmap'
+
+        builds = [
+            ('make_bundle, 1KB reads', make_bundle, 1024),
+            ('make_bundle, 64KB reads', make_bundle, 64 * 1024),
+            ('make_concatenated_bundle (%s)' % copy, make_concatenated_bundle, 64 * 1024),
+        ]
+
+        results = []
+        for fixed_version, description in ((None, 'hashing output'), ('fixed', 'no hashing')):
+            for name, fn, chunk_size in builds:
+                with override_settings(BUNDLES_FILE_CHUNK_SIZE=chunk_size):
+                    results.append(('%s, %s (MB/s)' % (name, description), total_mb / best_time(lambda: fn(bundle, fixed_version=fixed_version))))
+
+        return results
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == '__main__':
+    files = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    size_mb = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    print_results('Bundles without processors (%s files, %sMB)' % (files, size_mb), run(files, size_mb), '')
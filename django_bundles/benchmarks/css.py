@@ -0,0 +1,56 @@
+"""
+CSSMinifierProcessor compared with minifying through a subprocess (ExecutableProcessor, which also writes a temp file
+for {infile} commands):
+
+    python -m django_bundles.benchmarks.css [bundles] [command]
+
+The command defaults to "cat {infile}" - the cost of the subprocess path before any actual minifying.
+"""
+from django_bundles.benchmarks import best_time, configure_settings, print_results
+
+import collections
+import sys
+
+
+RULE = '''
+/* %(i)s */
+.rule-%(i)s .child > a:hover,
+.rule-%(i)s .other {
+    margin: 0px auto 0.5em;
+    padding : 10px 0.25em ;
+    background: url("images/sprite-%(i)s.png") no-repeat;
+    color: #ffffff;;
+}
+'''
+
+
+def generate_css(rules):
+    return ''.join(RULE % {'i': i} for i in xrange(rules))
+
+
+def run(bundles=100, command='cat {infile}', rules_per_bundle=500):
+    configure_settings()
+
+    from django_bundles.processors import ExecutableProcessor, processor_pipeline
+    from django_bundles.processors.css import CSSMinifierProcessor
+
+    css = generate_css(rules_per_bundle)
+    chunks = [css[i:i + 1024] for i in xrange(0, len(css), 1024)]
+    size_mb = bundles * len(css) / (1024.0 * 1024)
+
+    def minify_with(processor):
+        def fn():
+            for _ in xrange(bundles):
+                collections.deque(processor_pipeline([processor], iter(chunks)), maxlen=0)
+        return fn
+
+    return [
+        ('CSSMinifierProcessor', size_mb / best_time(minify_with(CSSMinifierProcessor()))),
+        ('ExecutableProcessor (%s)' % command, size_mb / best_time(minify_with(ExecutableProcessor(command=command)))),
+    ]
+
+
+if __name__ == '__main__':
+    bundles = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    command = sys.argv[2] if len(sys.argv) > 2 else 'cat {infile}'
+    print_results('CSS minifying (%s bundles)' % bundles, run(bundles, command), 'MB/s')
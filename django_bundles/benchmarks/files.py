@@ -0,0 +1,54 @@
+"""
+Expanding bundle file patterns over a media tree with tens of thousands of files - each pattern listing directories
+itself, compared with one DirectoryListingCache shared by every pattern (as get_bundles does):
+
+    python -m django_bundles.benchmarks.files [files]
+"""
+from django_bundles.benchmarks import best_time, print_results
+from django_bundles.utils.files import expand_file_names, DirectoryListingCache
+
+import os
+import shutil
+import sys
+import tempfile
+
+
+def make_tree(root, files, dirs=10, subdirs=10):
+    per_dir = max(files / (dirs * subdirs), 1)
+    for i in xrange(dirs):
+        for j in xrange(subdirs):
+            path = os.path.join(root, 'app%s' % i, 'module%s' % j)
+            os.makedirs(path)
+            for k in xrange(per_dir):
+                open(os.path.join(path, 'file%s.%s' % (k, 'js' if k % 2 else 'css')), 'wb').close()
+    return dirs, subdirs
+
+
+def run(files=20000):
+    root = tempfile.mkdtemp()
+    try:
+        dirs, subdirs = make_tree(root, files)
+
+        # A bundle per module, a bundle per app and a couple of site wide bundles - overlapping like real configs
+        patterns = ['app%s/module%s/*.js' % (i, j) for i in xrange(dirs) for j in xrange(subdirs)]
+        patterns += ['app%s/**/*.css' % i for i in xrange(dirs)]
+        patterns += ['**/*.js', '**/*.css']
+
+        def expand(shared):
+            def fn():
+                listing_cache = DirectoryListingCache() if shared else None
+                for pattern in patterns:
+                    expand_file_names(pattern, root, listing_cache=listing_cache)
+            return fn
+
+        return [
+            ('listing per pattern', 1000 * best_time(expand(False))),
+            ('shared listing cache', 1000 * best_time(expand(True))),
+        ]
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == '__main__':
+    files = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    print_results('Expanding file patterns (%s files)' % files, run(files), 'ms')
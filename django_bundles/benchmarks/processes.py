@@ -0,0 +1,40 @@
+"""
+Throughput of piping multi-MB inputs through two processes - via Python between them (as separate run_process calls)
+and connected directly with run_pipeline:
+
+    python -m django_bundles.benchmarks.processes [size_mb]
+"""
+from django_bundles.benchmarks import best_time, print_results
+from django_bundles.utils.processes import run_process, run_pipeline
+
+import collections
+import sys
+
+
+def iter_input(data, chunk_size=1024):
+    for i in xrange(0, len(data), chunk_size):
+        yield data[i:i + chunk_size]
+
+
+def run(size_mb=32):
+    data = 'x' * (size_mb * 1024 * 1024)
+
+    def python_pump(chunk_size):
+        def fn():
+            g = run_process('cat', stdin=iter_input(data), output_chunk_size=chunk_size)
+            collections.deque(run_process('cat', stdin=g, output_chunk_size=chunk_size), maxlen=0)
+        return fn
+
+    def os_pipe():
+        collections.deque(run_pipeline([('cat', None), ('cat', None)], stdin=iter_input(data)), maxlen=0)
+
+    return [
+        ('cat | cat through Python (1KB chunks)', size_mb / best_time(python_pump(1024))),
+        ('cat | cat through Python (64KB chunks)', size_mb / best_time(python_pump(64 * 1024))),
+        ('cat | cat with run_pipeline', size_mb / best_time(os_pipe)),
+    ]
+
+
+if __name__ == '__main__':
+    size_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    print_results('Process throughput (%sMB)' % size_mb, run(size_mb), 'MB/s')
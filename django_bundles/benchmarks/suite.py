@@ -0,0 +1,317 @@
+"""
+End to end benchmarks over a synthetic media tree (N bundles of M files, alternately CSS and JS) built with local
+stand-in processors - cat for each file and a Python filter script for each bundle - so no node tools are needed:
+
+    python -m django_bundles.benchmarks.suite [--bundles N] [--files M] [--file-size KB] [--output results.json]
+
+Each benchmark runs in a forked process so its peak memory is its own. The results can be written as JSON and two
+results files compared, e.g. before and after a change:
+
+    python -m django_bundles.benchmarks.suite --compare before.json after.json
+"""
+from django_bundles.benchmarks import best_time, configure_settings
+
+from StringIO import StringIO
+from optparse import OptionParser
+import collections
+import datetime
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+
+
+FILTER_SCRIPT = """import sys
+for line in sys.stdin:
+    sys.stdout.write(line.rstrip() + '\\n')
+"""
+
+# Units where a bigger number is better - everything else is a time or a size
+HIGHER_IS_BETTER = ('MB/s', 'calls/s')
+
+
+def make_media_tree(root, bundles, files, file_size):
+    """
+    Writes files x file_size KB of CSS or JS for each bundle and returns the BUNDLES setting for them
+    """
+    filter_path = os.path.join(root, 'filter.py')
+    with open(filter_path, 'wb') as filter_file:
+        filter_file.write(FILTER_SCRIPT)
+
+    css_rule = '.selector-%s { color: #fff; margin: 0 auto; }   \n'
+    js_statement = 'var value%s = function(a, b) { return a + b; };   \n'
+
+    bundles_conf = []
+    for i in xrange(bundles):
+        bundle_type = 'css' if i % 2 == 0 else 'js'
+        line = css_rule if bundle_type == 'css' else js_statement
+        path = os.path.join(root, 'bundle%s' % i)
+        os.makedirs(path)
+
+        for j in xrange(files):
+            contents = []
+            size = 0
+            while size < file_size * 1024:
+                contents.append(line % size)
+                size += len(contents[-1])
+            with open(os.path.join(path, 'file%s.%s' % (j, bundle_type)), 'wb') as output_file:
+                output_file.write(''.join(contents))
+
+        bundles_conf.append(('bundle%s' % i, {
+            'type': bundle_type,
+            'files': (
+                ('bundle%s/*.%s' % (i, bundle_type), {
+                    'processors': (('django_bundles.processors.ExecutableProcessor', {'command': 'cat'}),),
+                }),
+            ),
+            'processors': (
+                ('django_bundles.processors.ExecutableProcessor', {'command': '%s %s' % (sys.executable, filter_path)}),
+            ),
+            'files_root': root,
+            'bundle_file_root': os.path.join(root, 'output'),
+        }))
+
+    return tuple(bundles_conf)
+
+
+def measure(fn):
+    """
+    Runs fn in a forked process and returns its result with the process' peak memory (in KB) added
+    """
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        status = 1
+        try:
+            result = fn()
+            # ru_maxrss is in bytes on OS X and KB elsewhere
+            peak_memory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            result['peak_memory'] = peak_memory / 1024 if sys.platform == 'darwin' else peak_memory
+            os.write(write_fd, json.dumps(result))
+            status = 0
+        except Exception:
+            import traceback
+            traceback.print_exc()
+        finally:
+            os._exit(status)
+
+    os.close(write_fd)
+    with os.fdopen(read_fd, 'rb') as read_file:
+        output = read_file.read()
+    _, status = os.waitpid(pid, 0)
+    if status:
+        raise RuntimeError('Benchmark failed')
+    return json.loads(output)
+
+
+def timed(value_fn, unit, repeat):
+    def fn():
+        return {'value': value_fn(repeat), 'unit': unit}
+    return fn
+
+
+def run(bundles=20, files=20, file_size=4, repeat=3, renders=20000, requests=200):
+    root = tempfile.mkdtemp()
+    try:
+        bundles_conf = make_media_tree(root, bundles, files, file_size)
+        os.makedirs(os.path.join(root, 'output'))
+        configure_settings(
+            INSTALLED_APPS=('django_bundles',),
+            USE_BUNDLES=True,
+            MEDIA_ROOT=root,
+            BUNDLES=bundles_conf,
+            BUNDLES_VERSION_FILE=os.path.join(root, 'bundles_versions.py'),
+            BUNDLES_LINTING={
+                'css': {'command': 'cat {infile} > /dev/null', 'default': True},
+                'js': {'command': 'cat {infile} > /dev/null', 'default': True},
+            },
+        )
+
+        from django.core.management import call_command
+        from django.test.client import RequestFactory
+        from django.test.utils import override_settings
+        from django_bundles import views
+        from django_bundles.core import get_bundles, set_bundle_versions
+        from django_bundles.templatetags.django_bundles_tags import _render_bundle
+        from django_bundles.utils.processes import run_process
+
+        def create_bundles(parallel):
+            def fn(repeat):
+                return best_time(lambda: call_command('create_bundles', force=True, parallel=parallel, stdout=StringIO()), repeat)
+            return fn
+
+        def lint_bundles(batched):
+            def fn(repeat):
+                linting = dict((bundle_type, {'command': 'cat {infile_list} > /dev/null', 'default': True, 'batch_size': 50}) for bundle_type in ('css', 'js'))
+                with override_settings(BUNDLES_LINTING=linting) if batched else override_settings():
+                    return best_time(lambda: call_command('lint_bundles', no_cache=True, stdout=StringIO()), repeat)
+            return fn
+
+        def process_throughput(repeat):
+            size_mb = 32
+            data = 'x' * (size_mb * 1024 * 1024)
+
+            def pipe():
+                stdin = (data[i:i + 65536] for i in xrange(0, len(data), 65536))
+                collections.deque(run_process('cat', stdin=stdin), maxlen=0)
+
+            return size_mb / best_time(pipe, repeat)
+
+        def serve(state):
+            def fn(repeat):
+                with override_settings(USE_BUNDLES=False):
+                    paths = [bundle_file.file_path for bundle in get_bundles() for bundle_file in bundle.files]
+                    factory = RequestFactory()
+
+                    # The dev server logs each file it generates
+                    sys.stdout = StringIO()
+
+                    def request(path, **headers):
+                        response = views.serve(factory.get('/media/' + path, **headers), os.path.relpath(path, root), document_root=root)
+                        if response.streaming:
+                            collections.deque(response.streaming_content, maxlen=0)
+                        return response
+
+                    def requests_fn():
+                        for i in xrange(requests):
+                            path = paths[i % len(paths)]
+                            if state == 'uncached':
+                                views._dev_file_cache = None
+                                request(path)
+                            elif state == 'cached':
+                                request(path)
+                            else:
+                                request(path, HTTP_IF_NONE_MATCH=etags[path])
+
+                    # Warm the cache with every file first - the first response is streamed, without an ETag
+                    for path in paths:
+                        request(path)
+                    etags = dict((path, request(path)['ETag']) for path in paths)
+                    latency = 1000 * best_time(requests_fn, repeat) / requests
+                    sys.stdout = sys.__stdout__
+                    return latency
+            return fn
+
+        def render_bundle(repeat):
+            names = [name for name, _ in bundles_conf]
+            set_bundle_versions(dict((name, 'version%s' % i) for i, name in enumerate(names)))
+
+            def renders_fn():
+                for i in xrange(renders):
+                    _render_bundle(names[i % len(names)])
+
+            return renders / best_time(renders_fn, repeat)
+
+        benchmarks = [
+            ('create_bundles', timed(create_bundles(False), 's', repeat)),
+            ('create_bundles --parallel', timed(create_bundles(True), 's', repeat)),
+            ('lint_bundles', timed(lint_bundles(False), 's', repeat)),
+            ('lint_bundles (batched {infile_list})', timed(lint_bundles(True), 's', repeat)),
+            ('run_process throughput (cat)', timed(process_throughput, 'MB/s', repeat)),
+            ('views.serve uncached', timed(serve('uncached'), 'ms', repeat)),
+            ('views.serve cached', timed(serve('cached'), 'ms', repeat)),
+            ('views.serve not modified', timed(serve('not_modified'), 'ms', repeat)),
+            ('_render_bundle', timed(render_bundle, 'calls/s', repeat)),
+        ]
+
+        results = []
+        for name, fn in benchmarks:
+            result = measure(fn)
+            result['name'] = name
+            results.append(result)
+        return results
+    finally:
+        shutil.rmtree(root)
+
+
+def get_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=os.path.dirname(__file__), stderr=open(os.devnull, 'wb')).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results):
+    for result in results:
+        print '\t%-40s %10.2f %-8s %8s KB' % (result['name'], result['value'], result['unit'], result['peak_memory'])
+
+
+def compare(before_path, after_path):
+    """
+    Prints the change in each benchmark between two results files - a positive change is an improvement
+    """
+    with open(before_path, 'rb') as before_file:
+        before = json.load(before_file)
+    with open(after_path, 'rb') as after_file:
+        after = json.load(after_file)
+
+    print 'Comparing %s (%s) with %s (%s)' % (before_path, before.get('revision'), after_path, after.get('revision'))
+    if before.get('params') != after.get('params'):
+        print 'Warning: the benchmarks were run with different parameters (%s and %s)' % (before.get('params'), after.get('params'))
+    before_results = dict((result['name'], result) for result in before['results'])
+    for result in after['results']:
+        previous = before_results.get(result['name'])
+        if not previous or not previous['value']:
+            print '\t%-40s %10.2f %s' % (result['name'], result['value'], result['unit'])
+            continue
+
+        change = float(result['value'] - previous['value']) / previous['value']
+        if result['unit'] not in HIGHER_IS_BETTER:
+            change = -change
+        print '\t%-40s %10.2f -> %10.2f %-8s %+7.1f%%   memory %s -> %s KB' % (
+            result['name'],
+            previous['value'],
+            result['value'],
+            result['unit'],
+            100 * change,
+            previous['peak_memory'],
+            result['peak_memory'],
+        )
+
+
+def main(argv):
+    parser = OptionParser(usage='%prog [options] | --compare before.json after.json')
+    parser.add_option('--bundles', type='int', default=20, help='Number of bundles')
+    parser.add_option('--files', type='int', default=20, help='Files in each bundle')
+    parser.add_option('--file-size', type='int', default=4, help='Size of each file in KB')
+    parser.add_option('--repeat', type='int', default=3, help='Runs of each benchmark - the fastest is kept')
+    parser.add_option('--output', help='Write the results to this JSON file')
+    parser.add_option('--compare', action='store_true', default=False, help='Compare two results files')
+    options, args = parser.parse_args(argv)
+
+    if options.compare:
+        if len(args) != 2:
+            parser.error('--compare needs two results files')
+        compare(*args)
+        return
+
+    params = {
+        'bundles': options.bundles,
+        'files': options.files,
+        'file_size': options.file_size,
+        'repeat': options.repeat,
+    }
+    results = run(**params)
+
+    print 'Benchmarks (%(bundles)s bundles x %(files)s files x %(file_size)sKB)' % params
+    print_results(results)
+
+    if options.output:
+        with open(options.output, 'wb') as output_file:
+            json.dump({
+                'revision': get_revision(),
+                'date': datetime.datetime.utcnow().isoformat(),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'params': params,
+                'results': results,
+            }, output_file, indent=4)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,53 @@
+"""
+Running {infile}/{outfile} commands - temporary files in the system temp directory, in BUNDLES_TEMP_DIR (/dev/shm if
+it exists) and named pipes - over many small files and one large one:
+
+    python -m django_bundles.benchmarks.tempfiles [files] [size_mb]
+"""
+from django_bundles.benchmarks import best_time, configure_settings, print_results
+
+import collections
+import os
+import sys
+import tempfile
+
+
+COMMAND = 'tr a-z A-Z < {infile} > {outfile}'
+
+
+def run(files=500, size_mb=64):
+    configure_settings()
+
+    from django.test.utils import override_settings
+    from django_bundles.processors import ExecutableProcessor
+
+    small = ['.selector { color: #fff; }\n' * 100]
+    large = ['x' * (1024 * 1024)] * size_mb
+
+    temp_dirs = [('system temp dir', tempfile.gettempdir())]
+    if os.path.isdir('/dev/shm'):
+        temp_dirs.append(('/dev/shm', '/dev/shm'))
+
+    def process(processor, chunks, repeat=1):
+        def fn():
+            for _ in xrange(repeat):
+                collections.deque(processor.process(iter(chunks)), maxlen=0)
+        return fn
+
+    results = []
+    for fifo in (False, True):
+        processor = ExecutableProcessor(command=COMMAND, fifo=fifo)
+        for name, temp_dir in temp_dirs:
+            if fifo:
+                name = 'named pipes in %s' % name
+            with override_settings(BUNDLES_TEMP_DIR=temp_dir):
+                results.append(('%s files: %s (ms/file)' % (files, name), 1000 * best_time(process(processor, small, files)) / files))
+                results.append(('%sMB file: %s (MB/s)' % (size_mb, name), size_mb / best_time(process(processor, large))))
+
+    return results
+
+
+if __name__ == '__main__':
+    files = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    size_mb = int(sys.argv[2]) if len(sys.argv) > 2 else 64
+    print_results('{infile}/{outfile} commands', run(files, size_mb), '')
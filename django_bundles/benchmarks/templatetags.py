@@ -0,0 +1,53 @@
+"""
+Rendering {% render_bundle %} tags - uncached (_render_bundle, which the tag used to call every time), the cached tag
+and a whole template with 15 tags:
+
+    python -m django_bundles.benchmarks.templatetags [renders]
+"""
+from django_bundles.benchmarks import best_time, configure_settings, print_results
+
+import os
+import sys
+
+
+BUNDLE_COUNT = 15
+
+
+def run(renders=100000):
+    files_root = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'tests', 'files')
+    configure_settings(
+        INSTALLED_APPS=('django_bundles',),
+        USE_BUNDLES=True,
+        BUNDLES=tuple(('bundle_%s' % i, {'type': 'css', 'files': ('*.css',), 'files_root': files_root, 'media': 'screen'}) for i in xrange(BUNDLE_COUNT)),
+    )
+
+    from django.template import Context, Template
+    from django_bundles.core import set_bundle_versions
+    from django_bundles.templatetags.django_bundles_tags import _render_bundle, render_bundle
+
+    set_bundle_versions(dict(('bundle_%s' % i, 'version%s' % i) for i in xrange(BUNDLE_COUNT)))
+
+    def render_with(fn):
+        def run_renders():
+            for _ in xrange(renders):
+                fn('bundle_0')
+        return run_renders
+
+    template = Template('{% load django_bundles_tags %}' + ''.join('{%% render_bundle "bundle_%s" %%}' % i for i in xrange(BUNDLE_COUNT)))
+    context = Context()
+    template_renders = renders / BUNDLE_COUNT
+
+    def render_template():
+        for _ in xrange(template_renders):
+            template.render(context)
+
+    return [
+        ('_render_bundle (uncached)', renders / best_time(render_with(_render_bundle))),
+        ('render_bundle (cached)', renders / best_time(render_with(render_bundle))),
+        ('template with %s tags' % BUNDLE_COUNT, template_renders * BUNDLE_COUNT / best_time(render_template)),
+    ]
+
+
+if __name__ == '__main__':
+    renders = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    print_results('Bundle tag rendering (%s renders)' % renders, run(renders), 'tags/s')
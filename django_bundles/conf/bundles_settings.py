@@ -21,6 +21,21 @@ class SettingsHelper(object):
         raise ImproperlyConfigured, "%s is a required setting for django_bundles" % name
 
 
+class FrozenSettings(object):
+    """
+    Snapshot of a SettingsHelper for hot paths (e.g. template tags) - each setting is looked up once and then read as
+    a plain attribute. Use get_frozen_settings() rather than keeping hold of one, as a new snapshot is taken whenever
+    settings change (e.g. override_settings in tests)
+    """
+    def __init__(self, settings_helper):
+        self._settings_helper = settings_helper
+
+    def __getattr__(self, name):
+        value = getattr(self._settings_helper, name)
+        setattr(self, name, value)
+        return value
+
+
 bundles_settings = SettingsHelper(settings, default_settings, [
     'USE_BUNDLES',
     'DEVELOPMENT_BUNDLES',
@@ -28,7 +43,36 @@ bundles_settings = SettingsHelper(settings, default_settings, [
     'DEFAULT_POSTPROCESSORS',
     'BUNDLES_LINTING',
     'BUNDLES_LINT_SUCCESS_OK',
+    'BUNDLES_LINT_CACHE_FILE',
     'BUNDLES_SINGLE_FILES',
     'BUNDLES_TAG_HTML',
     'GLOBAL_PRECOMPILE_DISABLE',
+    'BUNDLES_BUILD_STATE_FILE',
+    'BUNDLES_PROCESSOR_CACHE',
+    'BUNDLES_PROCESS_CHUNK_SIZE',
+    'BUNDLES_FILE_CHUNK_SIZE',
+    'BUNDLES_TEMP_DIR',
+    'BUNDLES_DEV_CACHE_SIZE',
+    'BUNDLES_COMPRESSION',
+    'BUNDLES_VERSION_FILE_CHECK_INTERVAL',
+    'BUNDLES_RUNTIME_SNAPSHOT_FILE',
+    'BUNDLES_VERSION_STRATEGY',
+    'BUNDLES_HASH_FUNCTION',
+    'BUNDLES_DEPENDENCY_SCANNERS',
 ])
+
+
+_frozen_settings = FrozenSettings(bundles_settings)
+def get_frozen_settings():
+    return _frozen_settings
+
+
+def _settings_changed(**kwargs):
+    global _frozen_settings
+    _frozen_settings = FrozenSettings(bundles_settings)
+
+try:
+    from django.core.signals import setting_changed
+except ImportError:
+    from django.test.signals import setting_changed
+setting_changed.connect(_settings_changed)
@@ -20,6 +20,8 @@ BUNDLES_LINTING = {}
 
 BUNDLES_LINT_SUCCESS_OK = True
 
+BUNDLES_LINT_CACHE_FILE = None # Defaults to BUNDLES_VERSION_FILE + ".lint"
+
 BUNDLES_SINGLE_FILES = ()
 
 BUNDLES_TAG_HTML = {
@@ -28,4 +30,31 @@ BUNDLES_TAG_HTML = {
     'less': '<link href="%(file_url)s" type="text/less" rel="stylesheet/less"%(attrs)s />',
 }
 
-GLOBAL_PRECOMPILE_DISABLE = False
\ No newline at end of file
+GLOBAL_PRECOMPILE_DISABLE = False
+
+BUNDLES_BUILD_STATE_FILE = None # Defaults to BUNDLES_VERSION_FILE + ".state"
+
+BUNDLES_PROCESSOR_CACHE = None
+
+BUNDLES_PROCESS_CHUNK_SIZE = 64 * 1024
+
+BUNDLES_FILE_CHUNK_SIZE = 64 * 1024 # Size of the reads of source files fed to processors
+
+BUNDLES_TEMP_DIR = None # Where {infile}/{outfile} commands' temporary files go, e.g. a RAM backed '/dev/shm' (None for the system default)
+
+BUNDLES_DEV_CACHE_SIZE = 64 * 1024 * 1024 # Processed files kept in memory by the development server view
+
+BUNDLES_COMPRESSION = {} # e.g. {'gzip': 9, 'brotli': 11} to write .gz/.br copies of bundles (see django_bundles.utils.compression)
+
+BUNDLES_VERSION_FILE_CHECK_INTERVAL = None # Seconds between checks for a new BUNDLES_VERSION_FILE (None to load it once)
+
+BUNDLES_RUNTIME_SNAPSHOT_FILE = None # Written by create_bundles and used by render_bundle if set (see django_bundles.runtime)
+
+BUNDLES_VERSION_STRATEGY = 'output' # or 'input' to version bundles from their input files and processors (see compute_bundle_versions)
+
+BUNDLES_HASH_FUNCTION = 'md5' # see django_bundles.utils.hashing
+
+BUNDLES_DEPENDENCY_SCANNERS = { # file type -> function finding the files a file imports (see django_bundles.utils.dependencies)
+    'css': 'django_bundles.utils.dependencies.scan_css_imports',
+    'less': 'django_bundles.utils.dependencies.scan_css_imports',
+}
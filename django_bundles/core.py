@@ -1,11 +1,14 @@
 from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured
 
-from django_bundles.conf.bundles_settings import bundles_settings
-from django_bundles.utils.files import expand_file_names
+from django_bundles.conf.bundles_settings import bundles_settings, get_frozen_settings
+from django_bundles.utils.files import expand_file_names, DirectoryListingCache
+from django_bundles.utils.versions import read_bundle_versions, get_file_signature
 from django_bundles.processors import processor_library
 
 import os
+import threading
+import time
 
 
 class Bundle(object):
@@ -19,12 +22,16 @@ class Bundle(object):
         'source_map_url_root': None,
         'source_map_files_url_root': None,
         'files': (                                                      # list of files to include
-            'css/*.css',                                                # pattern matching is done
+            'css/*.css',                                                # pattern matching is done (in sorted order)
+            'css/**/*.css',                                             # ** matches any number of directories
             ('css/more/test3.css', {
                 # bundle file options (see BundleFile class)
             }),
             'less/test.less',
         ),
+        'exclude': (                                                    # patterns for files the wildcards above shouldn't include [OPTIONAL]
+            'css/vendor/**',
+        ),
         'files_url_root': settings.MEDIA_URL,                           # Root URL for the files in the bundle [OPTIONAL - defaults to settings.MEDIA_URL]
         'files_root': settings.MEDIA_ROOT,                              # Root path for the files in the bundle [OPTIONAL - defaults to settings.MEDIA_ROOT]
         'media': None,                                                  # Media type (e.g. screen, print) [OPTIONAL - defaults to None]
@@ -44,9 +51,10 @@ class Bundle(object):
     }),
 
     """
-    def __init__(self, conf):
+    def __init__(self, conf, listing_cache=None):
         """
-        Initialize a bundle and it's BundleFiles based on a conf dict
+        Initialize a bundle and it's BundleFiles based on a conf dict - listing_cache is a DirectoryListingCache shared
+        with other bundles
         """
         self.name = conf[0]
 
@@ -68,11 +76,37 @@ class Bundle(object):
         self.fixed_bundle_url = conf_dict.get('bundle_url')
         self.fixed_bundle_file_path = conf_dict.get('bundle_file_path')
 
-        # Build the list of BundleFiles
-        self.files = []
-        self._bundle_files = {}
+        # Files and processors are only worked out when they're first needed - a server rendering bundles only needs
+        # the settings above
+        self._files_conf = list(conf_dict['files'])
+        self._exclude = conf_dict.get('exclude')
+        self._listing_cache = listing_cache
+        self._files = None
+        self._bundle_files = None
+        self._processors_conf = conf_dict.get('processors')
+        self._processors = None
+        self._lock = threading.Lock()
+
+    @property
+    def files(self):
+        return self._get_files()[0]
 
-        for fileconf in list(conf_dict['files']):
+    def _get_files(self):
+        """
+        Returns the list of BundleFiles and a dict of them by path - built the first time it's called
+        """
+        if self._files is None:
+            with self._lock:
+                if self._files is None:
+                    self._load_files()
+        return self._files, self._bundle_files
+
+    def _load_files(self):
+        files = []
+        bundle_files = {}
+        listing_cache = self._listing_cache or DirectoryListingCache()
+
+        for fileconf in self._files_conf:
             path, extra = fileconf, None
             # Each file definition can be a string or tuple containing the path and the conf dict
             if isinstance(fileconf, (tuple, list)):
@@ -81,24 +115,33 @@ class Bundle(object):
 
             # Expand *s in filenames
             try:
-                for filename in expand_file_names(path, self.files_root):
+                for filename in expand_file_names(path, self.files_root, exclude=self._exclude, listing_cache=listing_cache):
                     bundle_file = BundleFile(filename, self.files_root, self.files_url_root, self.media, self.bundle_type, self.precompile_in_debug, extra=extra)
-                    self.files.append(bundle_file)
-                    self._bundle_files[bundle_file.file_path] = bundle_file
+                    files.append(bundle_file)
+                    bundle_files[bundle_file.file_path] = bundle_file
             except OSError:
                 raise ImproperlyConfigured("Bundle %s - could not find file(s): %s" % (self.name, path))
 
-        # Get the processors or use the default list
-        if 'processors' in conf_dict:
-            self.processors = processor_library.get_processors(conf_dict['processors'])
-        else:
-            self.processors = processor_library.get_default_postprocessors_for(self.bundle_type)
+        self._bundle_files = bundle_files
+        self._files = files
+        # Only needed until every bundle sharing it has loaded its files
+        self._listing_cache = None
+
+    @property
+    def processors(self):
+        if self._processors is None:
+            # Get the processors or use the default list
+            if self._processors_conf is not None:
+                self._processors = processor_library.get_processors(self._processors_conf)
+            else:
+                self._processors = processor_library.get_default_postprocessors_for(self.bundle_type)
+        return self._processors
 
     def __contains__(self, filename):
-        return filename in self._bundle_files
+        return filename in self._get_files()[1]
 
     def __getitem__(self, item):
-        return self._bundle_files[item]
+        return self._get_files()[1][item]
 
     def get_version(self):
         """
@@ -170,11 +213,18 @@ class BundleFile(object):
         else:
             self.lint = False
 
-        # Preprocessors or get defaults
-        if extra and 'processors' in extra:
-            self.processors = processor_library.get_processors(extra['processors'])
-        else:
-            self.processors = processor_library.get_default_preprocessors_for(self.file_type)
+        self._processors_conf = extra['processors'] if extra and 'processors' in extra else None
+        self._processors = None
+
+    @property
+    def processors(self):
+        if self._processors is None:
+            # Preprocessors or get defaults
+            if self._processors_conf is not None:
+                self._processors = processor_library.get_processors(self._processors_conf)
+            else:
+                self._processors = processor_library.get_default_preprocessors_for(self.file_type)
+        return self._processors
 
 
 class BundleManager(object):
@@ -202,34 +252,70 @@ class BundleManager(object):
 
 
 _cached_bundles = None
+_cached_bundles_lock = threading.Lock()
 def get_bundles():
     """
     Used to cache the bundle definitions rather than loading from config every time they're used
     """
     global _cached_bundles
 
-    if not _cached_bundles:
-        _cached_bundles = BundleManager()
+    if _cached_bundles is None:
+        with _cached_bundles_lock:
+            if _cached_bundles is None:
+                bundles = BundleManager()
+                listing_cache = DirectoryListingCache()
+
+                for bundle_conf in bundles_settings.BUNDLES:
+                    bundles[bundle_conf[0]] = Bundle(bundle_conf, listing_cache=listing_cache)
 
-        for bundle_conf in bundles_settings.BUNDLES:
-            _cached_bundles[bundle_conf[0]] = Bundle(bundle_conf)
+                # Only published once it's complete so other threads never see it half built
+                _cached_bundles = bundles
 
     return _cached_bundles
 
 
 _cached_versions = None
+_versions_signature = None
+_versions_checked = 0
+_versions_pinned = False
 def get_bundle_versions():
     """
-    Used to cache the bundle versions rather than loading them from the bundle versions file every time they're used
+    Used to cache the bundle versions rather than loading them from the bundle versions file every time they're used.
+    If settings.BUNDLES_VERSION_FILE_CHECK_INTERVAL is set the file is stat'ed at most that often (in seconds) and
+    reloaded if it has changed, so a new deploy is picked up without a restart
     """
-    global _cached_versions
-    if not bundles_settings.BUNDLES_VERSION_FILE:
+    global _cached_versions, _versions_signature, _versions_checked
+
+    # This is called for every rendered bundle tag, so uses the cheaper frozen settings
+    frozen_settings = get_frozen_settings()
+    version_file = frozen_settings.BUNDLES_VERSION_FILE
+    if not version_file:
         _cached_versions = {}
+        return _cached_versions
+
+    check_interval = frozen_settings.BUNDLES_VERSION_FILE_CHECK_INTERVAL
+    if _cached_versions is not None and check_interval is not None and not _versions_pinned:
+        now = time.time()
+        if now - _versions_checked >= check_interval:
+            _versions_checked = now
+            signature = get_file_signature(version_file)
+            if signature != _versions_signature:
+                try:
+                    _cached_versions = read_bundle_versions(version_file)
+                    _versions_signature = signature
+                except IOError:
+                    _cached_versions = {}
+                    _versions_signature = signature
+                except Exception:
+                    # Probably written in place by an older create_bundles - keep the old versions and try again later
+                    pass
+
     if _cached_versions is None:
-        locs = {}
+        # Taken before reading so a change during the read is noticed next time
+        _versions_signature = get_file_signature(version_file)
+        _versions_checked = time.time()
         try:
-            execfile(bundles_settings.BUNDLES_VERSION_FILE, locs)
-            _cached_versions = locs['BUNDLES_VERSIONS']
+            _cached_versions = read_bundle_versions(version_file)
         except IOError:
             _cached_versions = {}
     return _cached_versions
@@ -237,8 +323,13 @@ def get_bundle_versions():
 
 def set_bundle_versions(bundles_versions):
     """
-    Used to update the cached versions whilst building the bundle
+    Used to update the cached versions whilst building the bundle - the versions file is no longer checked for changes
+    (and the runtime snapshot isn't used) until they're set back to None
     """
-    global _cached_versions
+    global _cached_versions, _versions_pinned
     _cached_versions = bundles_versions
+    _versions_pinned = bundles_versions is not None
+
 
+def bundle_versions_pinned():
+    return _versions_pinned
@@ -0,0 +1,91 @@
+"""
+Output parsers for lint commands run on several files at once (an {infile_list} command in settings.BUNDLES_LINTING),
+e.g.
+
+BUNDLES_LINTING = {
+    'js': {
+        'command': 'jshint --reporter=unix {infile_list}',
+        'batch_size': 50,                                                   # files per run
+        'output_parser': 'django_bundles.linting.PrefixOutputParser',       # the default
+    },
+}
+"""
+from django_bundles.utils import get_class
+
+
+import re
+
+
+# Totals at the end of a run, e.g. "3 errors" (JSHint) or "3 problems (3 errors, 0 warnings)" (ESLint, after a symbol)
+SUMMARY_RE = re.compile(r'^\W*\d+ (?:error|warning|problem)s?\b')
+
+
+class LintOutputParser(object):
+    """
+    Splits the output of a failed lint run between the files it was given - parse returns a dict of file path to
+    error message for each file that failed, or None if any of the output can't be attributed to the files (lint_bundles
+    then lints them one at a time, as the run may have stopped before it got to some of them)
+    """
+    def parse(self, output, file_paths):
+        raise NotImplementedError
+
+    def is_ignorable(self, line):
+        """
+        Whether a line that isn't about any one file can be left out, e.g. blank lines and totals
+        """
+        return not line.strip() or bool(SUMMARY_RE.match(line.strip()))
+
+
+class PrefixOutputParser(LintOutputParser):
+    """
+    Output where each message starts with the file path, e.g. "/path/to/file.js: line 1, col 5, Missing semicolon."
+    (JSHint's default and unix reporters, ESLint's unix and compact formats, flake8) - blank lines and totals are
+    ignored
+    """
+    def parse(self, output, file_paths):
+        # Longest first so /a.js doesn't claim /a.js.map's lines
+        paths = sorted(file_paths, key=len, reverse=True)
+        failures = {}
+
+        for line in output.splitlines(True):
+            for file_path in paths:
+                if line.startswith(file_path) and line[len(file_path):len(file_path) + 1] in (':', '(', ' ', '\t', ','):
+                    failures[file_path] = failures.get(file_path, '') + line
+                    break
+            else:
+                if not self.is_ignorable(line):
+                    return None
+
+        return failures or None
+
+
+class JSLintOutputParser(LintOutputParser):
+    """
+    Output split into sections with the file path on a line of its own and "<file path> is OK." for files that pass
+    (node-jslint)
+    """
+    def parse(self, output, file_paths):
+        paths = set(file_paths)
+        failures = {}
+        current = None
+
+        for line in output.splitlines(True):
+            stripped = line.strip()
+            if stripped in paths:
+                current = stripped
+                failures[current] = line
+            elif stripped.endswith(' is OK.') and stripped[:-len(' is OK.')] in paths:
+                current = None
+            elif current:
+                failures[current] += line
+            elif not self.is_ignorable(line):
+                return None
+
+        return failures or None
+
+
+def get_output_parser(lint_conf):
+    output_parser = lint_conf.get('output_parser', PrefixOutputParser)
+    if isinstance(output_parser, basestring):
+        output_parser = get_class(output_parser)
+    return output_parser()
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from django_bundles.conf.bundles_settings import bundles_settings
+from django_bundles.core import get_bundles
+from django_bundles.runtime import write_runtime_snapshot
+from django_bundles.utils.hashing import get_bundle_input_version
+from django_bundles.utils.versions import write_bundle_versions
+
+from optparse import make_option
+
+
+class Command(BaseCommand):
+    help = "Writes the bundle versions (and runtime snapshot) from the bundles' inputs without building them - needs BUNDLES_VERSION_STRATEGY = 'input'"
+    requires_model_validation = False
+    option_list = BaseCommand.option_list + (
+        make_option('--output',
+            default=None,
+            help='File to write the versions to (defaults to BUNDLES_VERSION_FILE)'
+        ),
+    )
+
+    def handle(self, *args, **options):
+        if bundles_settings.BUNDLES_VERSION_STRATEGY != 'input':
+            raise CommandError("Bundle versions can only be computed without building them with BUNDLES_VERSION_STRATEGY = 'input'")
+
+        bundle_versions = {}
+        unversionable = []
+
+        for bundle in get_bundles():
+            version = get_bundle_input_version(bundle)
+            if version is None:
+                unversionable.append(bundle.name)
+            else:
+                bundle_versions[bundle.name] = version
+                self.stdout.write("%s\t%s\n" % (bundle.name, version))
+
+        if unversionable:
+            raise CommandError("These bundles use processors whose output depends on more than their input, so can only be versioned by create_bundles: %s" % ', '.join(unversionable))
+
+        output = options.get('output') or bundles_settings.BUNDLES_VERSION_FILE
+        self.stdout.write("Writing versions: %s\n" % output)
+        write_bundle_versions(output, bundle_versions)
+
+        if bundles_settings.BUNDLES_RUNTIME_SNAPSHOT_FILE and not options.get('output'):
+            self.stdout.write("Writing runtime snapshot: %s\n" % bundles_settings.BUNDLES_RUNTIME_SNAPSHOT_FILE)
+            write_runtime_snapshot(bundles_settings.BUNDLES_RUNTIME_SNAPSHOT_FILE, get_bundles(), bundle_versions)
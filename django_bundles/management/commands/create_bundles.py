@@ -1,51 +1,294 @@
 from django.core.management.base import BaseCommand
 
 from django_bundles.conf.bundles_settings import bundles_settings
-from django_bundles.core import get_bundles, set_bundle_versions
+from django_bundles.core import get_bundles, get_bundle_versions, set_bundle_versions
 from django_bundles.processors import processor_pipeline, processor_library
+from django_bundles.processors.cache import get_processor_cache
+from django_bundles.runtime import write_runtime_snapshot
+from django_bundles.utils.build_state import BuildState
+from django_bundles.utils import compression
+from django_bundles.utils.hashing import get_bundle_input_version, get_hash_function
+from django_bundles.utils.compression import CompressedFileWriter, compress_file, get_compressors, get_file_sizes
+from django_bundles.utils.dependencies import get_dependency_graph
 from django_bundles.utils.files import FileChunkGenerator
 from django_bundles.utils.processes import run_process
+from django_bundles.utils.profiling import ProcessorProfile, add_processor_listener, remove_processor_listener
+from django_bundles.utils.tempfiles import get_temp_file_pool
+from django_bundles.utils.versions import write_bundle_versions
 
 import os
 import collections
-from hashlib import md5
-from tempfile import NamedTemporaryFile
 from optparse import make_option
 
+import threading
+import multiprocessing
 from multiprocessing.dummy import Pool
 
 
-def iter_bundle_files(bundle):
-    for bundle_file in bundle.files:
-        for chunk in processor_pipeline(bundle_file.processors, FileChunkGenerator(open(bundle_file.file_path, 'rb'))):
+def preprocess_file(args):
+    """
+    Runs a file through its preprocessors and returns the output - a module level function so it can be sent to a
+    worker process
+    """
+    processors, file_path, bundle_versions, bundle = args
+
+    if bundle_versions is not None:
+        # Worker processes need the versions built so far for templated files
+        set_bundle_versions(bundle_versions)
+
+    return ''.join(processor_pipeline(processors, FileChunkGenerator(open(file_path, 'rb')), bundle=bundle))
+
+
+def preprocess_shared_file(args):
+    """
+    Like preprocess_file, but returns any error rather than raising it so it can be passed on to every bundle waiting
+    for the file
+    """
+    try:
+        return preprocess_file(args), None
+    except Exception as e:
+        return None, e
+
+
+class SharedOutput(object):
+    """
+    Preprocessed output of a file used by more than one bundle - whichever bundle gets there first computes it (or
+    submits it to the pool) and the others wait for the result. (The pool's own results only wake a single waiter.)
+    """
+    def __init__(self, uses):
+        self.uses = uses
+        self._ready = threading.Event()
+        self._output = None
+        self._error = None
+
+    def set(self, output=None, error=None):
+        self._output = output
+        self._error = error
+        self._ready.set()
+
+    def set_result(self, result):
+        self.set(*result)
+
+    def get(self):
+        self._ready.wait()
+        if self._error:
+            raise self._error
+        return self._output
+
+
+class FilePreprocessor(object):
+    """
+    Runs the preprocessors for BundleFiles during a build - inline, or fanned out across a pool of worker threads or
+    processes with the outputs returned in the original order. Files shared between the bundles passed to add_bundles
+    are only preprocessed once per build.
+    """
+    map_files = True
+
+    def __init__(self, pool=None, jobs=1, processes=False):
+        self.pool = pool
+        self.window = max(jobs, 1) * 2 if pool else 0
+        self.processes = processes
+        self.runs = 0
+        self.saved = 0
+        self._uses = collections.defaultdict(int)
+        self._shared = {}
+        self._lock = threading.Lock()
+
+    def get_key(self, bundle_file):
+        """
+        Key for the preprocessed output of a file, or None if it can't be shared (e.g. templated files, whose output
+        can change as bundles are built)
+        """
+        if bundle_file.processors and all(processor.cacheable for processor in bundle_file.processors):
+            return bundle_file.file_path, tuple(processor.get_fingerprint() for processor in bundle_file.processors)
+        return None
+
+    def add_bundles(self, bundles):
+        """
+        Counts how many times each file is used across the bundles in this build
+        """
+        for bundle in bundles:
+            for bundle_file in bundle.files:
+                key = self.get_key(bundle_file)
+                if key:
+                    self._uses[key] += 1
+
+    def iter_outputs(self, bundle_files, bundle=None):
+        """
+        Yields (bundle_file, iterable of output chunks) for each bundle file - bundle is the name of the bundle they're
+        for, for profiling
+        """
+        # Keep a bounded number of files in flight so large bundles don't all sit in memory at once
+        pending = collections.deque()
+
+        for bundle_file in bundle_files:
+            pending.append(self._start(bundle_file, bundle))
+
+            while len(pending) > self.window:
+                yield self._finish(*pending.popleft())
+
+        while pending:
+            yield self._finish(*pending.popleft())
+
+    def _run(self, bundle_file, bundle=None, shared_output=None):
+        if self.pool:
+            args = (bundle_file.processors, bundle_file.file_path, dict(get_bundle_versions()) if self.processes else None, bundle)
+            if shared_output:
+                return self.pool.apply_async(preprocess_shared_file, (args,), callback=shared_output.set_result)
+            return self.pool.apply_async(preprocess_file, (args,))
+
+        return processor_pipeline(bundle_file.processors, FileChunkGenerator(open(bundle_file.file_path, 'rb')), bundle=bundle)
+
+    def _start(self, bundle_file, bundle=None):
+        if not bundle_file.processors:
+            return bundle_file, None, None
+
+        # Only the bookkeeping is done under the lock - running a processor can block until it's finished
+        key = self.get_key(bundle_file)
+        if self._uses.get(key, 0) < 2:
+            with self._lock:
+                self.runs += 1
+            return bundle_file, None, self._run(bundle_file, bundle)
+
+        with self._lock:
+            shared_output = self._shared.get(key)
+            if shared_output:
+                self.saved += 1
+                return bundle_file, key, shared_output
+            shared_output = self._shared[key] = SharedOutput(self._uses[key])
+            self.runs += 1
+
+        if self.pool:
+            self._run(bundle_file, bundle, shared_output=shared_output)
+            return bundle_file, key, shared_output
+
+        # This bundle is the first to need the file, so computes it for the others
+        try:
+            shared_output.set(output=''.join(processor_pipeline(bundle_file.processors, FileChunkGenerator(open(bundle_file.file_path, 'rb')), bundle=bundle)))
+        except Exception as e:
+            shared_output.set(error=e)
+
+        return bundle_file, key, shared_output
+
+    def _finish(self, bundle_file, key, result):
+        if result is None:
+            return bundle_file, FileChunkGenerator(open(bundle_file.file_path, 'rb'))
+
+        if key:
+            with self._lock:
+                result.uses -= 1
+                if not result.uses:
+                    # Everything that needs it has it - don't hold on to it for the rest of the build
+                    del self._shared[key]
+
+        if hasattr(result, 'get'):
+            return bundle_file, [result.get()]
+        return bundle_file, result
+
+
+class SegmentCache(object):
+    """
+    Preprocessed output of bundle files kept in memory between builds (for watch_bundles --hot) - a file is only
+    reprocessed when its mtime or size, or the contents of a file it imports, changes. It has FilePreprocessor's
+    iter_outputs so it can be passed to make_bundle as the file_preprocessor.
+    """
+    # Files are read whilst they're being edited, and a mapped file being truncated kills the watcher with SIGBUS
+    map_files = False
+
+    def __init__(self):
+        self.runs = 0
+        self._segments = {}
+        self._lock = threading.Lock()
+
+    def get_key(self, bundle_file):
+        """
+        Key for a file's output, or None if it can't be kept (e.g. templated files, whose output can change as bundles
+        are built)
+        """
+        if all(processor.cacheable for processor in bundle_file.processors):
+            return bundle_file.file_path, tuple(processor.get_fingerprint() for processor in bundle_file.processors)
+        return None
+
+    def get_signature(self, bundle_file):
+        stat = os.stat(bundle_file.file_path)
+        return stat.st_mtime, stat.st_size, get_dependency_graph().get_dependency_key(bundle_file.file_path, bundle_file.file_type)
+
+    def get_output(self, bundle_file, bundle=None):
+        key = self.get_key(bundle_file)
+
+        if key:
+            # Taken before processing - if the file changes meanwhile, it won't match next time
+            signature = self.get_signature(bundle_file)
+            with self._lock:
+                cached = self._segments.get(key)
+            if cached and cached[0] == signature:
+                return cached[1]
+
+        with self._lock:
+            self.runs += 1
+
+        output = ''.join(processor_pipeline(bundle_file.processors, FileChunkGenerator(open(bundle_file.file_path, 'rb')), bundle=bundle))
+
+        if key:
+            with self._lock:
+                self._segments[key] = signature, output
+
+        return output
+
+    def iter_outputs(self, bundle_files, bundle=None):
+        for bundle_file in bundle_files:
+            yield bundle_file, [self.get_output(bundle_file, bundle)]
+
+
+def iter_bundle_files(bundle, file_preprocessor=None):
+    file_preprocessor = file_preprocessor or FilePreprocessor()
+
+    for bundle_file, output in file_preprocessor.iter_outputs(bundle.files, bundle=bundle.name):
+        for chunk in output:
             yield chunk
         yield '\n'
 
 
-def make_uglify_bundle(bundle, fixed_version=None):
-    m = md5()
+def get_version_before_build(bundle, fixed_version=None, map_files=True):
+    """
+    Returns a bundle's version if it's known before building it - fixed (--dev), or from its inputs with
+    settings.BUNDLES_VERSION_STRATEGY = 'input' - otherwise None and it's a hash of the output
+    """
+    if fixed_version:
+        return fixed_version
+    if bundles_settings.BUNDLES_VERSION_STRATEGY == 'input':
+        return get_bundle_input_version(bundle, map_files=map_files)
+    return None
+
+
+def make_uglify_bundle(bundle, fixed_version=None, file_preprocessor=None):
+    file_preprocessor = file_preprocessor or FilePreprocessor()
+
+    hash_version = get_version_before_build(bundle, fixed_version, map_files=file_preprocessor.map_files)
+    m = None if hash_version else get_hash_function()()
 
     infile_list = []
     source_map_processed_input_files = []
 
     try:
-        for bundle_file in bundle.files:
+        for bundle_file, output in file_preprocessor.iter_outputs(bundle.files, bundle=bundle.name):
             if bundle_file.processors:
                 # for now preprocessed files are written to temp files and therefore won't be available in the source map
-                output_pipeline = processor_pipeline(bundle_file.processors, FileChunkGenerator(open(bundle_file.file_path, 'rb')))
-                tmp_input_file = NamedTemporaryFile()
+                tmp_input_file = get_temp_file_pool().get_file()
                 source_map_processed_input_files.append(tmp_input_file)
-                for chunk in output_pipeline:
-                    m.update(chunk)
+                for chunk in output:
+                    if m:
+                        m.update(chunk)
                     tmp_input_file.write(chunk)
-                tmp_input_file.seek(0)
+                tmp_input_file.flush()
                 infile_list.append(tmp_input_file.name)
             else:
-                for chunk in FileChunkGenerator(open(bundle_file.file_path, 'rb')):
-                    m.update(chunk)
+                if m:
+                    for chunk in output:
+                        m.update(chunk)
                 infile_list.append(bundle_file.file_path)
 
-        hash_version = fixed_version or m.hexdigest()
+        hash_version = hash_version or m.hexdigest()
 
         output_file_name = bundle.get_path(hash_version)
         if bundle.source_map_file_root and bundle.source_map_url_root:
@@ -66,6 +309,9 @@ def make_uglify_bundle(bundle, fixed_version=None):
 
         # Consume the iterator into a zero length deque
         collections.deque(run_process(bundle.uglify_command.format(infile_list=' '.join(infile_list), source_map_options=' '.join(source_map_options))), maxlen=0)
+
+        # uglify writes the file itself, so it has to be compressed afterwards
+        compress_file(output_file_name)
     finally:
         for tmp_input_file in source_map_processed_input_files:
             tmp_input_file.close()
@@ -73,43 +319,86 @@ def make_uglify_bundle(bundle, fixed_version=None):
     return hash_version
 
 
-def make_bundle(bundle, fixed_version=None):
+def make_bundle(bundle, fixed_version=None, file_preprocessor=None):
     """
     Does all of the processing required to create a bundle and write it to disk, returning its hash version
     """
     tmp_output_file_name = '%s.%s.%s' % (os.path.join(bundle.bundle_file_root, bundle.bundle_filename), 'temp', bundle.bundle_type)
 
-    iter_input = iter_bundle_files(bundle)
+    iter_input = iter_bundle_files(bundle, file_preprocessor=file_preprocessor)
 
-    output_pipeline = processor_pipeline(bundle.processors, iter_input)
+    output_pipeline = processor_pipeline(bundle.processors, iter_input, bundle=bundle.name)
 
-    m = md5()
+    hash_version = get_version_before_build(bundle, fixed_version, map_files=file_preprocessor is None or file_preprocessor.map_files)
+    m = None if hash_version else get_hash_function()()
 
-    with open(tmp_output_file_name, 'wb') as output_file:
+    # Compressed copies (settings.BUNDLES_COMPRESSION) are written in the same pass
+    with CompressedFileWriter(tmp_output_file_name) as output_file:
         for chunk in output_pipeline:
-            m.update(chunk)
+            if m:
+                m.update(chunk)
             output_file.write(chunk)
 
-    hash_version = fixed_version or m.hexdigest()
+    hash_version = hash_version or m.hexdigest()
 
     output_file_name = bundle.get_path(hash_version)
 
-    os.rename(tmp_output_file_name, output_file_name)
+    output_file.rename(output_file_name)
+
+    return hash_version
+
+
+def has_processors(bundle):
+    return any(bundle.processors) or any(any(bundle_file.processors) for bundle_file in bundle.files)
+
+
+def make_concatenated_bundle(bundle, fixed_version=None, map_files=True):
+    """
+    make_bundle for bundles without any preprocessors or postprocessors - the files are copied straight into the
+    bundle and hashed from mmaps of them (unless map_files is False), rather than read through Python in chunks
+    """
+    tmp_output_file_name = '%s.%s.%s' % (os.path.join(bundle.bundle_file_root, bundle.bundle_filename), 'temp', bundle.bundle_type)
+
+    hash_version = get_version_before_build(bundle, fixed_version, map_files=map_files)
+    m = None if hash_version else get_hash_function()()
+
+    with CompressedFileWriter(tmp_output_file_name) as output_file:
+        for bundle_file in bundle.files:
+            with open(bundle_file.file_path, 'rb') as input_file:
+                output_file.write_file(input_file, m, map_files=map_files)
+            # As iter_bundle_files does
+            if m:
+                m.update('\n')
+            output_file.write('\n')
+
+    hash_version = hash_version or m.hexdigest()
+
+    output_file.rename(bundle.get_path(hash_version))
 
     return hash_version
 
 
 def do_make_bundle(args):
-    bundle, fixed_version = args
+    bundle, fixed_version, file_preprocessor = args
 
     if bundle.uglify_command:
-        hash_version = make_uglify_bundle(bundle, fixed_version=fixed_version)
+        hash_version = make_uglify_bundle(bundle, fixed_version=fixed_version, file_preprocessor=file_preprocessor)
+    elif not has_processors(bundle):
+        hash_version = make_concatenated_bundle(bundle, fixed_version=fixed_version, map_files=file_preprocessor is None or file_preprocessor.map_files)
     else:
-        hash_version = make_bundle(bundle, fixed_version=fixed_version)
+        hash_version = make_bundle(bundle, fixed_version=fixed_version, file_preprocessor=file_preprocessor)
 
     return bundle.name, hash_version
 
 
+# Rows in each of the --profile tables
+PROFILE_ROWS = 20
+
+
+def get_build_state_file():
+    return bundles_settings.BUNDLES_BUILD_STATE_FILE or '%s.state' % bundles_settings.BUNDLES_VERSION_FILE
+
+
 class Command(BaseCommand):
     help = "Bundles up the media"
     requires_model_validation = False
@@ -124,55 +413,186 @@ class Command(BaseCommand):
             default=False,
             help='Create bundles in parallel'
         ),
+        make_option('--jobs',
+            type='int',
+            default=1,
+            help='Number of workers to preprocess files with'
+        ),
+        make_option('--pool',
+            type='choice',
+            choices=('threads', 'processes'),
+            default='threads',
+            help='Preprocess files in worker threads (the default) or processes (for pure Python processors)'
+        ),
+        make_option('--force',
+            action='store_true',
+            default=False,
+            help='Rebuild every bundle, even if its inputs have not changed'
+        ),
+        make_option('--plan',
+            action='store_true',
+            default=False,
+            help='Only print which bundles would be rebuilt'
+        ),
+        make_option('--profile',
+            action='store_true',
+            default=False,
+            help='Print the slowest files and processors'
+        ),
     )
 
+    def write_file_sizes(self, file_name):
+        if get_compressors():
+            self.stdout.write("\t%s\n" % ', '.join('%s %s bytes' % size for size in get_file_sizes(file_name)))
+
+    def write_profile(self, profile):
+        self.stdout.write("Slowest processors:\n")
+        self.stdout.write("%10s %6s %7s %12s %12s %12s  %s\n" % ('time (s)', 'runs', 'spawns', 'bytes in', 'bytes out', '1st out (ms)', 'processor'))
+        for total in profile.get_slowest_processors(PROFILE_ROWS):
+            self.stdout.write("%10.3f %6s %7s %12s %12s %12s  %s\n" % (
+                total['self_time'],
+                total['runs'],
+                total['spawns'],
+                total['bytes_in'],
+                total['bytes_out'],
+                '-' if total['first_chunk_time'] is None else '%.1f' % (1000 * total['first_chunk_time']),
+                total['name'],
+            ))
+
+        self.stdout.write("Slowest files:\n")
+        self.stdout.write("%10s %10s %11s  %s\n" % ('time (s)', 'wall (s)', 'processors', 'file'))
+        for total in profile.get_slowest_files(PROFILE_ROWS):
+            self.stdout.write("%10.3f %10.3f %11s  %s (%s)\n" % (
+                total['self_time'],
+                total['wall_time'],
+                total['processors'],
+                total['file_path'] or 'postprocessors',
+                total['bundle'],
+            ))
+
     def handle(self, *args, **options):
-        self.stdout.write("Bundling...\n")
+        if not options.get('profile'):
+            return self.build(**options)
+
+        if options.get('pool') == 'processes':
+            self.stdout.write("Processors run in worker processes aren't profiled\n")
+
+        profile = ProcessorProfile()
+        add_processor_listener(profile.add)
+        try:
+            self.build(**options)
+        finally:
+            remove_processor_listener(profile.add)
+        self.write_profile(profile)
+
+    def build(self, **options):
         dev_mode = bool(options.get('dev'))
+        fixed_version = '_' if dev_mode else None
+        force = bool(options.get('force'))
+        plan = bool(options.get('plan'))
+
+        if not plan:
+            self.stdout.write("Bundling...\n")
+
+        # Work out which bundles have changed since the last build
+        build_state = BuildState(get_build_state_file())
+        previous_versions = dict(get_bundle_versions())
 
+        fingerprints = {}
+        to_build = []
         _bundle_versions = {}
+
+        for bundle in get_bundles():
+            fingerprints[bundle.name] = build_state.get_bundle_fingerprint(bundle)
+            if force:
+                reason = 'forced'
+            else:
+                reason = build_state.get_rebuild_reason(bundle, fingerprints[bundle.name], previous_versions.get(bundle.name), fixed_version=fixed_version)
+
+            if plan:
+                self.stdout.write("%s\t%s%s\n" % ('REBUILD' if reason else 'UP TO DATE', bundle.name, ' (%s)' % reason if reason else ''))
+            elif reason:
+                to_build.append(bundle)
+            else:
+                self.stdout.write("Unchanged bundle: %s\n\t%s\n" % (bundle.name, previous_versions[bundle.name]))
+                _bundle_versions[bundle.name] = previous_versions[bundle.name]
+
+        if plan:
+            return
+
         set_bundle_versions(_bundle_versions)
 
-        if options.get('parallel'):
-            self.stdout.write("Writing bundles in parallel\n")
-            pool = Pool()
-            results = pool.map(do_make_bundle, [
-                (bundle, '_' if dev_mode else None)
-                for bundle in get_bundles()
-            ])
-            pool.close()
-            pool.join()
-
-            for bundle_name, hash_version in results:
-                _bundle_versions[bundle_name] = hash_version
-        else:
-            for bundle in get_bundles():
-                self.stdout.write("Writing bundle: %s\n" % bundle.name)
+        if 'brotli' in bundles_settings.BUNDLES_COMPRESSION and not compression.brotli:
+            self.stdout.write("The brotli module isn't installed - not writing .br files\n")
+
+        jobs = options.get('jobs') or 1
+        use_processes = options.get('pool') == 'processes'
+        file_pool = None
+        if jobs > 1:
+            self.stdout.write("Preprocessing files with %s worker %s\n" % (jobs, 'processes' if use_processes else 'threads'))
+            file_pool = multiprocessing.Pool(jobs) if use_processes else Pool(jobs)
+        file_preprocessor = FilePreprocessor(pool=file_pool, jobs=jobs, processes=use_processes)
+        file_preprocessor.add_bundles(to_build)
+
+        try:
+            if options.get('parallel'):
+                self.stdout.write("Writing bundles in parallel\n")
+                pool = Pool()
+                results = pool.map(do_make_bundle, [
+                    (bundle, fixed_version, file_preprocessor)
+                    for bundle in to_build
+                ])
+                pool.close()
+                pool.join()
+
+                for bundle_name, hash_version in results:
+                    _bundle_versions[bundle_name] = hash_version
+                    self.stdout.write("Written bundle: %s\n\t%s\n" % (bundle_name, hash_version))
+                    self.write_file_sizes(get_bundles()[bundle_name].get_path(hash_version))
+            else:
+                for bundle in to_build:
+                    self.stdout.write("Writing bundle: %s\n" % bundle.name)
 
-                _, hash_version = do_make_bundle((bundle, '_' if dev_mode else None))
-                # Build bundle versions as we're going along in case they're used in templated bundles
-                _bundle_versions[bundle.name] = hash_version
+                    _, hash_version = do_make_bundle((bundle, fixed_version, file_preprocessor))
+                    # Build bundle versions as we're going along in case they're used in templated bundles
+                    _bundle_versions[bundle.name] = hash_version
 
-                self.stdout.write("\t%s\n" % bundle.get_version())
+                    self.stdout.write("\t%s\n" % bundle.get_version())
+                    self.write_file_sizes(bundle.get_path(hash_version))
+        finally:
+            if file_pool:
+                file_pool.close()
+                file_pool.join()
 
-        version_info = '\n'.join(['    "%s": "%s",' % version for version in _bundle_versions.iteritems()])
+        self.stdout.write("Preprocessed %s file%s (%s shared preprocessor run%s saved)\n" % (
+            file_preprocessor.runs, '' if file_preprocessor.runs == 1 else 's',
+            file_preprocessor.saved, '' if file_preprocessor.saved == 1 else 's',
+        ))
 
-        with open(bundles_settings.BUNDLES_VERSION_FILE, 'wb') as bundles_versions:
-            bundles_versions.write("""\
-#!/usr/bin/env python
+        for bundle in to_build:
+            build_state.set_bundle(bundle, fingerprints[bundle.name], _bundle_versions[bundle.name], fixed_version=fixed_version)
+        build_state.save()
 
-BUNDLES_VERSIONS = {
-%s
-}
-""" % version_info)
+        write_bundle_versions(bundles_settings.BUNDLES_VERSION_FILE, _bundle_versions)
+
+        if bundles_settings.BUNDLES_RUNTIME_SNAPSHOT_FILE:
+            self.stdout.write("Writing runtime snapshot: %s\n" % bundles_settings.BUNDLES_RUNTIME_SNAPSHOT_FILE)
+            write_runtime_snapshot(bundles_settings.BUNDLES_RUNTIME_SNAPSHOT_FILE, get_bundles(), _bundle_versions)
 
         for single_file_input, single_file_output in bundles_settings.BUNDLES_SINGLE_FILES:
             self.stdout.write("Writing: %s\n" % single_file_output)
             file_type = os.path.splitext(single_file_input)[1][1:]
             processors = processor_library.get_default_preprocessors_for(file_type) + processor_library.get_default_postprocessors_for(file_type)
 
-            with open(single_file_output, 'wb') as output_file:
+            with CompressedFileWriter(single_file_output) as output_file:
                 for chunk in processor_pipeline(processors, FileChunkGenerator(open(single_file_input, 'rb'))):
                     output_file.write(chunk)
+            self.write_file_sizes(single_file_output)
+
+        processor_cache = get_processor_cache()
+        if processor_cache:
+            stats = processor_cache.get_stats()
+            lookups = stats['hits'] + stats['misses']
+            self.stdout.write("Processor cache: %s hits, %s misses (%d%% hit rate)\n" % (stats['hits'], stats['misses'], 100 * stats['hits'] / lookups if lookups else 0))
 
         self.stdout.write("Done.\n")
@@ -2,31 +2,40 @@ from subprocess import CalledProcessError
 from django.core.management.base import BaseCommand, CommandError
 
 from django_bundles.core import get_bundles
+from django_bundles.linting import get_output_parser
 from django_bundles.processors import processor_pipeline
 from django_bundles.utils.files import FileChunkGenerator
+from django_bundles.utils.lint_cache import LintCache
 from django_bundles.utils.processes import run_process
+from django_bundles.utils.tempfiles import get_temp_file_pool
 from django_bundles.conf.bundles_settings import bundles_settings
 
 from optparse import make_option
 import collections
 
 import os
-from tempfile import NamedTemporaryFile
+import pipes
 from multiprocessing.dummy import Pool
 
 
+# Output beyond this from a batch is treated as ambiguous (it may have been cut short)
+MAX_BATCH_OUTPUT_SIZE = 16 * 1024 * 1024
+
+DEFAULT_BATCH_SIZE = 50
+
+
 def lint_file(bundle_type, file_path, iter_input=None):
     command = bundles_settings.BUNDLES_LINTING[bundle_type]['command']
 
     input_file = None
     stdin = None
 
-    if '{infile}' in command:
+    if '{infile}' in command or '{infile_list}' in command:
         if iter_input:
             if hasattr(iter_input, 'file_path'):
                 filename = iter_input.file_path
             else:
-                input_file = NamedTemporaryFile()
+                input_file = get_temp_file_pool().get_file()
                 for chunk in iter_input:
                     input_file.write(chunk)
                 input_file.flush()
@@ -35,7 +44,7 @@ def lint_file(bundle_type, file_path, iter_input=None):
         else:
             filename = file_path
 
-        command = command.format(infile=filename)
+        command = command.format(infile=filename, infile_list=pipes.quote(filename))
     else:
         if iter_input:
             stdin = iter_input
@@ -51,12 +60,148 @@ def lint_file(bundle_type, file_path, iter_input=None):
     return True, ''
 
 
+def cached_lint_file(lint_cache, bundle_type, file_path, iter_input=None):
+    """
+    Like lint_file, but replays the result from lint_cache if this content has already been linted
+    """
+    command = bundles_settings.BUNDLES_LINTING[bundle_type]['command']
+
+    if iter_input is None or hasattr(iter_input, 'file_path'):
+        # Unprocessed - the file itself is linted
+        contents = ''.join(iter_input or FileChunkGenerator(open(file_path, 'rb')))
+        iter_input = None
+    else:
+        contents = ''.join(iter_input)
+        iter_input = [contents]
+
+    key = lint_cache.get_key(command, file_path, contents)
+    result = lint_cache.get(key)
+    if result is not None:
+        return result
+
+    success, error_message = lint_file(bundle_type, file_path, iter_input=iter_input)
+    lint_cache.set(key, success, error_message)
+    return success, error_message
+
+
 def do_lint_file(args):
-    bundle_type, file_path, processors = args
-    success, error_message = lint_file(bundle_type, file_path, iter_input=processor_pipeline(processors, FileChunkGenerator(open(file_path, 'rb'))))
+    bundle_type, file_path, processors, lint_cache = args
+    iter_input = processor_pipeline(processors, FileChunkGenerator(open(file_path, 'rb')))
+    if lint_cache:
+        success, error_message = cached_lint_file(lint_cache, bundle_type, file_path, iter_input=iter_input)
+    else:
+        success, error_message = lint_file(bundle_type, file_path, iter_input=iter_input)
     return success, error_message, file_path
 
 
+def lint_files(bundle_type, file_paths):
+    """
+    Lints several files with one run of an {infile_list} command and returns a (success, error_message) for each - if
+    the command fails and its output parser can't tell which files the output belongs to, they're linted one at a time
+    """
+    lint_conf = bundles_settings.BUNDLES_LINTING[bundle_type]
+    command = lint_conf['command'].format(infile_list=' '.join(pipes.quote(file_path) for file_path in file_paths))
+
+    try:
+        collections.deque(run_process(command, error_output_size=MAX_BATCH_OUTPUT_SIZE), maxlen=0)
+    except CalledProcessError as e:
+        if len(file_paths) == 1:
+            return [(False, e.output)]
+
+        failures = None
+        if len(e.output) < MAX_BATCH_OUTPUT_SIZE:
+            failures = get_output_parser(lint_conf).parse(e.output, file_paths)
+
+        if not failures:
+            return [lint_file(bundle_type, file_path) for file_path in file_paths]
+
+        return [(file_path not in failures, failures.get(file_path, '')) for file_path in file_paths]
+
+    return [(True, '')] * len(file_paths)
+
+
+def do_lint_batch(args):
+    """
+    Lints a list of (file path, processors) with lint_files - preprocessed files are written to temporary files first
+    """
+    bundle_type, batch, lint_cache = args
+    command = bundles_settings.BUNDLES_LINTING[bundle_type]['command']
+
+    results = {}
+    to_lint = []
+    temp_files = []
+
+    try:
+        for file_path, processors in batch:
+            iter_input = processor_pipeline(processors, FileChunkGenerator(open(file_path, 'rb')))
+            contents = ''.join(iter_input)
+
+            if hasattr(iter_input, 'file_path'):
+                lint_path = file_path
+            else:
+                input_file = get_temp_file_pool().get_file(suffix=os.path.splitext(file_path)[1])
+                input_file.write(contents)
+                input_file.flush()
+                temp_files.append(input_file)
+                lint_path = input_file.name
+
+            key = None
+            if lint_cache:
+                key = lint_cache.get_key(command, file_path, contents)
+                result = lint_cache.get(key)
+                if result is not None:
+                    results[file_path] = result
+                    continue
+
+            to_lint.append((file_path, lint_path, key))
+
+        if to_lint:
+            for (file_path, lint_path, key), (success, error_message) in zip(to_lint, lint_files(bundle_type, [lint_path for _, lint_path, _ in to_lint])):
+                # Report preprocessed files under their own names
+                error_message = error_message.replace(lint_path, file_path)
+                results[file_path] = success, error_message
+                if key:
+                    lint_cache.set(key, success, error_message)
+    finally:
+        for input_file in temp_files:
+            input_file.close()
+
+    return [results[file_path] + (file_path,) for file_path, _ in batch]
+
+
+def get_lint_jobs(files_to_lint):
+    """
+    Returns a list of (function, args) - a do_lint_batch for each batch of files with an {infile_list} command and a
+    do_lint_file for each of the rest
+    """
+    jobs = []
+    batches = {}
+
+    for bundle_type, file_path, processors, lint_cache in files_to_lint:
+        lint_conf = bundles_settings.BUNDLES_LINTING[bundle_type]
+        if '{infile_list}' not in lint_conf['command']:
+            jobs.append((do_lint_file, (bundle_type, file_path, processors, lint_cache)))
+            continue
+
+        batch = batches.get(bundle_type)
+        if batch is None or len(batch) >= lint_conf.get('batch_size', DEFAULT_BATCH_SIZE):
+            batch = batches[bundle_type] = []
+            jobs.append((do_lint_batch, (bundle_type, batch, lint_cache)))
+        batch.append((file_path, processors))
+
+    return jobs
+
+
+def run_lint_job(job):
+    function, args = job
+    results = function(args)
+    return results if function is do_lint_batch else [results]
+
+
+def get_lint_cache_file():
+    return bundles_settings.BUNDLES_LINT_CACHE_FILE or '%s.lint' % bundles_settings.BUNDLES_VERSION_FILE
+
+
 class Command(BaseCommand):
     help = "Lints the bundles based on settings.BUNDLES_LINTING"
     option_list = BaseCommand.option_list + (
@@ -73,6 +218,14 @@ class Command(BaseCommand):
             default=False,
             help='Parallel for speed',
         ),
+        make_option('--cache-file',
+            help='Where to keep lint results (defaults to settings.BUNDLES_LINT_CACHE_FILE)',
+        ),
+        make_option('--no-cache',
+            action='store_true',
+            default=False,
+            help='Lint every file, ignoring and not updating previous results',
+        ),
     )
     requires_model_validation = False
 
@@ -80,6 +233,10 @@ class Command(BaseCommand):
         show_successes = not bool(options.get('failures_only'))
         file_pattern = options.get('pattern')
 
+        lint_cache = None
+        if not options.get('no_cache'):
+            lint_cache = LintCache(options.get('cache_file') or get_lint_cache_file())
+
         failures = 0
         files_added = set()
         files_to_lint = []
@@ -104,6 +261,7 @@ class Command(BaseCommand):
                     bundle.bundle_type,
                     bundle_file.file_path,
                     bundle_file.processors,
+                    lint_cache,
                 ))
 
         def handle_result(success, error_message, file_path):
@@ -116,23 +274,39 @@ class Command(BaseCommand):
                 self.stdout.write(self.style.HTTP_SERVER_ERROR(error_message))
                 return 1
 
+        jobs = get_lint_jobs(files_to_lint)
         if options.get('parallel'):
             pool = Pool()
-            results = pool.map(do_lint_file, files_to_lint)
+            job_results = pool.map(run_lint_job, jobs)
             pool.close()
             pool.join()
-
-            for success, error_message, file_path in results:
-                failures += handle_result(success, error_message, file_path)
         else:
-            for bundle_type, file_path, processors in files_to_lint:
-                success, error_message, _ = do_lint_file((bundle_type, file_path, processors))
-                failures += handle_result(success, error_message, file_path)
+            job_results = map(run_lint_job, jobs)
+
+        # Report in file order, however the files were batched
+        results = {}
+        for job_result in job_results:
+            for success, error_message, file_path in job_result:
+                results[file_path] = success, error_message
+
+        for _, file_path, _, _ in files_to_lint:
+            success, error_message = results[file_path]
+            failures += handle_result(success, error_message, file_path)
 
         for single_file_path, _ in bundles_settings.BUNDLES_SINGLE_FILES:
-            success, error_message = lint_file(os.path.splitext(single_file_path)[1][1:], single_file_path)
+            bundle_type = os.path.splitext(single_file_path)[1][1:]
+            if lint_cache:
+                success, error_message = cached_lint_file(lint_cache, bundle_type, single_file_path)
+            else:
+                success, error_message = lint_file(bundle_type, single_file_path)
             failures += handle_result(success, error_message, single_file_path)
 
+        if lint_cache:
+            # Only prune results when every file was looked up
+            lint_cache.save(prune=not file_pattern)
+            stats = lint_cache.get_stats()
+            self.stdout.write('\nLint cache: %s hits, %s misses (%.0f%% hit rate)\n' % (stats['hits'], stats['misses'], stats['hit_rate'] * 100))
+
         if failures:
             raise CommandError('%s FILE%s FAILED' % (failures, 'S' if failures > 1 else ''))
         else:
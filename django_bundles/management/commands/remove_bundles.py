@@ -3,6 +3,14 @@ from django.core.management.base import BaseCommand
 
 from django_bundles.conf.bundles_settings import bundles_settings
 from django_bundles.core import get_bundles, get_bundle_versions
+from django_bundles.utils.compression import get_compressed_file_names
+
+
+def remove_compressed_files(file_name):
+    for compressed_file_name in get_compressed_file_names(file_name):
+        if os.path.exists(compressed_file_name):
+            os.remove(compressed_file_name)
+
 
 class Command(BaseCommand):
     help = "Removes any created bundles"
@@ -20,6 +28,7 @@ class Command(BaseCommand):
                 os.remove(bundle_path)
             except:
                 self.stderr.write("Could not remove bundle: %s\n" % bundle_path)
+            remove_compressed_files(bundle_path)
 
             if bundle.uglify_command:
                 try:
@@ -33,11 +42,16 @@ class Command(BaseCommand):
         self.stdout.write("Removing bundles version file: %s\n" % bundles_settings.BUNDLES_VERSION_FILE)
         os.remove(bundles_settings.BUNDLES_VERSION_FILE)
 
+        if bundles_settings.BUNDLES_RUNTIME_SNAPSHOT_FILE and os.path.exists(bundles_settings.BUNDLES_RUNTIME_SNAPSHOT_FILE):
+            self.stdout.write("Removing runtime snapshot: %s\n" % bundles_settings.BUNDLES_RUNTIME_SNAPSHOT_FILE)
+            os.remove(bundles_settings.BUNDLES_RUNTIME_SNAPSHOT_FILE)
+
         for _, single_file_output in bundles_settings.BUNDLES_SINGLE_FILES:
             self.stdout.write("Removing: %s\n" % single_file_output)
             try:
                 os.remove(single_file_output)
             except:
                 self.stderr.write("Could not remove single file: %s\n" % single_file_output)
+            remove_compressed_files(single_file_output)
 
         self.stdout.write("Done.\n")
@@ -1,25 +1,54 @@
 from subprocess import CalledProcessError
 from django.core.management.base import BaseCommand, CommandError
 
-from django_bundles.core import get_bundles
+from django_bundles.core import get_bundles, get_bundle_versions, set_bundle_versions
+from django_bundles.management.commands.create_bundles import SegmentCache, do_make_bundle, get_build_state_file
+from django_bundles.management.commands.remove_bundles import remove_compressed_files
 from django_bundles.processors import processor_pipeline
 from django_bundles.utils.files import FileChunkGenerator
 from django_bundles.utils.processes import run_process
+from django_bundles.utils.tempfiles import get_temp_file_pool
+from django_bundles.utils.build_state import BuildState
+from django_bundles.utils.debounce import DebouncedExecutor
+from django_bundles.utils.versions import write_bundle_versions
+from django_bundles.runtime import write_runtime_snapshot
 from django_bundles.conf.bundles_settings import bundles_settings
 
 from optparse import make_option
 import collections
 
 import os
-from tempfile import NamedTemporaryFile
+import pipes
+import threading
+import time
 
 
 LOG_LINES = 10
 
+# Seconds between screen redraws, however many results come in
+REDRAW_INTERVAL = 0.2
+
 
 class Command(BaseCommand):
     help = "Watches the bundles to lint and preprocess files"
     requires_model_validation = False
+    option_list = BaseCommand.option_list + (
+        make_option('--delay',
+            type='float',
+            default=0.1,
+            help='Seconds to wait for a file\'s changes to settle before processing it'
+        ),
+        make_option('--workers',
+            type='int',
+            default=4,
+            help='Number of files to process at once'
+        ),
+        make_option('--hot',
+            action='store_true',
+            default=False,
+            help='Rebuild the bundles themselves and update the versions file as files change'
+        ),
+    )
 
     def lint_file(self, full_path, bundle):
         try:
@@ -29,18 +58,18 @@ class Command(BaseCommand):
             input_file = None
             stdin = None
 
-            if '{infile}' in command:
+            if '{infile}' in command or '{infile_list}' in command:
                 if hasattr(iter_input, 'file_path'):
                     filename = iter_input.file_path
                 else:
-                    input_file = NamedTemporaryFile()
+                    input_file = get_temp_file_pool().get_file()
                     for chunk in iter_input:
                         input_file.write(chunk)
                     input_file.flush()
 
                     filename = input_file.name
 
-                command = command.format(infile=filename)
+                command = command.format(infile=filename, infile_list=pipes.quote(filename))
             else:
                 stdin = iter_input
 
@@ -60,9 +89,57 @@ class Command(BaseCommand):
             except CalledProcessError:
                 self.log_precompile_result(full_path, False)
 
+    def rebuild_bundle(self, bundle):
+        """
+        Rebuilds a bundle from its files' output kept in self.segment_cache (so only changed files are reprocessed),
+        then swaps in its new version
+        """
+        start = time.time()
+        _, hash_version = do_make_bundle((bundle, None, self.segment_cache))
+
+        with self.versions_lock:
+            previous_version = self.bundle_versions.get(bundle.name)
+            self.bundle_versions[bundle.name] = hash_version
+            write_bundle_versions(bundles_settings.BUNDLES_VERSION_FILE, self.bundle_versions)
+            if bundles_settings.BUNDLES_RUNTIME_SNAPSHOT_FILE:
+                write_runtime_snapshot(bundles_settings.BUNDLES_RUNTIME_SNAPSHOT_FILE, get_bundles(), self.bundle_versions)
+
+            # Keep the previous version for pages that are already loading - anything older written by this watch goes
+            written = self.written_versions.setdefault(bundle.name, [])
+            if hash_version not in written:
+                written.append(hash_version)
+            while len(written) > 2:
+                old_path = bundle.get_path(written.pop(0))
+                if os.path.exists(old_path):
+                    os.remove(old_path)
+                remove_compressed_files(old_path)
+
+        with self.log_lock:
+            self.log_lines.append(self.style.HTTP_SUCCESS('REBUILT\t\t%s %s (%.2fs)' % (bundle.name, hash_version, time.time() - start)))
+            self.log_lines = self.log_lines[-LOG_LINES:]
+            self.redraw_needed = True
+
+        return previous_version != hash_version
+
+    def process_file(self, full_path, bundle):
+        self.precompile(full_path, bundle)
+        self.lint_file(full_path, bundle)
+
+    def log_error(self, full_path, error_message):
+        with self.log_lock:
+            self.log_lines.append(self.style.HTTP_SERVER_ERROR('ERROR\t\t%s' % full_path))
+            self.errored_files[full_path] = self.style.HTTP_SERVER_ERROR(error_message)
+            self.log_lines = self.log_lines[-LOG_LINES:]
+            self.redraw_needed = True
+
     def drawscreen(self):
         import curses
 
+        with self.log_lock:
+            self.redraw_needed = False
+            self._drawscreen(curses)
+
+    def _drawscreen(self, curses):
         self.stdout.write(curses.tigetstr('clear'))
         self.stdout.write("Watching files for changes...")
 
@@ -85,24 +162,27 @@ class Command(BaseCommand):
             self.stdout.write('\t' + log_line + '\n')
 
     def log_watch_result(self, src, result, error_message=None):
-        if result:
-            if src in self.errored_files:
-                del self.errored_files[src]
-            self.log_lines.append(self.style.HTTP_SUCCESS('OK\t\t%s' % src))
-        else:
-            self.log_lines.append(self.style.HTTP_SERVER_ERROR('FAIL\t\t%s' % src))
-            self.errored_files[src] = self.style.HTTP_SERVER_ERROR(error_message)
+        # Called from the worker threads - the screen is redrawn by the main thread
+        with self.log_lock:
+            if result:
+                if src in self.errored_files:
+                    del self.errored_files[src]
+                self.log_lines.append(self.style.HTTP_SUCCESS('OK\t\t%s' % src))
+            else:
+                self.log_lines.append(self.style.HTTP_SERVER_ERROR('FAIL\t\t%s' % src))
+                self.errored_files[src] = self.style.HTTP_SERVER_ERROR(error_message)
 
-        self.log_lines = self.log_lines[-LOG_LINES:]
-        self.drawscreen()
+            self.log_lines = self.log_lines[-LOG_LINES:]
+            self.redraw_needed = True
 
     def log_precompile_result(self, src, success):
-        if success:
-            self.log_lines.append(self.style.HTTP_SUCCESS('PRECOMPILED\t\t%s' % src))
-        else:
-            self.log_lines.append(self.style.HTTP_SERVER_ERROR('PRECOMPILE FAILED\t\t%s' % src))
-        self.log_lines = self.log_lines[-LOG_LINES:]
-        self.drawscreen()
+        with self.log_lock:
+            if success:
+                self.log_lines.append(self.style.HTTP_SUCCESS('PRECOMPILED\t\t%s' % src))
+            else:
+                self.log_lines.append(self.style.HTTP_SERVER_ERROR('PRECOMPILE FAILED\t\t%s' % src))
+            self.log_lines = self.log_lines[-LOG_LINES:]
+            self.redraw_needed = True
 
     def handle(self, *args, **options):
         try:
@@ -115,21 +195,53 @@ class Command(BaseCommand):
 
         self.errored_files = {}
         self.log_lines = []
+        self.log_lock = threading.Lock()
+        self.redraw_needed = False
         watching = {}
 
+        # Start from the dependencies create_bundles last scanned - only files that have changed since are rescanned
+        dependency_graph = BuildState(get_build_state_file()).dependencies
+
+        executor = DebouncedExecutor(workers=options.get('workers'), delay=options.get('delay'), error_callback=self.log_error)
+
+        hot = bool(options.get('hot'))
+        if hot:
+            self.segment_cache = SegmentCache()
+            self.versions_lock = threading.Lock()
+            self.written_versions = {}
+            # Pinned, so templated files see the versions built here
+            self.bundle_versions = dict(get_bundle_versions())
+            set_bundle_versions(self.bundle_versions)
+
+        def is_templated(bundle):
+            processors = list(bundle.processors)
+            for bundle_file in bundle.files:
+                processors.extend(bundle_file.processors)
+            return not all(processor.cacheable for processor in processors)
+
+        def rebuild_bundle(bundle):
+            if self.rebuild_bundle(bundle):
+                # Templated bundles can include other bundles' versions
+                for other in get_bundles():
+                    if other is not bundle and is_templated(other):
+                        executor.submit(('bundle', other.name), rebuild_bundle, other)
+
+        def fill_segment_cache(bundle):
+            collections.deque(self.segment_cache.iter_outputs(bundle.files, bundle=bundle.name), maxlen=0)
+
         def check_and_lint_file(src):
             """
             Called when a watched file changes
             """
-            full_path = os.path.realpath(src)
-
-            for watchdir in watching:
-                if watchdir in src:
-                    for bundle in watching[watchdir]:
-                        if full_path in bundle:
-                            self.precompile(full_path, bundle)
-                            self.lint_file(full_path, bundle)
-                            return  # file could appear in multiple bundles
+            # The file itself if it's in a bundle, and any bundle files that import it (e.g. a .less partial)
+            for full_path in dependency_graph.update(os.path.realpath(src)):
+                bundles = bundles_by_file.get(full_path)
+                if bundles:
+                    # Coalesces an editor's burst of events into one run - file could appear in multiple bundles
+                    executor.submit(full_path, self.process_file, full_path, bundles[0])
+                    if hot:
+                        for bundle in bundles:
+                            executor.submit(('bundle', bundle.name), rebuild_bundle, bundle)
 
         class FileEventHandler(FileSystemEventHandler):
             def on_created(self, event):
@@ -140,6 +252,11 @@ class Command(BaseCommand):
                 if not event.is_directory:
                     check_and_lint_file(event.src_path)
 
+            def on_moved(self, event):
+                # Editors that save via a temporary file and rename
+                if not event.is_directory:
+                    check_and_lint_file(event.dest_path)
+
         event_handler = FileEventHandler()
         observer = Observer()
         curses.setupterm()
@@ -147,6 +264,7 @@ class Command(BaseCommand):
 
         # First time we start, precompile everything
         initial_run = set()
+        bundles_by_file = {}
 
         for bundle in get_bundles():
             # Note: watchdog seems to only work with relative paths
@@ -156,16 +274,38 @@ class Command(BaseCommand):
                 observer.schedule(event_handler, path=watch_path, recursive=True)
             watching[watch_path].add(bundle)
 
+            if hot:
+                # So the first rebuild only has to reprocess what changed
+                executor.submit(('bundle', bundle.name), fill_segment_cache, bundle, delay=0)
+
             for bundle_file in bundle.files:
+                full_path = os.path.realpath(bundle_file.file_path)
+                bundles_by_file.setdefault(full_path, []).append(bundle)
+                dependency_graph.add_file(full_path, bundle_file.file_type)
+
                 if bundle_file.file_path in initial_run:
                     continue
                 initial_run.add(bundle_file.file_path)
-                self.precompile(bundle_file.file_path, bundle)
+                executor.submit(full_path, self.precompile, bundle_file.file_path, bundle, delay=0)
+
+        # Partials imported from outside the bundles' directories
+        for dependency_dir in sorted(set(os.path.dirname(dependency) for dependency in dependency_graph.get_dependency_paths())):
+            watch_path = os.path.relpath(dependency_dir)
+            covered = any(
+                watch_path == watched or watch_path.startswith(watched + os.sep) or (watched == os.curdir and not watch_path.startswith(os.pardir))
+                for watched in watching
+            )
+            if os.path.isdir(watch_path) and not covered:
+                watching[watch_path] = set()
+                observer.schedule(event_handler, path=watch_path, recursive=False)
 
         observer.start()
         try:
             while True:
-                time.sleep(10)
+                time.sleep(REDRAW_INTERVAL)
+                if self.redraw_needed:
+                    self.drawscreen()
         except KeyboardInterrupt:
             observer.stop()
         observer.join()
+        executor.stop()
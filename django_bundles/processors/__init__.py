@@ -1 +1,2 @@
 from django_bundles.processors.base import ExecutableProcessor, processor_library, processor_pipeline
+from django_bundles.processors.persistent import PersistentProcessor
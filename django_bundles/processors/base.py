@@ -1,18 +1,35 @@
 from django_bundles.conf.bundles_settings import bundles_settings
+from django_bundles.processors.cache import get_processor_cache
 from django_bundles.utils import get_class
+from django_bundles.utils.dependencies import get_dependency_graph
 from django_bundles.utils.files import FileChunkGenerator
-from django_bundles.utils.processes import run_process
+from django_bundles.utils.processes import run_process, run_pipeline
+from django_bundles.utils.profiling import PipelineProfile, has_processor_listeners
+from django_bundles.utils.tempfiles import get_temp_file_pool
 from django.core.exceptions import ImproperlyConfigured
 
-from tempfile import NamedTemporaryFile
 import collections
+import threading
 
 
 class Processor(object):
+    # Set to False if the output depends on more than the input and the processor's kwargs
+    cacheable = True
+    # kwargs that don't change the output, left out of the fingerprint
+    fingerprint_exclude = ()
+
     def __init__(self, **kwargs):
+        self.init_kwargs = kwargs
         for key, value in kwargs.iteritems():
             setattr(self, key, value)
 
+    def get_fingerprint(self):
+        """
+        Returns a string identifying this processor and its configuration
+        """
+        kwargs = [(key, value) for key, value in self.init_kwargs.items() if key not in self.fingerprint_exclude]
+        return repr(('%s.%s' % (self.__class__.__module__, self.__class__.__name__), sorted(kwargs)))
+
     def process(self, iter_input):
         raise NotImplementedError
 
@@ -20,56 +37,192 @@ class Processor(object):
 class ExecutableProcessor(Processor):
     command = None
     cwd = None
+    # Pass {infile}/{outfile} as named pipes rather than temporary files - only for commands that read and write them
+    # from start to finish (no seeking, and not replacing the file)
+    fifo = False
+    fingerprint_exclude = ('fifo',)
+
+    def get_pipeline_command(self):
+        """
+        Returns (command, cwd) if the command reads stdin and writes stdout (so it can be connected directly to other
+        processes) or None if it uses {infile}/{outfile}
+        """
+        if '{infile}' in self.command or '{outfile}' in self.command:
+            return None
+        return self.command.format(), self.cwd
 
     def process(self, iter_input):
+        if self.fifo:
+            return self.process_with_fifos(iter_input)
+
+        temp_file_pool = get_temp_file_pool()
         input_file = output_file = None
         stdin = iter_input
         format_kwargs = {}
 
-        # Create temporary files for input and output if required
+        # Use temporary files for input and output if required
         if '{infile}' in self.command:
             stdin = None
 
             if hasattr(iter_input, 'file_path'):
                 format_kwargs['infile'] = iter_input.file_path
             else:
-                input_file = NamedTemporaryFile()
+                input_file = temp_file_pool.get_file()
                 format_kwargs['infile'] = input_file.name
 
                 for chunk in iter_input:
                     input_file.write(chunk)
 
-                input_file.seek(0) # Not sure why this is needed
+                input_file.flush()
 
         if '{outfile}' in self.command:
-            output_file = NamedTemporaryFile()
+            output_file = temp_file_pool.get_file()
             format_kwargs['outfile'] = output_file.name
 
         command = self.command.format(**format_kwargs)
 
-        g = run_process(command, stdin=stdin, to_close=input_file, cwd=self.cwd)
+        g = run_process(command, stdin=stdin, to_close=input_file, cwd=self.cwd, output_chunk_size=bundles_settings.BUNDLES_PROCESS_CHUNK_SIZE)
 
         if output_file:
-            # Consume the iterator into a zero length deque
-            collections.deque(g, maxlen=0)
-            return FileChunkGenerator(output_file)
+            try:
+                # Consume the iterator into a zero length deque
+                collections.deque(g, maxlen=0)
+            except Exception:
+                output_file.close()
+                raise
+            return FileChunkGenerator(output_file, chunk_size=bundles_settings.BUNDLES_PROCESS_CHUNK_SIZE)
         else:
             return g
 
+    def process_with_fifos(self, iter_input):
+        """
+        Runs the command with named pipes for {infile} (unless the input is already a file) and {outfile}, streaming
+        the output as it's written
+        """
+        temp_file_pool = get_temp_file_pool()
+        stdin = iter_input
+        input_fifo = output_fifo = None
+        format_kwargs = {}
+
+        if '{infile}' in self.command:
+            if hasattr(iter_input, 'file_path'):
+                stdin = None
+                format_kwargs['infile'] = iter_input.file_path
+            else:
+                # Written to the fifo rather than stdin
+                input_fifo = format_kwargs['infile'] = temp_file_pool.get_fifo()
+
+        if '{outfile}' in self.command:
+            output_fifo = format_kwargs['outfile'] = temp_file_pool.get_fifo()
+
+        try:
+            for chunk in run_process(self.command.format(**format_kwargs), stdin=stdin, cwd=self.cwd, output_chunk_size=bundles_settings.BUNDLES_PROCESS_CHUNK_SIZE, input_fifo=input_fifo, output_fifo=output_fifo):
+                yield chunk
+        finally:
+            for fifo in (input_fifo, output_fifo):
+                if fifo:
+                    temp_file_pool.release_fifo(fifo)
+
+
+class ExecutablePipelineProcessor(Processor):
+    """
+    Runs consecutive ExecutableProcessors as one pipeline with their stdouts and stdins connected by OS pipes, so the
+    intermediate output never passes through Python
+    """
+    def __init__(self, processors):
+        super(ExecutablePipelineProcessor, self).__init__()
+        self.processors = processors
+        self.cacheable = all(processor.cacheable for processor in processors)
+
+    def get_fingerprint(self):
+        return repr([processor.get_fingerprint() for processor in self.processors])
+
+    def process(self, iter_input):
+        return run_pipeline([processor.get_pipeline_command() for processor in self.processors], stdin=iter_input, output_chunk_size=bundles_settings.BUNDLES_PROCESS_CHUNK_SIZE)
+
 
-def processor_pipeline(processors, iter_input):
+def join_executable_processors(processors):
+    """
+    Replaces runs of consecutive stdin/stdout ExecutableProcessors with ExecutablePipelineProcessors
+    """
+    joined = []
+    run = []
+
+    for processor in processors:
+        if processor and getattr(processor, 'get_pipeline_command', None) and processor.get_pipeline_command():
+            run.append(processor)
+            continue
+
+        if run:
+            joined.append(run[0] if len(run) == 1 else ExecutablePipelineProcessor(run))
+            run = []
+        joined.append(processor)
+
+    if run:
+        joined.append(run[0] if len(run) == 1 else ExecutablePipelineProcessor(run))
+
+    return joined
+
+
+def profiled_pipeline(processors, iter_input, processor_cache, dependency_key, bundle=None):
+    """
+    processor_pipeline with each processor instrumented for the listeners in django_bundles.utils.profiling
+    """
+    def process(processor, pipeline):
+        if processor_cache and processor.cacheable:
+            return processor_cache.process(processor, pipeline, dependency_key)
+        return processor.process(pipeline)
+
+    processors = [processor for processor in processors if processor]
+    if not processors:
+        return iter_input
+
+    profile = PipelineProfile(iter_input, bundle=bundle, file_path=getattr(iter_input, 'file_path', None))
+    pipeline = profile.output
+    for processor in processors:
+        pipeline = profile.run(processor, process, pipeline)
+
+    return pipeline
+
+
+def processor_pipeline(processors, iter_input, bundle=None):
+    """
+    Chains processors' outputs - bundle is the name of the bundle being built, for profiling
+    """
+    processor_cache = get_processor_cache()
     pipeline = iter_input
 
+    dependency_key = ''
+    if processor_cache and hasattr(iter_input, 'file_path'):
+        # Processors like lessc also read the files the input imports
+        dependency_key = get_dependency_graph().get_dependency_key(iter_input.file_path)
+
+    processors = join_executable_processors(processors)
+    if has_processor_listeners():
+        return profiled_pipeline(processors, iter_input, processor_cache, dependency_key, bundle=bundle)
+
     for processor in processors:
         if not processor:
             continue
 
-        pipeline = processor.process(pipeline)
+        if processor_cache and processor.cacheable:
+            pipeline = processor_cache.process(processor, pipeline, dependency_key)
+        else:
+            pipeline = processor.process(pipeline)
 
     return pipeline
 
 
 class ProcessorLibrary(object):
+    """
+    Creates processors from their definitions - processors don't keep any state between files, so there's one
+    instance per unique definition shared by every bundle and file that uses it
+    """
+    def __init__(self):
+        self._instances = {}
+        # Reentrant in case importing a processor's module creates processors
+        self._lock = threading.RLock()
+
     def get_processor(self, processor_defn):
         class_path, init_kwargs = None, {}
         if isinstance(processor_defn, basestring):
@@ -81,10 +234,15 @@ class ProcessorLibrary(object):
                 class_path, init_kwargs = processor_defn
 
         if class_path:
-            processor_class = get_class(class_path)
-
-            if processor_class:
-                return processor_class(**init_kwargs)
+            key = repr((class_path, sorted(init_kwargs.items())))
+            with self._lock:
+                instance = self._instances.get(key)
+                if instance is None:
+                    processor_class = get_class(class_path)
+                    if processor_class:
+                        instance = self._instances[key] = processor_class(**init_kwargs)
+            if instance is not None:
+                return instance
 
         raise ImproperlyConfigured("Invalid processor: %s" % repr(processor_defn))
 
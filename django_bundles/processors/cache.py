@@ -0,0 +1,243 @@
+from django.core.exceptions import ImproperlyConfigured
+
+from django_bundles.conf.bundles_settings import bundles_settings
+from django_bundles.utils import get_class
+from django_bundles.utils.lru import LRUCache
+
+from hashlib import sha1
+from tempfile import NamedTemporaryFile
+import threading
+import errno
+import os
+
+
+class CachedInput(object):
+    """
+    A file's contents, already read to work out its cache key - it keeps the file's path so processors still see the
+    source file (e.g. {infile} commands get it rather than a temporary copy, so relative imports resolve)
+    """
+    def __init__(self, data, file_path):
+        self.file_path = file_path
+        self._chunks = iter([data])
+
+    def __iter__(self):
+        return self
+
+    def next(self):
+        return self._chunks.next()
+
+
+class ProcessorCache(object):
+    """
+    Content addressed cache of processor output - keyed by the input bytes, the processor's fingerprint (class and
+    kwargs) and the contents of any files the input imports. Subclasses implement get and set for a storage backend.
+    """
+    def __init__(self, max_size=None):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+
+    def get_key(self, processor, input_data, dependency_key=''):
+        m = sha1()
+        m.update(processor.get_fingerprint())
+        m.update('\0')
+        if dependency_key:
+            m.update(dependency_key)
+            m.update('\0')
+        m.update(input_data)
+        return m.hexdigest()
+
+    def get(self, key):
+        raise NotImplementedError
+
+    def set(self, key, output):
+        raise NotImplementedError
+
+    def get_stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+    def process(self, processor, iter_input, dependency_key=''):
+        """
+        Runs processor.process on iter_input unless the output is already cached - dependency_key identifies the
+        contents of the files it imports (see django_bundles.utils.dependencies)
+        """
+        file_path = getattr(iter_input, 'file_path', None)
+        input_data = ''.join(iter_input)
+        key = self.get_key(processor, input_data, dependency_key)
+
+        output = self.get(key)
+
+        with self._stats_lock:
+            if output is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        if output is None:
+            output = ''.join(processor.process(CachedInput(input_data, file_path) if file_path else iter([input_data])))
+            self.set(key, output)
+
+        yield output
+
+
+class MemoryProcessorCache(ProcessorCache):
+    """
+    Keeps processor output in memory for the life of the process
+    """
+    def __init__(self, max_size=64 * 1024 * 1024):
+        super(MemoryProcessorCache, self).__init__(max_size=max_size)
+        self._cache = LRUCache(max_size)
+
+    def get(self, key):
+        return self._cache.get(key)
+
+    def set(self, key, output):
+        self._cache.set(key, output)
+
+    def get_stats(self):
+        stats = super(MemoryProcessorCache, self).get_stats()
+        stats['evictions'] = self._cache.evictions
+        return stats
+
+
+class FileSystemProcessorCache(ProcessorCache):
+    """
+    Keeps processor output in a directory - the directory can be shared between machines (e.g. build agents). Entries
+    are written atomically and their mtime is touched when read so the least recently used are evicted first.
+    """
+    def __init__(self, location, max_size=512 * 1024 * 1024):
+        super(FileSystemProcessorCache, self).__init__(max_size=max_size)
+        self.location = location
+        self.evictions = 0
+        self._size = None
+        self._size_lock = threading.Lock()
+
+    def get_path(self, key):
+        return os.path.join(self.location, key[:2], key)
+
+    def get(self, key):
+        path = self.get_path(key)
+        try:
+            with open(path, 'rb') as cache_file:
+                output = cache_file.read()
+            os.utime(path, None)
+        except (IOError, OSError):
+            return None
+        return output
+
+    def set(self, key, output):
+        path = self.get_path(key)
+
+        try:
+            os.makedirs(os.path.dirname(path))
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise
+
+        tmp_file = NamedTemporaryFile(dir=os.path.dirname(path), prefix='.tmp', delete=False)
+        try:
+            tmp_file.write(output)
+            tmp_file.close()
+            os.rename(tmp_file.name, path)
+        except:
+            os.remove(tmp_file.name)
+            raise
+
+        if self.max_size is not None:
+            with self._size_lock:
+                if self._size is None:
+                    self._size = sum(size for _, _, size in self._iter_entries())
+                else:
+                    self._size += len(output)
+
+                if self._size > self.max_size:
+                    self._evict()
+
+    def _iter_entries(self):
+        for dir_path, _, filenames in os.walk(self.location):
+            for filename in filenames:
+                if filename.startswith('.tmp'):
+                    continue
+                path = os.path.join(dir_path, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                yield path, stat.st_mtime, stat.st_size
+
+    def _evict(self):
+        """
+        Removes the least recently used entries until the cache is within max_size. Other processes may be using the
+        same directory so the real size is recalculated rather than trusting the running total.
+        """
+        entries = sorted(self._iter_entries(), key=lambda entry: entry[1])
+        self._size = sum(size for _, _, size in entries)
+
+        for path, _, size in entries:
+            if self._size <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            self._size -= size
+            self.evictions += 1
+
+    def get_stats(self):
+        stats = super(FileSystemProcessorCache, self).get_stats()
+        stats['evictions'] = self.evictions
+        return stats
+
+
+class DjangoProcessorCache(ProcessorCache):
+    """
+    Keeps processor output in one of the Django cache backends (settings.CACHES) - size limits and eviction are up to
+    the backend (e.g. memcached's memory limit)
+    """
+    def __init__(self, alias='default', timeout=None, key_prefix='django_bundles:'):
+        super(DjangoProcessorCache, self).__init__()
+        try:
+            from django.core.cache import caches
+            self.cache = caches[alias]
+        except ImportError:
+            from django.core.cache import get_cache
+            self.cache = get_cache(alias)
+        self.timeout = timeout
+        self.key_prefix = key_prefix
+
+    def get(self, key):
+        return self.cache.get(self.key_prefix + key)
+
+    def set(self, key, output):
+        if self.timeout is None:
+            self.cache.set(self.key_prefix + key, output)
+        else:
+            self.cache.set(self.key_prefix + key, output, self.timeout)
+
+
+_processor_cache = None
+def get_processor_cache():
+    """
+    Returns the processor cache configured in settings.BUNDLES_PROCESSOR_CACHE (or None) - configuration looks like:
+
+    BUNDLES_PROCESSOR_CACHE = {
+        'BACKEND': 'django_bundles.processors.cache.FileSystemProcessorCache',
+        'LOCATION': '/var/cache/django_bundles',                                # other keys are passed (lowercased) as kwargs
+        'MAX_SIZE': 512 * 1024 * 1024,
+    }
+    """
+    global _processor_cache
+
+    if _processor_cache is None and bundles_settings.BUNDLES_PROCESSOR_CACHE:
+        conf = dict(bundles_settings.BUNDLES_PROCESSOR_CACHE)
+        backend = conf.pop('BACKEND')
+        backend_class = get_class(backend)
+        if not backend_class:
+            raise ImproperlyConfigured("Invalid processor cache backend: %s" % backend)
+        _processor_cache = backend_class(**dict((key.lower(), value) for key, value in conf.iteritems()))
+
+    return _processor_cache
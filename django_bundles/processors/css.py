@@ -0,0 +1,144 @@
+from django_bundles.processors.base import Processor
+
+import re
+
+
+STRING = r'''"(?:[^"\\\n]|\\.)*"|'(?:[^'\\\n]|\\.)*\''''
+
+# First pass - remove comments (keeping /*! ... */) and find comments or strings that aren't finished yet
+COMMENTS_RE = re.compile(r'''
+    (?P<preserved>/\*!.*?\*/)
+  | (?P<comment>\s*/\*.*?\*/\s*)
+  | (?P<string>%s)
+  | (?P<open>/\*.*|["'].*)
+''' % STRING, re.S | re.X)
+
+# Second pass - whitespace, semicolons and zeros, leaving strings, urls and preserved comments alone
+MINIFY_RE = re.compile(r'''
+(?=[\s;{},>:()!"'u/+.0-9-])  # quickly skip everything else
+(?:
+    (?P<protected>%s|url\((?:[^)"']|%s)*\))
+  | (?P<preserved>/\*!.*?\*/)\s*
+  | (?P<semicolons>\s*;(?:\s*;)*\s*(?P<close>\})?)
+  | \s*(?P<punctuation>[{},>])\s*
+  | (?P<space_after>[:(])\s+
+  | \s+(?P<space_before>[)!])
+  | (?P<zero_with_unit>(?<![\w.#-])[+-]?(?:0*\.0+|0+\.?)(?:px|em|ex|rem|ch|vw|vh|vmin|vmax|cm|mm|in|pt|pc)(?![\w%%.-]))
+  | (?<![\w.#-])(?P<leading_zero>[+-]?)0+(?=\.\d)
+  | (?!\ \S)(?P<space>\s+)    # a single space is already as small as it gets
+)
+''' % (STRING, STRING), re.S | re.X | re.I)
+
+# Units are needed on zeros in calc() etc. - calc(10px + 0) is invalid
+MATH_FUNCTION_RE = re.compile(r'(?<![\w-])(?:calc|min|max|clamp)\(', re.I)
+PARENS_RE = re.compile(r'[()]')
+
+
+def get_math_function_ranges(text):
+    """
+    Returns (start, end) of each top level calc(), min(), max() or clamp() in text
+    """
+    ranges = []
+    for match in MATH_FUNCTION_RE.finditer(text):
+        if ranges and match.start() < ranges[-1][1]:
+            continue
+
+        depth = 1
+        end = len(text)
+        for paren in PARENS_RE.finditer(text, match.end()):
+            depth += 1 if paren.group() == '(' else -1
+            if not depth:
+                end = paren.end()
+                break
+        ranges.append((match.start(), end))
+    return ranges
+
+
+def _minify_match(match):
+    kind = match.lastgroup
+
+    if kind == 'protected':
+        return match.group()
+    if kind == 'semicolons':
+        return '}' if match.group('close') else ';'
+    if kind == 'zero_with_unit':
+        return '0'
+    if kind == 'space':
+        return ' '
+    return match.group(kind)
+
+
+class CSSMinifier(object):
+    """
+    Streaming CSS minifier - strips comments (except /*! ... */) and whitespace, drops redundant semicolons and
+    shortens zeros (0px -> 0 outside calc() and the like, 0.5em -> .5em). Input is fed in chunks and minified up to
+    the last closing brace - the rest is held back until the next chunk.
+    """
+    def __init__(self):
+        self.buffer = ''
+
+    def feed(self, chunk):
+        self.buffer += chunk
+
+        cut = self.buffer.rfind('}') + 1
+        if not cut:
+            return ''
+
+        segment, self.buffer = self.buffer[:cut], self.buffer[cut:]
+        return self._minify(segment, final=False)
+
+    def finish(self):
+        segment, self.buffer = self.buffer, ''
+        return self._minify(segment, final=True).rstrip()
+
+    def _minify(self, segment, final):
+        open_at = []
+
+        def strip_comment(match):
+            kind = match.lastgroup
+            if kind == 'comment':
+                return ' '
+            if kind == 'open' and not final:
+                # The closing brace was inside a comment or string - finish it when there's more input
+                open_at.append(match.start())
+                return ''
+            return match.group()
+
+        text = COMMENTS_RE.sub(strip_comment, segment)
+
+        if open_at:
+            self.buffer = segment[open_at[0]:] + self.buffer
+
+        minify_match = _minify_match
+        math_ranges = get_math_function_ranges(text)
+        if math_ranges:
+            def minify_match(match):
+                if match.lastgroup == 'zero_with_unit' and any(start <= match.start() < end for start, end in math_ranges):
+                    return match.group()
+                return _minify_match(match)
+
+        # Segments always start after a closing brace, so leading whitespace can go
+        return MINIFY_RE.sub(minify_match, text).lstrip()
+
+
+class CSSMinifierProcessor(Processor):
+    """
+    Minifies CSS in process, chunk by chunk, e.g. as a post processor:
+
+    DEFAULT_POSTPROCESSORS = {
+        'css': [
+            'django_bundles.processors.css.CSSMinifierProcessor',
+        ],
+    }
+    """
+    def process(self, iter_input):
+        minifier = CSSMinifier()
+
+        for chunk in iter_input:
+            output = minifier.feed(chunk)
+            if output:
+                yield output
+
+        output = minifier.finish()
+        if output:
+            yield output
@@ -10,6 +10,9 @@ class DjangoTemplateProcessor(Processor):
     Processor that runs Django's templating code across the file - 'settings' and 'bundles' are passed into context
     Override this class to add other things to context
     """
+    # The output depends on settings and bundle versions, not just the input
+    cacheable = False
+
     def get_context(self):
         """
         Override this to change context
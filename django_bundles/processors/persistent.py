@@ -0,0 +1,162 @@
+from django_bundles.processors.base import Processor
+from django_bundles.utils.profiling import record_spawn
+from django_bundles.utils.workers import write_request, read_response, WorkerClosed, STATUS_OK
+
+from subprocess import CalledProcessError
+import subprocess
+import threading
+import atexit
+import Queue
+import os
+
+
+class PersistentWorker(object):
+    """
+    A long-lived worker process that runs jobs sent over stdin/stdout (see django_bundles.utils.workers)
+    """
+    def __init__(self, command, cwd=None):
+        self.command = command
+        self.process = subprocess.Popen(command, shell=True, stdin=subprocess.PIPE, stdout=subprocess.PIPE, cwd=cwd, close_fds=True)
+        record_spawn()
+
+    def run(self, data):
+        """
+        Returns (status, output) - raises WorkerClosed if the worker has died
+        """
+        try:
+            write_request(self.process.stdin, data)
+        except IOError:
+            raise WorkerClosed
+        return read_response(self.process.stdout)
+
+    def close(self, timeout=5.0):
+        try:
+            self.process.stdin.close()
+        except IOError:
+            pass
+
+        # Give it a chance to exit cleanly before killing it
+        done = threading.Event()
+        waiter = threading.Thread(target=lambda: (self.process.wait(), done.set()))
+        waiter.daemon = True
+        waiter.start()
+        if not done.wait(timeout):
+            try:
+                self.process.kill()
+            except OSError:
+                pass
+            self.process.wait()
+
+
+class PersistentWorkerPool(object):
+    """
+    Up to size workers running the same command - workers are started as they're needed and replaced if they die
+    """
+    def __init__(self, command, cwd=None, size=1):
+        self.command = command
+        self.cwd = cwd
+        self.size = size
+        self.pid = os.getpid()
+        self._idle = Queue.Queue()
+        self._workers = set()
+        self._lock = threading.Lock()
+
+    def _get_worker(self):
+        while True:
+            try:
+                return self._idle.get_nowait()
+            except Queue.Empty:
+                pass
+
+            with self._lock:
+                if len(self._workers) < self.size:
+                    worker = PersistentWorker(self.command, cwd=self.cwd)
+                    self._workers.add(worker)
+                    return worker
+
+            # Wait for a worker to be free - or for one to die, leaving room to start another
+            try:
+                return self._idle.get(timeout=0.1)
+            except Queue.Empty:
+                pass
+
+    def _discard_worker(self, worker):
+        with self._lock:
+            self._workers.discard(worker)
+        worker.close(timeout=0)
+
+    def run(self, data, retries=1):
+        """
+        Runs a job on the next free worker and returns the output - raises CalledProcessError (like
+        ExecutableProcessor) if the job fails or the worker keeps dying
+        """
+        for attempt in xrange(retries + 1):
+            worker = self._get_worker()
+            try:
+                status, output = worker.run(data)
+            except WorkerClosed:
+                # The worker crashed - replace it and try again
+                self._discard_worker(worker)
+                continue
+
+            self._idle.put(worker)
+
+            if status != STATUS_OK:
+                e = CalledProcessError(status, self.command)
+                e.output = output
+                raise e
+            return output
+
+        e = CalledProcessError(-1, self.command)
+        e.output = 'Worker exited unexpectedly'
+        raise e
+
+    def close(self):
+        with self._lock:
+            workers, self._workers = self._workers, set()
+        for worker in workers:
+            worker.close()
+
+
+_worker_pools = {}
+_worker_pools_lock = threading.Lock()
+def get_worker_pool(command, cwd=None, size=1):
+    """
+    Worker pools are shared by every processor with the same command - a forked process (e.g. create_bundles --pool
+    processes) starts its own rather than sharing its parent's pipes
+    """
+    key = (command, cwd, size)
+
+    with _worker_pools_lock:
+        pool = _worker_pools.get(key)
+        if pool is None or pool.pid != os.getpid():
+            pool = _worker_pools[key] = PersistentWorkerPool(command, cwd=cwd, size=size)
+        return pool
+
+
+@atexit.register
+def close_worker_pools():
+    with _worker_pools_lock:
+        pools = [pool for pool in _worker_pools.values() if pool.pid == os.getpid()]
+        _worker_pools.clear()
+    for pool in pools:
+        pool.close()
+
+
+class PersistentProcessor(Processor):
+    """
+    Sends each file to a long-lived worker process rather than starting a new process every time (see
+    django_bundles.utils.workers for the protocol and a reference worker), e.g.
+
+    ('django_bundles.processors.PersistentProcessor', {
+        'command': 'node /path/to/less-worker.js',                     # started once and sent many jobs
+        'workers': 4,                                                   # number of workers to run [OPTIONAL - defaults to 1]
+        'cwd': None,
+    }),
+    """
+    command = None
+    cwd = None
+    workers = 1
+
+    def process(self, iter_input):
+        yield get_worker_pool(self.command, cwd=self.cwd, size=self.workers).run(''.join(iter_input))
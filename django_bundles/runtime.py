@@ -0,0 +1,175 @@
+"""
+Runtime snapshot of the bundles written by create_bundles when settings.BUNDLES_RUNTIME_SNAPSHOT_FILE is set. It holds
+everything render_bundle needs (names, types, media, URLs and the pre-rendered tag HTML with and without bundling),
+so a production server never has to expand file lists or import processors:
+
+{
+    "bundles": {
+        "master_css": {
+            "type": "css",
+            "media": "screen",
+            "url": "/media/master_css.....css",
+            "bundled_html": "<link ... />",                                 # settings.USE_BUNDLES
+            "files_html": "<link ... />\n<link ... />",                     # in DEVELOPMENT_BUNDLES
+        },
+    },
+}
+
+Call preload() before forking worker processes (e.g. in wsgi.py with gunicorn --preload) so they all share it.
+"""
+from django.core.exceptions import ImproperlyConfigured
+
+from django_bundles.conf.bundles_settings import bundles_settings, get_frozen_settings
+from django_bundles.core import bundle_versions_pinned
+from django_bundles.utils.files import write_file_atomically
+from django_bundles.utils.versions import get_file_signature
+
+import json
+import threading
+import time
+
+
+def render_file(file_type, file_url, attrs=None):
+    attr_string = ''
+    if attrs:
+        attr_string = ''.join(' %s="%s"' % x for x in attrs.iteritems())
+
+    return bundles_settings.BUNDLES_TAG_HTML[file_type] % {
+        'file_url': file_url,
+        'attrs': attr_string,
+    }
+
+
+def render_bundle_html(bundle, use_bundle, version=None):
+    """
+    Renders the HTML for a bundle - one HTML tag, or one per file if use_bundle is False
+    """
+    if use_bundle:
+        return render_file(bundle.bundle_type, bundle.get_url(version=version), attrs=({'media':bundle.media} if bundle.media else {}))
+
+    # Render files individually
+    bundle_files = []
+
+    for bundle_file in bundle.files:
+        if bundle_file.precompile_in_debug:
+            bundle_files.append(render_file(bundle_file.bundle_type, bundle_file.precompile_url, attrs=({'media':bundle_file.media} if bundle.media else {})))
+        else:
+            bundle_files.append(render_file(bundle_file.file_type, bundle_file.file_url, attrs=({'media':bundle_file.media} if bundle.media else {})))
+
+    return '\n'.join(bundle_files)
+
+
+class RuntimeBundle(object):
+    """
+    A bundle loaded from the runtime snapshot - only what's needed to render it
+    """
+    def __init__(self, name, conf):
+        self.name = name
+        self.bundle_type = str(conf['type'])
+        self.media = conf['media']
+        self.url = conf['url']
+        self.bundled_html = conf['bundled_html']
+        self.files_html = conf['files_html']
+
+    def get_url(self):
+        return self.url
+
+    @property
+    def use_bundle(self):
+        frozen_settings = get_frozen_settings()
+        return frozen_settings.USE_BUNDLES and self.name not in frozen_settings.DEVELOPMENT_BUNDLES
+
+    @property
+    def html(self):
+        return self.bundled_html if self.use_bundle else self.files_html
+
+
+def build_runtime_snapshot(bundles, bundle_versions):
+    snapshot_bundles = {}
+
+    for bundle in bundles:
+        version = bundle_versions.get(bundle.name)
+        snapshot_bundles[bundle.name] = {
+            'type': bundle.bundle_type,
+            'media': bundle.media,
+            'url': bundle.get_url(version=version),
+            'bundled_html': render_bundle_html(bundle, True, version=version),
+            'files_html': render_bundle_html(bundle, False),
+        }
+
+    return {
+        'bundles': snapshot_bundles,
+    }
+
+
+def write_runtime_snapshot(path, bundles, bundle_versions):
+    write_file_atomically(path, json.dumps(build_runtime_snapshot(bundles, bundle_versions), separators=(',', ':'), sort_keys=True))
+
+
+def read_runtime_snapshot(path):
+    """
+    Returns a dict of bundle name to RuntimeBundle
+    """
+    with open(path, 'rb') as snapshot_file:
+        snapshot = json.load(snapshot_file)
+
+    return dict((str(name), RuntimeBundle(str(name), conf)) for name, conf in snapshot['bundles'].iteritems())
+
+
+_runtime_bundles = None
+_runtime_path = None
+_runtime_signature = None
+_runtime_checked = 0
+_runtime_lock = threading.Lock()
+def get_runtime_bundles():
+    """
+    Returns the bundles from settings.BUNDLES_RUNTIME_SNAPSHOT_FILE - like the versions file, it's checked for changes
+    at most every BUNDLES_VERSION_FILE_CHECK_INTERVAL seconds. Returns None, so bundles are rendered from their
+    definitions, if it isn't set, bundles aren't being used, the versions are pinned with set_bundle_versions (during a
+    build) or it hasn't been written yet.
+    """
+    global _runtime_bundles, _runtime_path, _runtime_signature, _runtime_checked
+
+    frozen_settings = get_frozen_settings()
+    snapshot_file = frozen_settings.BUNDLES_RUNTIME_SNAPSHOT_FILE
+    if not snapshot_file or not frozen_settings.USE_BUNDLES or bundle_versions_pinned():
+        return None
+
+    check_interval = frozen_settings.BUNDLES_VERSION_FILE_CHECK_INTERVAL
+    loaded = _runtime_bundles is not None and _runtime_path == snapshot_file
+    if loaded and (check_interval is None or time.time() - _runtime_checked < check_interval):
+        return _runtime_bundles
+
+    with _runtime_lock:
+        loaded = _runtime_bundles is not None and _runtime_path == snapshot_file
+        if not loaded or time.time() - _runtime_checked >= check_interval:
+            _runtime_checked = time.time()
+            signature = get_file_signature(snapshot_file)
+            if not loaded or signature != _runtime_signature:
+                try:
+                    _runtime_bundles = read_runtime_snapshot(snapshot_file)
+                except IOError:
+                    # Keep using the previous snapshot if there is one, otherwise it hasn't been built yet
+                    if not loaded:
+                        return None
+                except ValueError:
+                    if not loaded:
+                        raise ImproperlyConfigured("Could not load the bundles runtime snapshot %s - run create_bundles" % snapshot_file)
+                else:
+                    _runtime_path = snapshot_file
+                    _runtime_signature = signature
+
+    return _runtime_bundles
+
+
+def preload():
+    """
+    Loads everything render_bundle needs - call it before forking so worker processes share it
+    """
+    from django_bundles.core import get_bundles
+    from django_bundles.templatetags.django_bundles_tags import render_bundle
+
+    if get_runtime_bundles() is None:
+        # Without a snapshot, render each bundle once to fill render_bundle's cache
+        for bundle in get_bundles():
+            render_bundle(bundle.name)
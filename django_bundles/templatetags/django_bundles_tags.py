@@ -3,23 +3,13 @@ from django import template
 from django.utils.safestring import mark_safe
 from django.core.exceptions import ImproperlyConfigured
 
-from django_bundles.conf.bundles_settings import bundles_settings
-from django_bundles.core import get_bundles
+from django_bundles.conf.bundles_settings import get_frozen_settings
+from django_bundles.core import get_bundles, get_bundle_versions
+from django_bundles.runtime import get_runtime_bundles, render_bundle_html
 
 register = template.Library()
 
 
-def _render_file(file_type, file_url, attrs=None):
-    attr_string = ''
-    if attrs:
-        attr_string = ''.join(' %s="%s"' % x for x in attrs.iteritems())
-
-    return bundles_settings.BUNDLES_TAG_HTML[file_type] % {
-        'file_url': file_url,
-        'attrs': attr_string,
-    }
-
-
 def _render_bundle(bundle_name):
     """
     Renders the HTML for a bundle in place - one HTML tag or many depending on settings.USE_BUNDLES
@@ -29,24 +19,35 @@ def _render_bundle(bundle_name):
     except KeyError:
         raise ImproperlyConfigured("Bundle '%s' is not defined" % bundle_name)
 
-    if bundle.use_bundle:
-        return _render_file(bundle.bundle_type, bundle.get_url(), attrs=({'media':bundle.media} if bundle.media else {}))
+    return render_bundle_html(bundle, bundle.use_bundle)
 
-    # Render files individually
-    bundle_files = []
 
-    for bundle_file in bundle.files:
-        if bundle_file.precompile_in_debug:
-            bundle_files.append(_render_file(bundle_file.bundle_type, bundle_file.precompile_url, attrs=({'media':bundle_file.media} if bundle.media else {})))
-        else:
-            bundle_files.append(_render_file(bundle_file.file_type, bundle_file.file_url, attrs=({'media':bundle_file.media} if bundle.media else {})))
-
-    return '\n'.join(bundle_files)
+_rendered_bundles = {}
 
 
 @register.simple_tag
 def render_bundle(bundle_name):
-    return mark_safe(_render_bundle(bundle_name))
+    """
+    Uses the runtime snapshot if there is one (see django_bundles.runtime), otherwise the HTML for each bundle is cached
+    until its version or the settings change
+    """
+    runtime_bundles = get_runtime_bundles()
+    if runtime_bundles is not None:
+        try:
+            return mark_safe(runtime_bundles[bundle_name].html)
+        except KeyError:
+            raise ImproperlyConfigured("Bundle '%s' is not in the runtime snapshot" % bundle_name)
+
+    # Keyed on the version itself rather than the versions dict - create_bundles adds to its dict as bundles are built
+    version, frozen_settings = get_bundle_versions().get(bundle_name), get_frozen_settings()
+
+    rendered = _rendered_bundles.get(bundle_name)
+    if rendered and rendered[0] == version and rendered[1] is frozen_settings:
+        return rendered[2]
+
+    html = mark_safe(_render_bundle(bundle_name))
+    _rendered_bundles[bundle_name] = (version, frozen_settings, html)
+    return html
 
 
 @register.assignment_tag(name='get_bundles')
@@ -1,9 +1,32 @@
 from django_bundles.tests.utils import *
 from django_bundles.tests.utils.files import *
 from django_bundles.tests.utils.processes import *
+from django_bundles.tests.utils.build_state import *
+from django_bundles.tests.utils.lru import *
+from django_bundles.tests.utils.compression import *
+from django_bundles.tests.utils.versions import *
+from django_bundles.tests.utils.hashing import *
+from django_bundles.tests.utils.lint_cache import *
+from django_bundles.tests.utils.debounce import *
+from django_bundles.tests.utils.dependencies import *
+from django_bundles.tests.utils.profiling import *
+from django_bundles.tests.utils.tempfiles import *
 
 from django_bundles.tests.conf import *
 
+from django_bundles.tests.processors.base import *
+from django_bundles.tests.processors.cache import *
+from django_bundles.tests.processors.css import *
+from django_bundles.tests.processors.persistent import *
+
+from django_bundles.tests.management.create_bundles import *
+from django_bundles.tests.management.lint_bundles import *
+from django_bundles.tests.management.watch_bundles import *
+
 from django_bundles.tests.core import *
+from django_bundles.tests.linting import *
+from django_bundles.tests.runtime import *
+
+from django_bundles.tests.templatetags import *
 
-from django_bundles.tests.templatetags import *
\ No newline at end of file
+from django_bundles.tests.views import *
\ No newline at end of file
@@ -1,5 +1,6 @@
 from django.test import TestCase
 from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
 
 
 from django_bundles.core import Bundle
@@ -59,3 +60,31 @@ class BundleConfTest(TestCase):
             os.path.join(settings.MEDIA_URL, 'test2.css'),
             os.path.join(settings.MEDIA_URL, 'another.css'),
         ])
+
+
+class LazyBundleTest(TestCase):
+    def test_files_loaded_when_needed(self):
+        bundle = Bundle(('lazy_bundle', {
+            'type': 'css',
+            'files': ('does_not_exist/*.css',),
+            'files_root': os.path.join(os.path.dirname(__file__), 'files'),
+        }))
+
+        self.assertEqual(bundle.get_url(version='abc'), os.path.join(settings.MEDIA_URL, 'lazy_bundle.abc.css'))
+        self.assertRaises(ImproperlyConfigured, lambda: bundle.files)
+
+    def test_shared_processors(self):
+        conf = {
+            'type': 'css',
+            'files': (
+                ('test1.css', {'processors': (('django_bundles.processors.ExecutableProcessor', {'command': 'cat', 'cwd': None}),)}),
+                ('test2.css', {'processors': (('django_bundles.processors.ExecutableProcessor', {'cwd': None, 'command': 'cat'}),)}),
+                ('another.css', {'processors': (('django_bundles.processors.ExecutableProcessor', {'command': 'cat -'}),)}),
+            ),
+            'files_root': os.path.join(os.path.dirname(__file__), 'files'),
+        }
+        test1, test2, another = Bundle(('bundle1', conf)).files
+
+        self.assertTrue(test1.processors[0] is test2.processors[0])
+        self.assertFalse(test1.processors[0] is another.processors[0])
+        self.assertTrue(Bundle(('bundle2', conf)).files[0].processors[0] is test1.processors[0])
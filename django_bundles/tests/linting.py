@@ -0,0 +1,61 @@
+from django.test import TestCase
+
+
+from django_bundles.linting import JSLintOutputParser, PrefixOutputParser, get_output_parser
+
+
+class PrefixOutputParserTest(TestCase):
+    def test_parse(self):
+        output = (
+            '/src/a.js: line 1, col 10, Missing semicolon.\n'
+            '/src/a.jsx:2:1: Unexpected token\n'
+            '/src/a.js: line 4, col 1, \'b\' is not defined.\n'
+            '\n'
+            '3 errors\n'
+        )
+
+        self.assertEqual(PrefixOutputParser().parse(output, ['/src/a.js', '/src/a.jsx', '/src/c.js']), {
+            '/src/a.js': '/src/a.js: line 1, col 10, Missing semicolon.\n/src/a.js: line 4, col 1, \'b\' is not defined.\n',
+            '/src/a.jsx': '/src/a.jsx:2:1: Unexpected token\n',
+        })
+
+    def test_ambiguous(self):
+        self.assertEqual(PrefixOutputParser().parse('Segmentation fault\n', ['/src/a.js', '/src/b.js']), None)
+
+    def test_unattributed_lines(self):
+        # The linter may have stopped before it got to /src/b.js
+        output = '/src/a.js: line 1, col 10, Missing semicolon.\nSegmentation fault\n'
+        self.assertEqual(PrefixOutputParser().parse(output, ['/src/a.js', '/src/b.js']), None)
+
+    def test_summaries(self):
+        output = '/src/a.js: line 1, col 10, Missing semicolon.\n\n\xe2\x9c\x96 1 problem (1 error, 0 warnings)\n'
+        self.assertEqual(PrefixOutputParser().parse(output, ['/src/a.js', '/src/b.js']), {
+            '/src/a.js': '/src/a.js: line 1, col 10, Missing semicolon.\n',
+        })
+
+
+class JSLintOutputParserTest(TestCase):
+    def test_parse(self):
+        output = (
+            '/src/a.js is OK.\n'
+            '\n'
+            '/src/b.js\n'
+            ' #1 Missing \'use strict\' statement.\n'
+            '    var b = 1; // Line 1, Pos 5\n'
+            '/src/c.js is OK.\n'
+        )
+
+        self.assertEqual(JSLintOutputParser().parse(output, ['/src/a.js', '/src/b.js', '/src/c.js']), {
+            '/src/b.js': '/src/b.js\n #1 Missing \'use strict\' statement.\n    var b = 1; // Line 1, Pos 5\n',
+        })
+
+    def test_ambiguous(self):
+        self.assertEqual(JSLintOutputParser().parse('Error: cannot find module\n', ['/src/a.js']), None)
+        self.assertEqual(JSLintOutputParser().parse('/src/a.js is OK.\nError: cannot find module\n', ['/src/a.js', '/src/b.js']), None)
+
+
+class GetOutputParserTest(TestCase):
+    def test_get_output_parser(self):
+        self.assertTrue(isinstance(get_output_parser({}), PrefixOutputParser))
+        self.assertTrue(isinstance(get_output_parser({'output_parser': 'django_bundles.linting.JSLintOutputParser'}), JSLintOutputParser))
+        self.assertTrue(isinstance(get_output_parser({'output_parser': JSLintOutputParser}), JSLintOutputParser))
@@ -0,0 +1,361 @@
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+
+from django_bundles import core
+from django_bundles.core import Bundle, BundleManager
+from django_bundles.processors.base import Processor
+from django_bundles.utils import files
+from django_bundles.management.commands.create_bundles import Command, FilePreprocessor, SegmentCache, do_make_bundle, iter_bundle_files, make_bundle
+from django_bundles.utils.hashing import get_bundle_input_version
+from django_bundles.utils.profiling import ProcessorProfile, add_processor_listener, remove_processor_listener
+from django_bundles.utils.versions import read_bundle_versions
+
+
+import gzip
+import hashlib
+import os
+import shutil
+import tempfile
+from multiprocessing.dummy import Pool
+from StringIO import StringIO
+
+
+TEST_FILES_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'files')
+
+
+class CountingProcessor(Processor):
+    calls = 0
+
+    def process(self, iter_input):
+        CountingProcessor.calls += 1
+        return iter_input
+
+
+class LockCheckingProcessor(Processor):
+    lock = None
+    locked = []
+
+    def process(self, iter_input):
+        LockCheckingProcessor.locked.append(LockCheckingProcessor.lock.locked())
+        return iter_input
+
+
+class FilePreprocessorTest(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.filenames = ['file%d.css' % i for i in xrange(6)]
+        for filename in self.filenames:
+            with open(os.path.join(self.tmp_dir, filename), 'wb') as f:
+                f.write('.%s { }\n' % filename[:-4])
+
+        # Earlier files take longer, so they finish out of order
+        self.bundle = Bundle((
+            'test_bundle', {
+                'type': 'css',
+                'files': [
+                    (filename, {
+                        'processors': (
+                            ('django_bundles.processors.ExecutableProcessor', {'command': 'sleep 0.%02d; cat' % ((5 - i) * 4)}),
+                        ),
+                    }) if i != 3 else filename
+                    for i, filename in enumerate(self.filenames)
+                ],
+                'files_root': self.tmp_dir,
+            }
+        ))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_pool_keeps_order(self):
+        expected = ''.join(iter_bundle_files(self.bundle))
+
+        pool = Pool(3)
+        try:
+            output = ''.join(iter_bundle_files(self.bundle, file_preprocessor=FilePreprocessor(pool=pool, jobs=3)))
+        finally:
+            pool.close()
+            pool.join()
+
+        self.assertEqual(output, expected)
+        self.assertEqual(output, ''.join('.%s { }\n\n' % filename[:-4] for filename in self.filenames))
+
+    def test_processors_run_without_lock(self):
+        bundles = [Bundle((
+            name, {
+                'type': 'css',
+                'files': (
+                    ('test1.css', {
+                        'processors': ('django_bundles.tests.management.create_bundles.LockCheckingProcessor',),
+                    }),
+                    ('test2.css', {
+                        'processors': ('django_bundles.tests.management.create_bundles.LockCheckingProcessor',),
+                    }) if name == 'bundle1' else 'another.css',
+                ),
+                'files_root': TEST_FILES_PATH,
+            }
+        )) for name in ('bundle1', 'bundle2')]
+        file_preprocessor = FilePreprocessor()
+        file_preprocessor.add_bundles(bundles)
+        LockCheckingProcessor.lock = file_preprocessor._lock
+        LockCheckingProcessor.locked = []
+
+        for bundle in bundles:
+            ''.join(iter_bundle_files(bundle, file_preprocessor=file_preprocessor))
+
+        # test1.css is shared between the bundles, test2.css isn't
+        self.assertEqual(LockCheckingProcessor.locked, [False, False])
+        self.assertEqual(file_preprocessor.runs, 2)
+
+
+class SharedFilesTest(TestCase):
+    def setUp(self):
+        CountingProcessor.calls = 0
+        self.bundles = [Bundle((
+            name, {
+                'type': 'css',
+                'files': (
+                    ('test1.css', {
+                        'processors': (
+                            'django_bundles.tests.management.create_bundles.CountingProcessor',
+                        ),
+                    }),
+                    'test2.css',
+                ),
+                'files_root': TEST_FILES_PATH,
+            }
+        )) for name in ('bundle1', 'bundle2', 'bundle3')]
+
+    def test_shared_file_preprocessed_once(self):
+        file_preprocessor = FilePreprocessor()
+        file_preprocessor.add_bundles(self.bundles)
+
+        outputs = [''.join(iter_bundle_files(bundle, file_preprocessor=file_preprocessor)) for bundle in self.bundles]
+
+        self.assertEqual(CountingProcessor.calls, 1)
+        self.assertEqual(file_preprocessor.runs, 1)
+        self.assertEqual(file_preprocessor.saved, 2)
+        self.assertEqual(outputs, [''.join(iter_bundle_files(self.bundles[0]))] * 3)
+
+    def test_shared_file_preprocessed_once_in_parallel(self):
+        bundle_pool = Pool(3)
+        file_pool = Pool(3)
+        try:
+            file_preprocessor = FilePreprocessor(pool=file_pool, jobs=3)
+            file_preprocessor.add_bundles(self.bundles)
+
+            outputs = bundle_pool.map(lambda bundle: ''.join(iter_bundle_files(bundle, file_preprocessor=file_preprocessor)), self.bundles)
+        finally:
+            for pool in (bundle_pool, file_pool):
+                pool.close()
+                pool.join()
+
+        self.assertEqual(CountingProcessor.calls, 1)
+        self.assertEqual(file_preprocessor.saved, 2)
+        self.assertEqual(outputs, [''.join(iter_bundle_files(self.bundles[0]))] * 3)
+
+
+class SegmentCacheTest(TestCase):
+    def setUp(self):
+        CountingProcessor.calls = 0
+        self.tmp_dir = tempfile.mkdtemp()
+        self.output_dir = tempfile.mkdtemp()
+        for filename in ('a.css', 'b.css', 'c.css'):
+            self.write(filename, '.%s { }' % filename[0])
+
+        self.bundle = Bundle(('segment_bundle', {
+            'type': 'css',
+            'files': (('*.css', {'processors': ('django_bundles.tests.management.create_bundles.CountingProcessor',)}),),
+            'files_root': self.tmp_dir,
+            'bundle_file_root': self.output_dir,
+            'processors': (('django_bundles.processors.ExecutableProcessor', {'command': 'tr a-z A-Z'}),),
+        }))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+        shutil.rmtree(self.output_dir)
+
+    def write(self, filename, contents):
+        with open(os.path.join(self.tmp_dir, filename), 'wb') as f:
+            f.write(contents)
+
+    def test_only_changed_files_reprocessed(self):
+        segment_cache = SegmentCache()
+        hash_version = make_bundle(self.bundle, file_preprocessor=segment_cache)
+        self.assertEqual(CountingProcessor.calls, 3)
+
+        self.assertEqual(make_bundle(self.bundle, file_preprocessor=segment_cache), hash_version)
+        self.assertEqual(CountingProcessor.calls, 3)
+
+        self.write('b.css', '.b { color: red; }')
+        new_version = make_bundle(self.bundle, file_preprocessor=segment_cache)
+        self.assertEqual(CountingProcessor.calls, 4)
+        self.assertEqual(segment_cache.runs, 4)
+
+        # The same as a full build
+        self.assertNotEqual(new_version, hash_version)
+        self.assertEqual(new_version, make_bundle(self.bundle))
+        self.assertEqual(open(self.bundle.get_path(new_version)).read(), '.A { }\n.B { COLOR: RED; }\n.C { }\n')
+
+    def test_import_changes(self):
+        self.write('a.css', '@import "partial.inc";\n.a { }')
+        self.write('partial.inc', '.partial { }')
+        segment_cache = SegmentCache()
+        make_bundle(self.bundle, file_preprocessor=segment_cache)
+
+        self.write('partial.inc', '.partial { color: red; }')
+        make_bundle(self.bundle, file_preprocessor=segment_cache)
+        self.assertEqual(CountingProcessor.calls, 4)
+
+    def test_templated_files_always_processed(self):
+        bundle = Bundle(('templated_bundle', {
+            'type': 'css',
+            'files': (('a.css', {'processors': ('django_bundles.processors.django_template.DjangoTemplateProcessor',)}),),
+            'files_root': self.tmp_dir,
+            'bundle_file_root': self.output_dir,
+            'processors': (),
+        }))
+
+        segment_cache = SegmentCache()
+        make_bundle(bundle, file_preprocessor=segment_cache)
+        make_bundle(bundle, file_preprocessor=segment_cache)
+        self.assertEqual(segment_cache.runs, 2)
+
+
+class InputVersionTest(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.bundle = Bundle(('input_bundle', {
+            'type': 'css',
+            'files': ('test1.css', 'test2.css'),
+            'files_root': TEST_FILES_PATH,
+            'bundle_file_root': self.tmp_dir,
+            'processors': (('django_bundles.processors.ExecutableProcessor', {'command': 'tr a-z A-Z'}),),
+        }))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_make_bundle(self):
+        with self.settings(BUNDLES_VERSION_STRATEGY='input', BUNDLES_HASH_FUNCTION='sha1'):
+            hash_version = make_bundle(self.bundle)
+            self.assertEqual(hash_version, get_bundle_input_version(self.bundle))
+            self.assertEqual(len(hash_version), 40)
+
+        self.assertEqual(open(self.bundle.get_path(hash_version)).read(), ''.join(iter_bundle_files(self.bundle)).upper())
+
+    def test_output_version(self):
+        with self.settings(BUNDLES_VERSION_STRATEGY='output', BUNDLES_HASH_FUNCTION='sha1'):
+            hash_version = make_bundle(self.bundle)
+
+        self.assertEqual(hash_version, hashlib.sha1(''.join(iter_bundle_files(self.bundle)).upper()).hexdigest())
+
+    def test_compute_bundle_versions(self):
+        versions_file = os.path.join(self.tmp_dir, 'bundles_versions.json')
+        core._cached_bundles, cached_bundles = BundleManager(), core._cached_bundles
+        core._cached_bundles['input_bundle'] = self.bundle
+        try:
+            with self.settings(BUNDLES_VERSION_STRATEGY='output'):
+                self.assertRaises(CommandError, call_command, 'compute_bundle_versions', output=versions_file, stdout=StringIO())
+
+            with self.settings(BUNDLES_VERSION_STRATEGY='input'):
+                call_command('compute_bundle_versions', output=versions_file, stdout=StringIO())
+                self.assertEqual(read_bundle_versions(versions_file), {'input_bundle': get_bundle_input_version(self.bundle)})
+        finally:
+            core._cached_bundles = cached_bundles
+
+
+class ConcatenatedBundleTest(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.bundle = self.make_bundle(())
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def make_bundle(self, processors):
+        return Bundle(('concatenated_bundle', {
+            'type': 'css',
+            'files': ('test*.css',),
+            'files_root': TEST_FILES_PATH,
+            'bundle_file_root': self.tmp_dir,
+            'processors': processors,
+        }))
+
+    def test_same_as_make_bundle(self):
+        for strategy in ('output', 'input'):
+            with self.settings(BUNDLES_VERSION_STRATEGY=strategy, BUNDLES_COMPRESSION={'gzip': 6}):
+                hash_version = make_bundle(self.bundle)
+                contents = open(self.bundle.get_path(hash_version), 'rb').read()
+                os.remove(self.bundle.get_path(hash_version))
+
+                self.assertEqual(do_make_bundle((self.bundle, None, None)), (self.bundle.name, hash_version))
+                self.assertEqual(open(self.bundle.get_path(hash_version), 'rb').read(), contents)
+                self.assertEqual(gzip.open(self.bundle.get_path(hash_version) + '.gz', 'rb').read(), contents)
+
+    def test_only_without_processors(self):
+        CountingProcessor.calls = 0
+        do_make_bundle((self.make_bundle(('django_bundles.tests.management.create_bundles.CountingProcessor',)), 'fixed', None))
+        self.assertEqual(CountingProcessor.calls, 1)
+
+        CountingProcessor.calls = 0
+        do_make_bundle((self.bundle, 'fixed', None))
+        self.assertEqual(CountingProcessor.calls, 0)
+        self.assertEqual(open(self.bundle.get_path('fixed'), 'rb').read(), ''.join(iter_bundle_files(self.bundle)))
+
+    def test_not_mapped_when_watching(self):
+        expected = {}
+        for strategy in ('output', 'input'):
+            with self.settings(BUNDLES_VERSION_STRATEGY=strategy):
+                expected[strategy] = do_make_bundle((self.bundle, None, None))
+
+        # Files being watched can be truncated whilst they're read, which is fatal if they're mapped
+        map_file, files.map_file = files.map_file, None
+        try:
+            for strategy in ('output', 'input'):
+                with self.settings(BUNDLES_VERSION_STRATEGY=strategy):
+                    self.assertEqual(do_make_bundle((self.bundle, None, SegmentCache())), expected[strategy])
+        finally:
+            files.map_file = map_file
+
+
+class ProfileTest(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.bundle = Bundle(('profile_bundle', {
+            'type': 'css',
+            'files': (('test*.css', {'processors': (('django_bundles.processors.ExecutableProcessor', {'command': 'cat'}),)}),),
+            'files_root': TEST_FILES_PATH,
+            'bundle_file_root': self.tmp_dir,
+            'processors': (('django_bundles.processors.ExecutableProcessor', {'command': 'tr a-z A-Z'}),),
+        }))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_profile(self):
+        profile = ProcessorProfile()
+        add_processor_listener(profile.add)
+        try:
+            make_bundle(self.bundle)
+        finally:
+            remove_processor_listener(profile.add)
+
+        self.assertEqual(sorted((total['bundle'], total['file_path']) for total in profile.get_slowest_files()), [
+            ('profile_bundle', None),
+            ('profile_bundle', os.path.join(TEST_FILES_PATH, 'test1.css')),
+            ('profile_bundle', os.path.join(TEST_FILES_PATH, 'test2.css')),
+        ])
+        self.assertEqual(sorted((total['name'], total['runs'], total['spawns']) for total in profile.get_slowest_processors()), [
+            ('cat', 2, 2),
+            ('tr a-z A-Z', 1, 1),
+        ])
+
+        command = Command()
+        command.stdout = StringIO()
+        command.write_profile(profile)
+        output = command.stdout.getvalue()
+        self.assertTrue('tr a-z A-Z' in output)
+        self.assertTrue('test1.css (profile_bundle)' in output)
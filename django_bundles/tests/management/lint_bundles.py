@@ -0,0 +1,173 @@
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+
+from django_bundles import core
+from django_bundles.core import Bundle, BundleManager
+
+
+import os
+import shutil
+import tempfile
+from StringIO import StringIO
+
+
+class LintCommandTestCase(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.calls_path = os.path.join(self.tmp_dir, 'calls')
+        self.cache_path = os.path.join(self.tmp_dir, 'bundles.lint')
+
+        for name, contents in (('good.js', 'var a = 1;\n'), ('bad.js', 'var BAD = 1\n'), ('other.js', 'var b = 2;\n')):
+            with open(os.path.join(self.tmp_dir, name), 'wb') as f:
+                f.write(contents)
+
+        self.bundle = Bundle(('lint_bundle', {
+            'type': 'js',
+            'files': ('good.js', 'bad.js', ('other.js', {'processors': (('django_bundles.processors.ExecutableProcessor', {'command': 'cat'}),)})),
+            'files_root': self.tmp_dir,
+            'processors': (),
+        }))
+
+        # Records each run and fails any file containing BAD
+        self.linting = {
+            'js': {
+                'command': 'echo {infile} >> %s; if grep -q BAD {infile}; then echo "BAD found"; exit 1; fi' % self.calls_path,
+                'default': True,
+            },
+        }
+
+        self.cached_bundles, core._cached_bundles = core._cached_bundles, BundleManager()
+        core._cached_bundles['lint_bundle'] = self.bundle
+
+    def tearDown(self):
+        core._cached_bundles = self.cached_bundles
+        shutil.rmtree(self.tmp_dir)
+
+    def lint(self, **options):
+        stdout = StringIO()
+        with self.settings(BUNDLES_LINTING=self.linting, BUNDLES_SINGLE_FILES=()):
+            try:
+                call_command('lint_bundles', stdout=stdout, **options)
+            except CommandError:
+                pass
+        return stdout.getvalue()
+
+    def get_calls(self):
+        if not os.path.exists(self.calls_path):
+            return 0
+        with open(self.calls_path) as f:
+            return len(f.readlines())
+
+
+class LintCacheCommandTest(LintCommandTestCase):
+    def test_replays_results(self):
+        output = self.lint(cache_file=self.cache_path)
+        self.assertEqual(self.get_calls(), 3)
+        self.assertIn('BAD found', output)
+        self.assertIn('0 hits, 3 misses', output)
+
+        output = self.lint(cache_file=self.cache_path)
+        self.assertEqual(self.get_calls(), 3)
+        self.assertIn('FAIL\t\t%s' % os.path.join(self.tmp_dir, 'bad.js'), output)
+        self.assertIn('BAD found', output)
+        self.assertIn('3 hits, 0 misses (100% hit rate)', output)
+
+    def test_changed_file(self):
+        self.lint(cache_file=self.cache_path)
+
+        with open(os.path.join(self.tmp_dir, 'bad.js'), 'wb') as f:
+            f.write('var fixed = 1;\n')
+
+        output = self.lint(cache_file=self.cache_path)
+        self.assertEqual(self.get_calls(), 4)
+        self.assertIn('ALL FILES PASSED', output)
+
+    def test_command_changed(self):
+        self.lint(cache_file=self.cache_path)
+        self.linting['js']['command'] += ' # changed'
+        self.lint(cache_file=self.cache_path)
+        self.assertEqual(self.get_calls(), 6)
+
+    def test_no_cache(self):
+        self.lint(cache_file=self.cache_path)
+        output = self.lint(cache_file=self.cache_path, no_cache=True)
+        self.assertEqual(self.get_calls(), 6)
+        self.assertNotIn('Lint cache', output)
+
+    def test_parallel(self):
+        self.lint(cache_file=self.cache_path, parallel=True)
+        output = self.lint(cache_file=self.cache_path, parallel=True)
+        self.assertEqual(self.get_calls(), 3)
+        self.assertIn('3 hits, 0 misses', output)
+
+
+class BatchLintCommandTest(LintCommandTestCase):
+    def setUp(self):
+        super(BatchLintCommandTest, self).setUp()
+
+        # Records each run and reports each file containing BAD on a line starting with its path
+        self.linting['js'] = {
+            'command': 'echo run >> %s; status=0; for f in {infile_list}; do if grep -q BAD "$f"; then echo "$f: BAD found"; status=1; fi; done; exit $status' % self.calls_path,
+            'default': True,
+            'batch_size': 2,
+        }
+
+    def test_batches(self):
+        output = self.lint(no_cache=True)
+
+        # good.js and bad.js in one run, other.js (from a temporary file) in another
+        self.assertEqual(self.get_calls(), 2)
+        self.assertIn('OK\t\t%s' % os.path.join(self.tmp_dir, 'good.js'), output)
+        self.assertIn('FAIL\t\t%s\n%s: BAD found\n' % ((os.path.join(self.tmp_dir, 'bad.js'),) * 2), output)
+        self.assertIn('OK\t\t%s' % os.path.join(self.tmp_dir, 'other.js'), output)
+
+    def test_preprocessed_file_names(self):
+        with open(os.path.join(self.tmp_dir, 'other.js'), 'wb') as f:
+            f.write('var BAD = 2;\n')
+
+        output = self.lint(no_cache=True)
+        self.assertIn('FAIL\t\t%s\n%s: BAD found\n' % ((os.path.join(self.tmp_dir, 'other.js'),) * 2), output)
+
+    def test_ambiguous_output(self):
+        self.linting['js']['command'] = self.linting['js']['command'].replace('echo "$f: BAD found"', 'echo "Something went wrong"')
+        self.linting['js']['batch_size'] = 3
+
+        output = self.lint(no_cache=True)
+
+        # The batch, then each file on its own
+        self.assertEqual(self.get_calls(), 4)
+        self.assertIn('OK\t\t%s' % os.path.join(self.tmp_dir, 'good.js'), output)
+        self.assertIn('FAIL\t\t%s\nSomething went wrong\n' % os.path.join(self.tmp_dir, 'bad.js'), output)
+
+    def test_crash_part_way_through_batch(self):
+        # good.js crashes the linter after bad.js has been reported
+        self.linting['js']['command'] = self.linting['js']['command'].replace('exit $status', 'for f in {infile_list}; do if grep -q "var a" "$f"; then echo "Segmentation fault"; exit 139; fi; done; exit $status')
+        self.linting['js']['batch_size'] = 3
+
+        output = self.lint(cache_file=self.cache_path)
+
+        # The batch, then each file on its own - good.js isn't reported (or cached) as passing
+        self.assertEqual(self.get_calls(), 4)
+        self.assertIn('FAIL\t\t%s\nSegmentation fault\n' % os.path.join(self.tmp_dir, 'good.js'), output)
+        self.assertIn('FAIL\t\t%s\n%s: BAD found\n' % ((os.path.join(self.tmp_dir, 'bad.js'),) * 2), output)
+
+        output = self.lint(cache_file=self.cache_path)
+        self.assertEqual(self.get_calls(), 4)
+        self.assertIn('FAIL\t\t%s\nSegmentation fault\n' % os.path.join(self.tmp_dir, 'good.js'), output)
+
+    def test_replays_results(self):
+        self.lint(cache_file=self.cache_path)
+        self.assertEqual(self.get_calls(), 2)
+
+        output = self.lint(cache_file=self.cache_path)
+        self.assertEqual(self.get_calls(), 2)
+        self.assertIn('BAD found', output)
+        self.assertIn('3 hits, 0 misses', output)
+
+    def test_parallel(self):
+        self.lint(cache_file=self.cache_path, parallel=True)
+        output = self.lint(cache_file=self.cache_path, parallel=True)
+        self.assertEqual(self.get_calls(), 2)
+        self.assertIn('3 hits, 0 misses', output)
@@ -0,0 +1,79 @@
+from django.core.management.color import no_style
+from django.test import TestCase
+
+
+from django_bundles import core
+from django_bundles.core import Bundle, BundleManager
+from django_bundles.management.commands.create_bundles import SegmentCache
+from django_bundles.management.commands.watch_bundles import Command
+from django_bundles.utils.versions import read_bundle_versions
+
+
+import os
+import shutil
+import tempfile
+import threading
+
+
+class HotRebuildTest(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.versions_file = os.path.join(self.tmp_dir, 'bundles_versions.json')
+        self.write('a.css', '.a { }')
+        self.write('b.css', '.b { }')
+
+        self.bundle = Bundle(('hot_css', {
+            'type': 'css',
+            'files': ('a.css', 'b.css'),
+            'files_root': self.tmp_dir,
+            'bundle_file_root': self.tmp_dir,
+            'processors': (('django_bundles.processors.ExecutableProcessor', {'command': 'tr a-z A-Z'}),),
+        }))
+        self.cached_bundles, core._cached_bundles = core._cached_bundles, BundleManager()
+        core._cached_bundles['hot_css'] = self.bundle
+
+        self.command = Command()
+        self.command.style = no_style()
+        self.command.log_lines = []
+        self.command.log_lock = threading.Lock()
+        self.command.segment_cache = SegmentCache()
+        self.command.versions_lock = threading.Lock()
+        self.command.written_versions = {}
+        self.command.bundle_versions = {}
+
+    def tearDown(self):
+        core._cached_bundles = self.cached_bundles
+        shutil.rmtree(self.tmp_dir)
+
+    def write(self, filename, contents):
+        with open(os.path.join(self.tmp_dir, filename), 'wb') as f:
+            f.write(contents)
+
+    def rebuild(self):
+        with self.settings(BUNDLES_VERSION_FILE=self.versions_file, BUNDLES_RUNTIME_SNAPSHOT_FILE=None):
+            changed = self.command.rebuild_bundle(self.bundle)
+        return changed, read_bundle_versions(self.versions_file)['hot_css']
+
+    def test_rebuild(self):
+        changed, first_version = self.rebuild()
+        self.assertTrue(changed)
+        self.assertEqual(open(self.bundle.get_path(first_version)).read(), '.A { }\n.B { }\n')
+        self.assertTrue('REBUILT' in self.command.log_lines[-1])
+
+        changed, version = self.rebuild()
+        self.assertFalse(changed)
+        self.assertEqual(version, first_version)
+
+        self.write('b.css', '.b { color: red; }')
+        changed, second_version = self.rebuild()
+        self.assertTrue(changed)
+        self.assertEqual(open(self.bundle.get_path(second_version)).read(), '.A { }\n.B { COLOR: RED; }\n')
+        self.assertEqual(self.command.segment_cache.runs, 3)
+
+        # The previous version is kept for pages that are still loading, older ones are removed
+        self.assertTrue(os.path.exists(self.bundle.get_path(first_version)))
+        self.write('b.css', '.b { color: blue; }')
+        changed, third_version = self.rebuild()
+        self.assertFalse(os.path.exists(self.bundle.get_path(first_version)))
+        self.assertTrue(os.path.exists(self.bundle.get_path(second_version)))
+        self.assertTrue(os.path.exists(self.bundle.get_path(third_version)))
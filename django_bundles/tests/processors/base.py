@@ -0,0 +1,89 @@
+from django.test import TestCase
+
+
+from django_bundles.processors import ExecutableProcessor, processor_pipeline
+from django_bundles.processors.base import ExecutablePipelineProcessor, join_executable_processors
+from django_bundles.processors.django_template import DjangoTemplateProcessor
+from django_bundles.utils.files import FileChunkGenerator
+from django_bundles.utils.tempfiles import get_temp_file_pool
+
+
+import os
+import shutil
+import tempfile
+
+
+TEST_FILES_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'files')
+
+
+class JoinExecutableProcessorsTest(TestCase):
+    def test_join(self):
+        processors = [
+            ExecutableProcessor(command='cat'),
+            ExecutableProcessor(command='tr a b'),
+            DjangoTemplateProcessor(),
+            ExecutableProcessor(command='cat {infile}'),
+            ExecutableProcessor(command='cat'),
+        ]
+
+        joined = join_executable_processors(processors)
+
+        self.assertEqual(len(joined), 4)
+        self.assertTrue(isinstance(joined[0], ExecutablePipelineProcessor))
+        self.assertEqual(joined[0].processors, processors[:2])
+        self.assertEqual(joined[1:], processors[2:])
+
+    def test_pipeline_output(self):
+        processors = [
+            ExecutableProcessor(command='tr a b'),
+            ExecutableProcessor(command='cat {infile}'),
+            ExecutableProcessor(command='tr b c'),
+            ExecutableProcessor(command='tr c d'),
+        ]
+
+        self.assertEqual(''.join(processor_pipeline(processors, iter(['aaa', 'xyz']))), 'dddxyz')
+
+
+class ExecutableProcessorFilesTest(TestCase):
+    commands = [
+        'tr a-z A-Z < {infile}',
+        'tr a-z A-Z > {outfile}',
+        'tr a-z A-Z < {infile} > {outfile}',
+        'cat {infile} | tr a-z A-Z > {outfile}',
+    ]
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        with self.settings(BUNDLES_TEMP_DIR=self.tmp_dir):
+            get_temp_file_pool().clear()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_temp_dir(self):
+        with self.settings(BUNDLES_TEMP_DIR=self.tmp_dir):
+            for command in self.commands:
+                processor = ExecutableProcessor(command=command)
+                self.assertEqual(''.join(processor.process(iter(['abc', 'def']))), 'ABCDEF')
+                self.assertEqual(''.join(processor.process(iter(['ghi']))), 'GHI')
+
+            # The temporary files were reused
+            self.assertEqual(get_temp_file_pool().created, 2)
+            self.assertEqual(len(os.listdir(self.tmp_dir)), 2)
+
+    def test_fifo(self):
+        file_path = os.path.join(TEST_FILES_PATH, 'test1.css')
+        contents = open(file_path, 'rb').read()
+
+        with self.settings(BUNDLES_TEMP_DIR=self.tmp_dir):
+            for command in self.commands:
+                processor = ExecutableProcessor(command=command, fifo=True)
+                self.assertEqual(''.join(processor.process(iter(['abc', 'def' * 100000]))), 'ABC' + 'DEF' * 100000)
+                self.assertEqual(''.join(processor.process(FileChunkGenerator(open(file_path, 'rb')))), contents.upper())
+
+            # Named pipes, and reused
+            self.assertEqual(os.listdir(self.tmp_dir)[0][:len('bundles-fifos-')], 'bundles-fifos-')
+            self.assertEqual(get_temp_file_pool().created, 2)
+
+    def test_fifo_not_in_fingerprint(self):
+        self.assertEqual(ExecutableProcessor(command='cat {infile}', fifo=True).get_fingerprint(), ExecutableProcessor(command='cat {infile}').get_fingerprint())
@@ -0,0 +1,96 @@
+from django.test import TestCase
+
+
+from django_bundles.processors import ExecutableProcessor
+from django_bundles.processors.base import Processor
+from django_bundles.processors.cache import MemoryProcessorCache, FileSystemProcessorCache
+from django_bundles.utils.files import FileChunkGenerator
+
+
+import os
+import shutil
+import tempfile
+
+
+class CountingProcessor(Processor):
+    calls = 0
+
+    def process(self, iter_input):
+        CountingProcessor.calls += 1
+        yield ''.join(iter_input).upper()
+
+
+class MemoryProcessorCacheTest(TestCase):
+    def setUp(self):
+        CountingProcessor.calls = 0
+        self.cache = MemoryProcessorCache()
+
+    def test_hit(self):
+        processor = CountingProcessor()
+
+        self.assertEqual(''.join(self.cache.process(processor, iter(['te', 'st']))), 'TEST')
+        self.assertEqual(''.join(self.cache.process(processor, iter(['test']))), 'TEST')
+        self.assertEqual(CountingProcessor.calls, 1)
+        self.assertEqual(self.cache.get_stats()['hits'], 1)
+        self.assertEqual(self.cache.get_stats()['misses'], 1)
+
+    def test_key_includes_kwargs(self):
+        self.assertNotEqual(
+            self.cache.get_key(ExecutableProcessor(command='cat'), 'test'),
+            self.cache.get_key(ExecutableProcessor(command='cat -'), 'test'),
+        )
+        self.assertNotEqual(
+            self.cache.get_key(ExecutableProcessor(command='cat'), 'test'),
+            self.cache.get_key(ExecutableProcessor(command='cat'), 'test2'),
+        )
+
+
+    def test_key_includes_dependencies(self):
+        processor = ExecutableProcessor(command='cat')
+
+        self.assertEqual(self.cache.get_key(processor, 'test'), self.cache.get_key(processor, 'test', ''))
+        self.assertNotEqual(self.cache.get_key(processor, 'test', 'a'), self.cache.get_key(processor, 'test', 'b'))
+
+
+    def test_file_input_keeps_path(self):
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            with open(os.path.join(tmp_dir, 'main.less'), 'wb') as f:
+                f.write('@import "partial.less";\n')
+            with open(os.path.join(tmp_dir, 'partial.less'), 'wb') as f:
+                f.write('a{}')
+
+            # Reads a file next to its input, like lessc resolving a relative import
+            processor = ExecutableProcessor(command='cat $(dirname {infile})/partial.less')
+            output = self.cache.process(processor, FileChunkGenerator(open(os.path.join(tmp_dir, 'main.less'), 'rb')))
+            self.assertEqual(''.join(output), 'a{}')
+        finally:
+            shutil.rmtree(tmp_dir)
+
+
+class FileSystemProcessorCacheTest(TestCase):
+    def setUp(self):
+        CountingProcessor.calls = 0
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_shared_directory(self):
+        processor = CountingProcessor()
+
+        self.assertEqual(''.join(FileSystemProcessorCache(self.tmp_dir).process(processor, iter(['test']))), 'TEST')
+        self.assertEqual(''.join(FileSystemProcessorCache(self.tmp_dir).process(processor, iter(['test']))), 'TEST')
+        self.assertEqual(CountingProcessor.calls, 1)
+
+    def test_eviction(self):
+        cache = FileSystemProcessorCache(self.tmp_dir, max_size=8)
+        cache.set('aa1', 'AAAA')
+        os.utime(cache.get_path('aa1'), (0, 0))
+        cache.set('bb1', 'BBBB')
+        cache.set('cc1', 'CCCC')
+
+        self.assertEqual(cache.get('aa1'), None)
+        self.assertEqual(cache.get('bb1'), 'BBBB')
+        self.assertEqual(cache.get('cc1'), 'CCCC')
+        self.assertEqual(cache.get_stats()['evictions'], 1)
@@ -0,0 +1,56 @@
+from django.test import TestCase
+
+
+from django_bundles.processors.css import CSSMinifierProcessor, MINIFY_RE
+
+
+def minify(css, chunk_size=None):
+    chunks = [css[i:i + chunk_size] for i in xrange(0, len(css), chunk_size)] if chunk_size else [css]
+    return ''.join(CSSMinifierProcessor().process(iter(chunks)))
+
+
+class CSSMinifierTest(TestCase):
+    def test_whitespace_and_comments(self):
+        self.assertEqual(minify('''
+            /* comment */
+            .a  .b > .c ,
+            .d {
+                color : red ;
+                margin: 0 auto;;
+            }
+        '''), '.a .b>.c,.d{color :red;margin:0 auto}')
+
+    def test_preserved_comment(self):
+        self.assertEqual(minify('/*! licence */ .a { color: red; }'), '/*! licence */.a{color:red}')
+
+    def test_zeros(self):
+        self.assertEqual(minify('.a { margin: 0px -0.5em 0.0em 10px; width: 0%; opacity: 0.75; }'), '.a{margin:0 -.5em 0 10px;width:0%;opacity:.75}')
+
+    def test_strings_and_urls(self):
+        css = '.a { content: "a  ;  b /* not a comment */"; background: url(data:image/png;base64,a0  b==) no-repeat; }'
+        self.assertEqual(minify(css), '.a{content:"a  ;  b /* not a comment */";background:url(data:image/png;base64,a0  b==) no-repeat}')
+
+    def test_selectors(self):
+        self.assertEqual(minify('a :hover, a:not(.b) { x: y }'), 'a :hover,a:not(.b){x:y}')
+        self.assertEqual(minify('@media screen and (max-width: 100px) { .a { b: c } }'), '@media screen and (max-width:100px){.a{b:c}}')
+
+    def test_calc(self):
+        self.assertEqual(minify('.a { width: calc(100% - 10px + 0px) }'), '.a{width:calc(100% - 10px + 0px)}')
+        self.assertEqual(minify('.a { margin: 0px; width: max(0px, calc( (100% - 0em) / 2 )) 0px }'), '.a{margin:0;width:max(0px,calc((100% - 0em) / 2)) 0}')
+        self.assertEqual(minify('.a { width: clamp(0px, 1vw, 10px); height: min(0rem, 1px) }'), '.a{width:clamp(0px,1vw,10px);height:min(0rem,1px)}')
+
+    def test_single_spaces_not_rewritten(self):
+        self.assertEqual(MINIFY_RE.search('.a b c'), None)
+
+    def test_trailing_semicolon_kept_at_top_level(self):
+        self.assertEqual(minify('@import url(a.css) ;\n@import "b.css";'), '@import url(a.css);@import "b.css";')
+
+    def test_chunked_matches_unchunked(self):
+        css = '''
+            /* comment */ .a  .b > .c, .d { color : red ; margin: 0.5em 0px }
+            .e { content: "x ; y"; background: url( "a b.png" ) } /*! keep */
+            @media print { .f { display : none } }
+        ''' * 3
+        expected = minify(css)
+        for chunk_size in (1, 2, 3, 7, 64):
+            self.assertEqual(minify(css, chunk_size=chunk_size), expected)
@@ -0,0 +1,74 @@
+from django.test import TestCase
+
+
+from django_bundles.processors import PersistentProcessor, processor_pipeline
+from django_bundles.processors.persistent import get_worker_pool
+from django_bundles.utils.workers import serve, write_request, read_response, STATUS_OK, STATUS_ERROR
+
+
+from subprocess import CalledProcessError
+from StringIO import StringIO
+import sys
+import os
+
+
+def worker_pid(data):
+    return str(os.getpid())
+
+
+def crash_on_request(data):
+    if data == 'crash':
+        os._exit(1)
+    if data == 'error':
+        raise ValueError('Bad input')
+    return data
+
+
+WORKER_COMMAND = '%s -m django_bundles.utils.workers %%s' % sys.executable
+
+
+class WorkerProtocolTest(TestCase):
+    def test_serve(self):
+        requests = StringIO()
+        write_request(requests, 'test')
+        write_request(requests, 'error')
+        requests.seek(0)
+
+        responses = StringIO()
+        serve(crash_on_request, stdin=requests, stdout=responses)
+        responses.seek(0)
+
+        self.assertEqual(read_response(responses), (STATUS_OK, 'test'))
+        status, output = read_response(responses)
+        self.assertEqual(status, STATUS_ERROR)
+        self.assertTrue('Bad input' in output)
+
+
+class PersistentProcessorTest(TestCase):
+    def test_process(self):
+        processor = PersistentProcessor(command=WORKER_COMMAND % 'string.upper')
+
+        self.assertEqual(''.join(processor_pipeline([processor], iter(['te', 'st']))), 'TEST')
+        self.assertEqual(''.join(processor_pipeline([processor], iter(['again']))), 'AGAIN')
+
+    def test_worker_reused(self):
+        pool = get_worker_pool(WORKER_COMMAND % 'django_bundles.tests.processors.persistent.worker_pid')
+
+        self.assertEqual(pool.run(''), pool.run(''))
+
+    def test_crash_restarts_worker(self):
+        pool = get_worker_pool(WORKER_COMMAND % 'django_bundles.tests.processors.persistent.crash_on_request')
+
+        self.assertEqual(pool.run('before'), 'before')
+        self.assertRaises(CalledProcessError, pool.run, 'crash')
+        self.assertEqual(pool.run('after'), 'after')
+
+    def test_error(self):
+        pool = get_worker_pool(WORKER_COMMAND % 'django_bundles.tests.processors.persistent.crash_on_request')
+
+        try:
+            pool.run('error')
+        except CalledProcessError as e:
+            self.assertTrue('Bad input' in e.output)
+        else:
+            self.fail('CalledProcessError not raised')
@@ -0,0 +1,99 @@
+from django.test import TestCase
+
+
+from django_bundles import core, runtime
+from django_bundles.core import Bundle, set_bundle_versions
+from django_bundles.runtime import build_runtime_snapshot, get_runtime_bundles, write_runtime_snapshot
+from django_bundles.templatetags.django_bundles_tags import render_bundle
+
+
+import json
+import os
+import shutil
+import tempfile
+
+
+TEST_FILES_PATH = os.path.join(os.path.dirname(__file__), 'files')
+
+
+class RuntimeSnapshotTest(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, 'bundles_versions.runtime.json')
+        self.bundle = Bundle(('snapshot_bundle', {
+            'type': 'css',
+            'files': ('test1.css', 'test2.css'),
+            'files_root': TEST_FILES_PATH,
+            'files_url_root': '/media/',
+            'media': 'screen',
+        }))
+        self.settings_override = self.settings(
+            BUNDLES_RUNTIME_SNAPSHOT_FILE=self.path,
+            BUNDLES_TAG_HTML={'css': '<link href="%(file_url)s"%(attrs)s />'},
+            DEVELOPMENT_BUNDLES=(),
+        )
+        self.settings_override.enable()
+        self.versions_state = core._cached_versions, core._versions_pinned
+        set_bundle_versions(None)
+
+    def tearDown(self):
+        self.settings_override.disable()
+        core._cached_versions, core._versions_pinned = self.versions_state
+        runtime._runtime_bundles = None
+        shutil.rmtree(self.tmp_dir)
+
+    def test_snapshot(self):
+        snapshot = build_runtime_snapshot([self.bundle], {'snapshot_bundle': 'v1'})
+
+        self.assertEqual(snapshot['bundles']['snapshot_bundle'], {
+            'type': 'css',
+            'media': 'screen',
+            'url': '/media/snapshot_bundle.v1.css',
+            'bundled_html': '<link href="/media/snapshot_bundle.v1.css" media="screen" />',
+            'files_html': '<link href="/media/test1.css" media="screen" />\n<link href="/media/test2.css" media="screen" />',
+        })
+
+    def test_render_bundle(self):
+        write_runtime_snapshot(self.path, [self.bundle], {'snapshot_bundle': 'v1'})
+
+        with self.settings(USE_BUNDLES=True):
+            self.assertEqual(render_bundle('snapshot_bundle'), '<link href="/media/snapshot_bundle.v1.css" media="screen" />')
+        with self.settings(USE_BUNDLES=True, DEVELOPMENT_BUNDLES=('snapshot_bundle',)):
+            self.assertEqual(render_bundle('snapshot_bundle').count('<link'), 2)
+
+    def test_not_used(self):
+        with self.settings(USE_BUNDLES=True):
+            # Not built yet
+            self.assertEqual(get_runtime_bundles(), None)
+
+            write_runtime_snapshot(self.path, [self.bundle], {'snapshot_bundle': 'v1'})
+            self.assertNotEqual(get_runtime_bundles(), None)
+
+            # During a build
+            set_bundle_versions({'snapshot_bundle': 'v2'})
+            self.assertEqual(get_runtime_bundles(), None)
+            set_bundle_versions(None)
+
+        with self.settings(USE_BUNDLES=False):
+            self.assertEqual(get_runtime_bundles(), None)
+
+    def test_reloaded_when_changed(self):
+        write_runtime_snapshot(self.path, [self.bundle], {'snapshot_bundle': 'v1'})
+
+        with self.settings(BUNDLES_VERSION_FILE_CHECK_INTERVAL=0, USE_BUNDLES=True):
+            self.assertEqual(get_runtime_bundles()['snapshot_bundle'].get_url(), '/media/snapshot_bundle.v1.css')
+
+            write_runtime_snapshot(self.path, [self.bundle], {'snapshot_bundle': 'v2'})
+            os.utime(self.path, (0, 0))
+            self.assertEqual(get_runtime_bundles()['snapshot_bundle'].get_url(), '/media/snapshot_bundle.v2.css')
+
+            # A broken snapshot doesn't replace a working one
+            with open(self.path, 'wb') as f:
+                f.write('{')
+            self.assertEqual(get_runtime_bundles()['snapshot_bundle'].get_url(), '/media/snapshot_bundle.v2.css')
+
+    def test_compact(self):
+        write_runtime_snapshot(self.path, [self.bundle], {'snapshot_bundle': 'v1'})
+
+        self.assertFalse('\n ' in open(self.path).read())
+        self.assertEqual(json.load(open(self.path))['bundles']['snapshot_bundle']['url'], '/media/snapshot_bundle.v1.css')
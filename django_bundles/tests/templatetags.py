@@ -4,10 +4,13 @@ from django.test.utils import override_settings
 from django.template import Template, Context
 
 
-from django_bundles.core import BundleManager, Bundle
+from django_bundles import core
+from django_bundles.core import BundleManager, Bundle, set_bundle_versions
+from django_bundles.templatetags.django_bundles_tags import render_bundle
 
 
 import os
+import tempfile
 
 
 TEST_FILES_PATH = os.path.join(os.path.dirname(__file__), 'files')
@@ -38,3 +41,52 @@ class GetBundlesTest(TestCase):
 
         self.assertTrue(isinstance(context.get('test_bundles'), BundleManager))
         self.assertTrue(isinstance(context['test_bundles']['test_bundle'], Bundle))
+
+
+# A versions file has to be set for set_bundle_versions to be used - it's never read as the versions are pinned
+@override_settings(BUNDLES_TAG_HTML={'css': '<link href="%(file_url)s"%(attrs)s />'}, USE_BUNDLES=True, DEVELOPMENT_BUNDLES=(),
+                   BUNDLES_VERSION_FILE=os.path.join(tempfile.gettempdir(), 'bundles_versions.json'))
+class RenderBundleCacheTest(TestCase):
+    def setUp(self):
+        self.bundle = Bundle(('cached_bundle', {
+            'type': 'css',
+            'files': ('test1.css',),
+            'files_root': TEST_FILES_PATH,
+            'files_url_root': '/media/',
+        }))
+        self.cached_bundles = core._cached_bundles
+        core._cached_bundles = BundleManager()
+        core._cached_bundles['cached_bundle'] = self.bundle
+        self.versions_state = core._cached_versions, core._versions_pinned
+
+    def tearDown(self):
+        core._cached_bundles = self.cached_bundles
+        core._cached_versions, core._versions_pinned = self.versions_state
+
+    def test_cached_until_versions_change(self):
+        set_bundle_versions({'cached_bundle': 'v1'})
+        self.assertEqual(render_bundle('cached_bundle'), '<link href="/media/cached_bundle.v1.css" />')
+
+        self.bundle.bundle_url_root = '/changed/'
+        self.assertEqual(render_bundle('cached_bundle'), '<link href="/media/cached_bundle.v1.css" />')
+
+        set_bundle_versions({'cached_bundle': 'v2'})
+        self.assertEqual(render_bundle('cached_bundle'), '<link href="/changed/cached_bundle.v2.css" />')
+
+    def test_versions_changed_in_place(self):
+        # As create_bundles does after building each bundle
+        versions = {}
+        set_bundle_versions(versions)
+        self.assertEqual(render_bundle('cached_bundle'), '<link href="/media/cached_bundle.None.css" />')
+
+        versions['cached_bundle'] = 'v1'
+        self.assertEqual(render_bundle('cached_bundle'), '<link href="/media/cached_bundle.v1.css" />')
+
+    def test_cached_until_settings_change(self):
+        set_bundle_versions({'cached_bundle': 'v1'})
+        self.assertEqual(render_bundle('cached_bundle'), '<link href="/media/cached_bundle.v1.css" />')
+
+        with self.settings(USE_BUNDLES=False):
+            self.assertEqual(render_bundle('cached_bundle'), '<link href="/media/test1.css" />')
+
+        self.assertEqual(render_bundle('cached_bundle'), '<link href="/media/cached_bundle.v1.css" />')
@@ -0,0 +1,105 @@
+from django.test import TestCase
+
+
+from django_bundles.core import Bundle
+from django_bundles.utils.build_state import BuildState
+
+
+import os
+import shutil
+import tempfile
+
+
+class BuildStateTest(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.state_path = os.path.join(self.tmp_dir, 'bundles.state')
+
+        with open(os.path.join(self.tmp_dir, 'test1.css'), 'wb') as f:
+            f.write('.test1 { color: red; }')
+
+        self.bundle = Bundle((
+            'test_bundle', {
+                'type': 'css',
+                'files': (
+                    'test1.css',
+                ),
+                'files_root': self.tmp_dir,
+                'processors': (),
+            }
+        ))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_fingerprint_stable(self):
+        state = BuildState(self.state_path)
+        self.assertEqual(state.get_bundle_fingerprint(self.bundle), state.get_bundle_fingerprint(self.bundle))
+
+    def test_fingerprint_changes_with_contents(self):
+        state = BuildState(self.state_path)
+        fingerprint = state.get_bundle_fingerprint(self.bundle)
+
+        with open(os.path.join(self.tmp_dir, 'test1.css'), 'wb') as f:
+            f.write('.test1 { color: blue; }')
+
+        self.assertNotEqual(fingerprint, state.get_bundle_fingerprint(self.bundle))
+
+    def test_fingerprint_changes_with_imports(self):
+        with open(os.path.join(self.tmp_dir, 'test1.css'), 'wb') as f:
+            f.write('@import "partial.css";\n.test1 { color: red; }')
+        with open(os.path.join(self.tmp_dir, 'partial.css'), 'wb') as f:
+            f.write('.partial { }')
+
+        state = BuildState(self.state_path)
+        fingerprint = state.get_bundle_fingerprint(self.bundle)
+        state.save()
+
+        with open(os.path.join(self.tmp_dir, 'partial.css'), 'wb') as f:
+            f.write('.partial { color: red; }')
+
+        self.assertNotEqual(BuildState(self.state_path).get_bundle_fingerprint(self.bundle), fingerprint)
+
+    def test_uncacheable_processor(self):
+        bundle = Bundle(('test_bundle', {
+            'type': 'css',
+            'files': ('test1.css',),
+            'files_root': self.tmp_dir,
+            'processors': ('django_bundles.processors.django_template.DjangoTemplateProcessor',),
+        }))
+
+        self.assertEqual(BuildState(self.state_path).get_bundle_fingerprint(bundle), None)
+
+    def test_rebuild_reason(self):
+        state = BuildState(self.state_path)
+        fingerprint = state.get_bundle_fingerprint(self.bundle)
+
+        self.assertEqual(state.get_rebuild_reason(self.bundle, fingerprint, None), 'no previous build')
+
+        state.set_bundle(self.bundle, fingerprint, 'abc')
+        self.assertEqual(state.get_rebuild_reason(self.bundle, fingerprint, 'abc'), 'output missing')
+
+        open(self.bundle.get_path('abc'), 'wb').close()
+        self.assertEqual(state.get_rebuild_reason(self.bundle, fingerprint, 'abc'), None)
+        self.assertEqual(state.get_rebuild_reason(self.bundle, fingerprint, 'abc', fixed_version='_'), 'version changed')
+        self.assertEqual(state.get_rebuild_reason(self.bundle, 'changed', 'abc'), 'inputs changed')
+
+    def test_dev_build_not_reused(self):
+        state = BuildState(self.state_path)
+        fingerprint = state.get_bundle_fingerprint(self.bundle)
+
+        # create_bundles --dev then create_bundles
+        state.set_bundle(self.bundle, fingerprint, '_', fixed_version='_')
+        open(self.bundle.get_path('_'), 'wb').close()
+        self.assertEqual(state.get_rebuild_reason(self.bundle, fingerprint, '_', fixed_version='_'), None)
+        self.assertEqual(state.get_rebuild_reason(self.bundle, fingerprint, '_'), 'version changed')
+
+    def test_save_and_load(self):
+        state = BuildState(self.state_path)
+        fingerprint = state.get_bundle_fingerprint(self.bundle)
+        state.set_bundle(self.bundle, fingerprint, 'abc')
+        state.save()
+
+        loaded_state = BuildState(self.state_path)
+        self.assertEqual(loaded_state.bundles, {'test_bundle': {'fingerprint': fingerprint, 'version': 'abc'}})
+        self.assertEqual(loaded_state.get_bundle_fingerprint(self.bundle), fingerprint)
@@ -0,0 +1,72 @@
+from django.test import TestCase
+
+
+from django_bundles.utils import compression
+from django_bundles.utils.compression import CompressedFileWriter, GzipCompressor, compress_file, get_compressors, get_file_sizes
+
+
+import gzip
+import hashlib
+import os
+import shutil
+import tempfile
+
+
+class CompressionTest(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.file_name = os.path.join(self.tmp_dir, 'test.css')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_writer(self):
+        with CompressedFileWriter(self.file_name + '.tmp', compressors=[(GzipCompressor, 6)]) as output_file:
+            for i in xrange(100):
+                output_file.write('.a%s { color: red }\n' % i)
+        output_file.rename(self.file_name)
+
+        contents = open(self.file_name, 'rb').read()
+        self.assertEqual(gzip.open(self.file_name + '.gz', 'rb').read(), contents)
+        self.assertFalse(os.path.exists(self.file_name + '.tmp.gz'))
+
+        sizes = dict(get_file_sizes(self.file_name))
+        self.assertEqual(sizes['raw'], len(contents))
+        self.assertTrue(sizes['gzip'] < sizes['raw'])
+
+    def test_write_file(self):
+        input_file_name = os.path.join(self.tmp_dir, 'input.css')
+        with open(input_file_name, 'wb') as f:
+            f.write('.a { color: red }\n' * 10000)
+        contents = open(input_file_name, 'rb').read()
+
+        for compressors in ([], [(GzipCompressor, 6)]):
+            m = hashlib.md5()
+            with CompressedFileWriter(self.file_name, compressors=compressors) as output_file:
+                output_file.write('/* start */\n')
+                with open(input_file_name, 'rb') as input_file:
+                    output_file.write_file(input_file, m)
+
+            self.assertEqual(open(self.file_name, 'rb').read(), '/* start */\n' + contents)
+            self.assertEqual(m.hexdigest(), hashlib.md5(contents).hexdigest())
+        self.assertEqual(gzip.open(self.file_name + '.gz', 'rb').read(), '/* start */\n' + contents)
+
+    def test_compress_file(self):
+        with open(self.file_name, 'wb') as f:
+            f.write('test ' * 1000)
+
+        compress_file(self.file_name, compressors=[(GzipCompressor, 9)], chunk_size=100)
+
+        self.assertEqual(gzip.open(self.file_name + '.gz', 'rb').read(), 'test ' * 1000)
+
+    def test_get_compressors(self):
+        with self.settings(BUNDLES_COMPRESSION={'gzip': 9, 'brotli': 11}):
+            compressors = get_compressors()
+            self.assertEqual(compressors[-1], (GzipCompressor, 9))
+            self.assertEqual(len(compressors), 2 if compression.brotli else 1)
+
+        with self.settings(BUNDLES_COMPRESSION={}):
+            self.assertEqual(get_compressors(), [])
+            with CompressedFileWriter(self.file_name) as output_file:
+                output_file.write('test')
+            self.assertEqual(os.listdir(self.tmp_dir), ['test.css'])
@@ -0,0 +1,76 @@
+from django.test import TestCase
+
+
+from django_bundles.utils.debounce import DebouncedExecutor
+
+
+import threading
+import time
+
+
+class DebouncedExecutorTest(TestCase):
+    def setUp(self):
+        self.calls = []
+        self.calls_lock = threading.Lock()
+        self.errors = []
+        self.executor = DebouncedExecutor(workers=2, delay=0.05, error_callback=lambda key, error: self.errors.append((key, error)))
+
+    def tearDown(self):
+        self.executor.stop()
+
+    def record(self, key, duration=0):
+        with self.calls_lock:
+            self.calls.append((key, 'start', time.time()))
+        time.sleep(duration)
+        with self.calls_lock:
+            self.calls.append((key, 'end', time.time()))
+
+    def test_coalesces_events(self):
+        for value in ('write', 'rename', 'chmod'):
+            self.executor.submit('a.less', self.record, value)
+        self.assertTrue(self.executor.wait(5))
+
+        # Only the last event's work runs
+        self.assertEqual([key for key, event, _ in self.calls if event == 'start'], ['chmod'])
+        self.assertEqual(self.executor.runs, 1)
+        self.assertEqual(self.executor.cancelled, 2)
+
+    def test_waits_for_events_to_settle(self):
+        start = time.time()
+        self.executor.submit('a.less', self.record, 'a')
+        time.sleep(0.03)
+        self.executor.submit('a.less', self.record, 'a')
+        self.assertTrue(self.executor.wait(5))
+
+        self.assertEqual(len(self.calls), 2)
+        self.assertTrue(self.calls[0][2] - start >= 0.08)
+
+    def test_reruns_after_running(self):
+        self.executor.submit('a.less', self.record, 'first', 0.2, delay=0)
+        time.sleep(0.1)
+        self.executor.submit('a.less', self.record, 'second', delay=0)
+        self.assertTrue(self.executor.wait(5))
+
+        # Never concurrently for the same key
+        self.assertEqual([(key, event) for key, event, _ in self.calls], [('first', 'start'), ('first', 'end'), ('second', 'start'), ('second', 'end')])
+
+    def test_slow_work_does_not_block_other_keys(self):
+        self.executor.submit('slow.less', self.record, 'slow', 0.3, delay=0)
+        self.executor.submit('fast.less', self.record, 'fast', delay=0)
+        self.assertTrue(self.executor.wait(5))
+
+        ends = dict((key, at) for key, event, at in self.calls if event == 'end')
+        self.assertTrue(ends['fast'] < ends['slow'])
+
+    def test_errors(self):
+        def fail():
+            raise ValueError('lessc crashed')
+
+        self.executor.submit('a.less', fail, delay=0)
+        self.executor.submit('b.less', self.record, 'b', delay=0)
+        self.assertTrue(self.executor.wait(5))
+
+        self.assertEqual(len(self.errors), 1)
+        self.assertEqual(self.errors[0][0], 'a.less')
+        self.assertTrue('lessc crashed' in self.errors[0][1])
+        self.assertEqual(len(self.calls), 2)
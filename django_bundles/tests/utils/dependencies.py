@@ -0,0 +1,150 @@
+from django.test import TestCase
+
+
+from django_bundles.core import Bundle
+from django_bundles.utils.dependencies import DependencyGraph, scan_css_imports
+
+
+import json
+import os
+import shutil
+import tempfile
+
+
+class ScanCSSImportsTest(TestCase):
+    def test_less(self):
+        contents = '\n'.join((
+            '@import "variables";',
+            "@import (reference) 'mixins.less';",
+            '// @import "commented";',
+            '/* @import "also_commented"; */',
+            '@import url("../shared/reset.css") screen;',
+            '@import url(//fonts.example.com/font.css);',
+            '@import "http://example.com/remote.css";',
+            '@import "/static/absolute.css";',
+            'a { color: @link; }',
+        ))
+
+        self.assertEqual(scan_css_imports('/src/less/master.less', contents), [
+            '/src/less/variables.less',
+            '/src/less/mixins.less',
+            '/src/shared/reset.css',
+        ])
+
+    def test_css(self):
+        self.assertEqual(scan_css_imports('/src/css/master.css', '@import "base";\n@import url(grid.css);'), [
+            '/src/css/base',
+            '/src/css/grid.css',
+        ])
+
+
+class DependencyGraphTest(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.write('master.less', '@import "variables";\n@import "mixins";\nbody { color: @text; }')
+        self.write('other.less', '@import "mixins";')
+        self.write('plain.less', 'p { margin: 0; }')
+        self.write('variables.less', '@text: #333;')
+        self.write('mixins.less', '@import "variables";\n.rounded() { }')
+
+        self.bundle = Bundle(('test_bundle', {
+            'type': 'less',
+            'files': ('master.less', 'other.less', 'plain.less'),
+            'files_root': self.tmp_dir,
+            'processors': (),
+        }))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def path(self, filename):
+        return os.path.join(self.tmp_dir, filename)
+
+    def write(self, filename, contents):
+        with open(self.path(filename), 'wb') as f:
+            f.write(contents)
+
+    def test_dependencies(self):
+        graph = DependencyGraph()
+
+        self.assertEqual(graph.get_dependencies(self.path('master.less')), [self.path('mixins.less'), self.path('variables.less')])
+        self.assertEqual(graph.get_dependencies(self.path('other.less')), [self.path('mixins.less'), self.path('variables.less')])
+        self.assertEqual(graph.get_dependencies(self.path('plain.less')), [])
+
+    def test_cycles(self):
+        self.write('variables.less', '@import "mixins";\n@text: #333;')
+
+        self.assertEqual(DependencyGraph().get_dependencies(self.path('mixins.less')), [self.path('variables.less')])
+
+    def test_dependents(self):
+        graph = DependencyGraph()
+        graph.add_bundles([self.bundle])
+
+        self.assertEqual(graph.get_dependents(self.path('variables.less')), [self.path('master.less'), self.path('other.less')])
+        self.assertEqual(graph.get_dependents(self.path('plain.less')), [])
+
+    def test_update(self):
+        graph = DependencyGraph()
+        graph.add_bundles([self.bundle])
+
+        # A partial affects whatever imports it
+        self.assertEqual(graph.update(self.path('variables.less')), [self.path('master.less'), self.path('other.less')])
+        self.assertEqual(graph.update(self.path('plain.less')), [self.path('plain.less')])
+        self.assertEqual(graph.update(self.path('unrelated.less')), [])
+
+        # Adding an import
+        self.write('new.less', '@new: 1;')
+        self.write('plain.less', '@import "new";\np { margin: 0; }')
+        self.assertEqual(graph.update(self.path('plain.less')), [self.path('plain.less')])
+        self.assertEqual(graph.get_dependents(self.path('new.less')), [self.path('plain.less')])
+
+        # Removing one
+        self.write('master.less', 'body { }')
+        graph.update(self.path('master.less'))
+        self.assertEqual(graph.get_dependents(self.path('variables.less')), [self.path('other.less')])
+
+    def test_only_rescans_changed_files(self):
+        graph = DependencyGraph()
+        graph.add_bundles([self.bundle])
+        self.assertEqual(graph.scans, 5)
+
+        graph.add_bundles([self.bundle])
+        self.assertEqual(graph.scans, 5)
+
+        self.write('mixins.less', '.rounded() { border-radius: 4px; }')
+        graph.update(self.path('mixins.less'))
+        self.assertEqual(graph.scans, 6)
+
+        # Restored from saved state
+        key = graph.get_dependency_key(self.path('master.less'))
+        graph = DependencyGraph(json.loads(json.dumps(graph.get_state())))
+        graph.add_bundles([self.bundle])
+        self.assertEqual(graph.scans, 0)
+        self.assertEqual(graph.get_dependency_key(self.path('master.less')), key)
+        self.assertEqual(graph.get_dependents(self.path('variables.less')), [self.path('master.less')])
+
+    def test_dependency_key(self):
+        graph = DependencyGraph()
+        key = graph.get_dependency_key(self.path('master.less'))
+
+        self.assertEqual(graph.get_dependency_key(self.path('plain.less')), '')
+        self.assertEqual(graph.get_dependency_key(self.path('master.less')), key)
+
+        self.write('variables.less', '@text: #000000;')
+        self.assertNotEqual(graph.get_dependency_key(self.path('master.less')), key)
+
+    def test_missing_dependency(self):
+        self.write('plain.less', '@import "missing";')
+        graph = DependencyGraph()
+
+        self.assertEqual(graph.get_dependency_digests(self.path('plain.less')), [(self.path('missing.less'), None)])
+        key = graph.get_dependency_key(self.path('plain.less'))
+
+        self.write('missing.less', '@found: 1;')
+        self.assertNotEqual(graph.get_dependency_key(self.path('plain.less')), key)
+
+    def test_custom_scanner(self):
+        self.write('app.js', '// requires: plain.less\n')
+        graph = DependencyGraph(scanners={'js': lambda file_path, contents: [self.path(contents.split(': ')[1].strip())]})
+
+        self.assertEqual(graph.get_dependencies(self.path('app.js')), [self.path('plain.less')])
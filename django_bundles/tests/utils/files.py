@@ -1,23 +1,81 @@
 from django.test import TestCase
 
 
-from django_bundles.utils.files import expand_file_names, FileChunkGenerator
+from django_bundles.utils import files
+from django_bundles.utils.files import expand_file_names, copy_file_contents, iter_file_buffers, DirectoryListingCache, FileChunkGenerator
 
 
 import os
 import collections
+import shutil
+import tempfile
 
 
 class ExpandFileNamesTest(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        for path in ('b.js', 'a.js', 'a.css', 'lib/c.js', 'lib/vendor/d.js', 'lib/vendor/e.css', 'other/lib/f.js'):
+            path = os.path.join(self.tmp_dir, path)
+            if not os.path.isdir(os.path.dirname(path)):
+                os.makedirs(os.path.dirname(path))
+            open(path, 'wb').close()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
     def test_expand_file_names(self):
         current_dir = os.path.dirname(__file__)
         files_in_dir = os.listdir(current_dir)
-        python_files_in_dir = [fn for fn in files_in_dir if fn[-3:] == '.py']
+        python_files_in_dir = sorted(fn for fn in files_in_dir if fn[-3:] == '.py')
 
         expanded_file_list = expand_file_names("*.py", current_dir)
 
         self.assertEqual(expanded_file_list, python_files_in_dir)
 
+    def test_no_wildcards(self):
+        self.assertEqual(expand_file_names('does_not_exist.js', self.tmp_dir), ['does_not_exist.js'])
+
+    def test_missing_directory(self):
+        self.assertRaises(OSError, expand_file_names, 'does_not_exist/*.js', self.tmp_dir)
+
+    def test_directory_wildcards(self):
+        self.assertEqual(expand_file_names('*/*.js', self.tmp_dir), ['lib/c.js'])
+        self.assertEqual(expand_file_names('*/lib/*.js', self.tmp_dir), ['other/lib/f.js'])
+
+    def test_recursive(self):
+        self.assertEqual(expand_file_names('**/*.js', self.tmp_dir), ['a.js', 'b.js', 'lib/c.js', 'lib/vendor/d.js', 'other/lib/f.js'])
+        self.assertEqual(expand_file_names('lib/**', self.tmp_dir), ['lib/c.js', 'lib/vendor/d.js', 'lib/vendor/e.css'])
+        self.assertEqual(expand_file_names('**/lib/*.js', self.tmp_dir), ['lib/c.js', 'other/lib/f.js'])
+
+    def test_recursive_literal_between(self):
+        # Not every directory ** matches has a lib
+        self.assertEqual(expand_file_names('**/lib/**/*.js', self.tmp_dir), ['lib/c.js', 'lib/vendor/d.js', 'other/lib/f.js'])
+
+        os.makedirs(os.path.join(self.tmp_dir, 'lib/vendor/lib'))
+        open(os.path.join(self.tmp_dir, 'lib/vendor/lib/g.js'), 'wb').close()
+        self.assertEqual(expand_file_names('**/lib/**/*.js', self.tmp_dir), ['lib/c.js', 'lib/vendor/d.js', 'lib/vendor/lib/g.js', 'other/lib/f.js'])
+        self.assertEqual(expand_file_names('**/l*/**/*.js', self.tmp_dir), ['lib/c.js', 'lib/vendor/d.js', 'lib/vendor/lib/g.js', 'other/lib/f.js'])
+
+    def test_recursive_repeated(self):
+        self.assertEqual(expand_file_names('**/**', self.tmp_dir), expand_file_names('**', self.tmp_dir))
+        self.assertEqual(expand_file_names('**/**/*.js', self.tmp_dir), ['a.js', 'b.js', 'lib/c.js', 'lib/vendor/d.js', 'other/lib/f.js'])
+        self.assertEqual(expand_file_names('lib/**/**/*.css', self.tmp_dir), ['lib/vendor/e.css'])
+
+    def test_exclude(self):
+        self.assertEqual(expand_file_names('**/*.js', self.tmp_dir, exclude=('lib/vendor/**', 'b.js')), ['a.js', 'lib/c.js', 'other/lib/f.js'])
+        self.assertEqual(expand_file_names('**/*.js', self.tmp_dir, exclude=('**/lib/*',)), ['a.js', 'b.js', 'lib/vendor/d.js'])
+
+    def test_listing_cache(self):
+        listing_cache = DirectoryListingCache()
+
+        expand_file_names('**/*.js', self.tmp_dir, listing_cache=listing_cache)
+        listings = listing_cache.listings
+        expand_file_names('**/*.css', self.tmp_dir, listing_cache=listing_cache)
+        expand_file_names('lib/*.js', self.tmp_dir, listing_cache=listing_cache)
+
+        self.assertEqual(listings, 5)
+        self.assertEqual(listing_cache.listings, listings)
+
 
 class FileChunkGeneratorTest(TestCase):
     def test_contents(self):
@@ -48,3 +106,64 @@ class FileChunkGeneratorTest(TestCase):
             collections.deque(g, maxlen=0)
 
             self.assertFalse(f.closed)
+
+    def test_chunk_size(self):
+        with open(__file__, 'rb') as f:
+            self.assertEqual(len(FileChunkGenerator(f).next()), min(os.path.getsize(__file__), 64 * 1024))
+
+        with self.settings(BUNDLES_FILE_CHUNK_SIZE=10):
+            with open(__file__, 'rb') as f:
+                self.assertEqual(len(FileChunkGenerator(f).next()), 10)
+
+
+class CopyFileContentsTest(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.input_file_name = os.path.join(self.tmp_dir, 'input.css')
+        self.output_file_name = os.path.join(self.tmp_dir, 'output.css')
+        with open(self.input_file_name, 'wb') as f:
+            f.write('.a { color: red }\n' * 10000)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def copy(self):
+        with open(self.output_file_name, 'wb') as output_file:
+            output_file.write('start\n')
+            with open(self.input_file_name, 'rb') as input_file:
+                copy_file_contents(input_file, output_file)
+            output_file.write('end\n')
+        return open(self.output_file_name, 'rb').read()
+
+    def test_copy(self):
+        self.assertEqual(self.copy(), 'start\n' + open(self.input_file_name, 'rb').read() + 'end\n')
+
+    def test_copy_without_kernel_copy(self):
+        copy_file_range, sendfile = files.copy_file_range, files.sendfile
+        files.copy_file_range = files.sendfile = None
+        try:
+            self.assertEqual(self.copy(), 'start\n' + open(self.input_file_name, 'rb').read() + 'end\n')
+        finally:
+            files.copy_file_range, files.sendfile = copy_file_range, sendfile
+
+    def test_empty_file(self):
+        open(self.input_file_name, 'wb').close()
+        self.assertEqual(self.copy(), 'start\nend\n')
+
+    def test_iter_file_buffers(self):
+        with open(self.input_file_name, 'rb') as input_file:
+            self.assertEqual(''.join(str(bytearray(buffer)) for buffer in iter_file_buffers(input_file)), open(self.input_file_name, 'rb').read())
+
+    def test_iter_file_buffers_without_mapping(self):
+        with open(self.input_file_name, 'rb') as input_file:
+            buffers = [buffer.tobytes() for buffer in iter_file_buffers(input_file, chunk_size=4, map_files=False)]
+        self.assertEqual(''.join(buffers), open(self.input_file_name, 'rb').read())
+        self.assertTrue(all(len(buffer) <= 4 for buffer in buffers))
+
+    def test_iter_unmappable_file_buffers(self):
+        read_fd, write_fd = os.pipe()
+        os.write(write_fd, 'abcdefghij')
+        os.close(write_fd)
+
+        with os.fdopen(read_fd, 'rb') as input_file:
+            self.assertEqual([buffer.tobytes() for buffer in iter_file_buffers(input_file, chunk_size=4)], ['abcd', 'efgh', 'ij'])
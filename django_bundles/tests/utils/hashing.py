@@ -0,0 +1,78 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase
+
+
+from django_bundles.core import Bundle
+from django_bundles.utils.hashing import get_bundle_input_version, get_hash_function
+
+
+import hashlib
+import os
+import shutil
+import tempfile
+
+
+class HashFunctionTest(TestCase):
+    def test_hashlib(self):
+        h = get_hash_function('sha1')()
+        h.update('test')
+        self.assertEqual(h.hexdigest(), hashlib.sha1('test').hexdigest())
+
+    def test_default(self):
+        with self.settings(BUNDLES_HASH_FUNCTION='md5'):
+            self.assertEqual(len(get_hash_function()().hexdigest()), 32)
+
+    def test_unknown(self):
+        self.assertRaises(ImproperlyConfigured, get_hash_function, 'does_not_exist')
+
+
+class BundleInputVersionTest(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        for filename in ('a.css', 'b.css'):
+            with open(os.path.join(self.tmp_dir, filename), 'wb') as f:
+                f.write('.%s { }' % filename[0])
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def get_version(self, **conf):
+        conf.setdefault('files', ('*.css',))
+        return get_bundle_input_version(Bundle(('test_bundle', dict(conf, type='css', files_root=self.tmp_dir))))
+
+    def test_stable(self):
+        self.assertEqual(self.get_version(), self.get_version())
+        self.assertEqual(self.get_version(), self.get_version(files=('a.css', 'b.css')))
+
+    def test_changes_with_inputs(self):
+        version = self.get_version()
+
+        self.assertNotEqual(self.get_version(files=('b.css', 'a.css')), version)
+        self.assertNotEqual(self.get_version(processors=(('django_bundles.processors.ExecutableProcessor', {'command': 'cat'}),)), version)
+
+        with open(os.path.join(self.tmp_dir, 'b.css'), 'ab') as f:
+            f.write(' ')
+        self.assertNotEqual(self.get_version(), version)
+
+    def test_file_boundaries(self):
+        version = self.get_version()
+
+        with open(os.path.join(self.tmp_dir, 'a.css'), 'wb') as f:
+            f.write('.a { }.b')
+        with open(os.path.join(self.tmp_dir, 'b.css'), 'wb') as f:
+            f.write(' { }')
+        self.assertNotEqual(self.get_version(), version)
+
+    def test_changes_with_imports(self):
+        with open(os.path.join(self.tmp_dir, 'a.css'), 'wb') as f:
+            f.write('@import "partial.css";\n.a { }')
+        with open(os.path.join(self.tmp_dir, 'partial.css'), 'wb') as f:
+            f.write('.partial { }')
+        version = self.get_version(files=('a.css', 'b.css'))
+
+        with open(os.path.join(self.tmp_dir, 'partial.css'), 'wb') as f:
+            f.write('.partial { color: red; }')
+        self.assertNotEqual(self.get_version(files=('a.css', 'b.css')), version)
+
+    def test_uncacheable_processors(self):
+        self.assertEqual(self.get_version(processors=('django_bundles.processors.django_template.DjangoTemplateProcessor',)), None)
@@ -0,0 +1,59 @@
+from django.test import TestCase
+
+
+from django_bundles.utils.lint_cache import LintCache
+
+
+import os
+import shutil
+import tempfile
+
+
+class LintCacheTest(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache_path = os.path.join(self.tmp_dir, 'bundles.lint')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_key(self):
+        lint_cache = LintCache(self.cache_path)
+        key = lint_cache.get_key('jshint {infile}', '/a.js', 'var a;')
+
+        self.assertEqual(key, lint_cache.get_key('jshint {infile}', '/a.js', 'var a;'))
+        self.assertNotEqual(key, lint_cache.get_key('jshint {infile}', '/a.js', 'var b;'))
+        self.assertNotEqual(key, lint_cache.get_key('jslint {infile}', '/a.js', 'var a;'))
+        self.assertNotEqual(key, lint_cache.get_key('jshint {infile}', '/b.js', 'var a;'))
+
+    def test_persists(self):
+        lint_cache = LintCache(self.cache_path)
+        self.assertEqual(lint_cache.get('pass'), None)
+        lint_cache.set('pass', True, '')
+        lint_cache.set('fail', False, 'Missing semicolon \xe2\x80\x94 line 1\n')
+        lint_cache.save()
+
+        lint_cache = LintCache(self.cache_path)
+        self.assertEqual(lint_cache.get('pass'), (True, ''))
+        self.assertEqual(lint_cache.get('fail'), (False, 'Missing semicolon \xe2\x80\x94 line 1\n'))
+        self.assertEqual(lint_cache.get('other'), None)
+        self.assertEqual(lint_cache.get_stats(), {'hits': 2, 'misses': 1, 'hit_rate': 2 / 3.0})
+
+    def test_prune(self):
+        lint_cache = LintCache(self.cache_path)
+        lint_cache.set('old', True, '')
+        lint_cache.save()
+
+        lint_cache = LintCache(self.cache_path)
+        lint_cache.set('new', True, '')
+        lint_cache.save(prune=False)
+        self.assertEqual(sorted(LintCache(self.cache_path).results), ['new', 'old'])
+
+        lint_cache.save()
+        self.assertEqual(sorted(LintCache(self.cache_path).results), ['new'])
+
+    def test_corrupt_file(self):
+        with open(self.cache_path, 'wb') as f:
+            f.write('{not json')
+
+        self.assertEqual(LintCache(self.cache_path).results, {})
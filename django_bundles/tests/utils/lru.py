@@ -0,0 +1,43 @@
+from django.test import TestCase
+
+
+from django_bundles.utils.lru import LRUCache
+
+
+class LRUCacheTest(TestCase):
+    def test_get_and_set(self):
+        cache = LRUCache(100)
+        cache.set('a', 'AAA')
+
+        self.assertEqual(cache.get('a'), 'AAA')
+        self.assertEqual(cache.get('b'), None)
+        self.assertEqual(cache.size, 3)
+
+    def test_eviction(self):
+        cache = LRUCache(6)
+        cache.set('a', 'AAA')
+        cache.set('b', 'BBB')
+        cache.get('a')
+        cache.set('c', 'CCC')
+
+        self.assertTrue('a' in cache)
+        self.assertFalse('b' in cache)
+        self.assertTrue('c' in cache)
+        self.assertEqual(cache.size, 6)
+        self.assertEqual(cache.evictions, 1)
+
+    def test_too_large(self):
+        cache = LRUCache(6)
+        cache.set('a', 'AAA')
+        cache.set('b', 'B' * 10)
+
+        self.assertTrue('a' in cache)
+        self.assertFalse('b' in cache)
+
+    def test_replace(self):
+        cache = LRUCache(100)
+        cache.set('a', 'AAA')
+        cache.set('a', 'A')
+
+        self.assertEqual(cache.get('a'), 'A')
+        self.assertEqual(cache.size, 1)
@@ -1,10 +1,15 @@
 from django.test import TestCase
 
 
-from django_bundles.utils.processes import run_process
+from django_bundles.utils.processes import run_process, run_pipeline
 
 
+from subprocess import CalledProcessError
 import collections
+import os
+import shutil
+import tempfile
+import time
 
 
 class RunProcessTest(TestCase):
@@ -36,3 +41,96 @@ class RunProcessTest(TestCase):
         with open(__file__, 'r') as f:
             collections.deque(run_process('cat', stdin='TEST', iterate_stdin=False, to_close=f), maxlen=0)
             self.assertTrue(f.closed)
+
+
+    def test_large_input(self):
+        stdin = 'x' * (5 * 1024 * 1024)
+        output = ''.join(run_process('cat', stdin=(stdin[i:i + 1000] for i in xrange(0, len(stdin), 1000))))
+
+        self.assertEqual(output, stdin)
+
+
+    def test_no_stdin(self):
+        output = ''.join(run_process('cat'))
+
+        self.assertEqual(output, '')
+
+
+    def test_failure(self):
+        try:
+            collections.deque(run_process('echo "ERROR"; exit 2'), maxlen=0)
+        except CalledProcessError as e:
+            self.assertEqual(e.returncode, 2)
+            self.assertEqual(e.output, 'ERROR\n')
+        else:
+            self.fail('CalledProcessError not raised')
+
+
+class RunPipelineTest(TestCase):
+
+    def test_pipeline(self):
+        stdin = "TEST1\nTEST2\nTEST1"
+
+        output = ''.join(run_pipeline([('cat', None), ('grep "TEST1"', None), ('tr T t', None)], stdin=stdin, iterate_stdin=False))
+
+        self.assertEqual(output, "tESt1\ntESt1\n")
+
+
+    def test_pipeline_failure(self):
+        try:
+            collections.deque(run_pipeline([('cat', None), ('exit 3', None), ('cat', None)], stdin='TEST', iterate_stdin=False), maxlen=0)
+        except CalledProcessError as e:
+            self.assertEqual(e.returncode, 3)
+            self.assertEqual(e.cmd, 'exit 3')
+        else:
+            self.fail('CalledProcessError not raised')
+
+
+    def test_large_pipeline(self):
+        stdin = 'x' * (5 * 1024 * 1024)
+        output = ''.join(run_pipeline([('cat', None), ('cat', None)], stdin=[stdin]))
+
+        self.assertEqual(output, stdin)
+
+
+class FifoTest(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.input_fifo = os.path.join(self.tmp_dir, 'in')
+        self.output_fifo = os.path.join(self.tmp_dir, 'out')
+        os.mkfifo(self.input_fifo)
+        os.mkfifo(self.output_fifo)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_input_and_output(self):
+        data = 'x' * (1024 * 1024)
+        output = ''.join(run_process('echo stdout; tr x y < %s > %s' % (self.input_fifo, self.output_fifo), stdin=iter([data, 'END']), input_fifo=self.input_fifo, output_fifo=self.output_fifo))
+        self.assertEqual(output, 'y' * len(data) + 'END')
+
+    def test_empty_input(self):
+        self.assertEqual(''.join(run_process('cat %s' % self.input_fifo, input_fifo=self.input_fifo)), '')
+
+    def test_streams_output(self):
+        start = time.time()
+        output = run_process('echo first > %s; sleep 0.5' % self.output_fifo, output_fifo=self.output_fifo)
+        self.assertEqual(output.next(), 'first\n')
+        self.assertTrue(time.time() - start < 0.5)
+        self.assertEqual(list(output), [])
+
+    def test_failure(self):
+        # The process fails without opening either pipe
+        with self.assertRaises(CalledProcessError) as cm:
+            ''.join(run_process('echo failed; exit 3', stdin=iter(['abc']), input_fifo=self.input_fifo, output_fifo=self.output_fifo))
+        self.assertEqual(cm.exception.output, 'failed\n')
+
+    def test_stopped_early(self):
+        output = run_process('yes > %s' % self.output_fifo, output_fifo=self.output_fifo)
+        self.assertTrue(output.next())
+        output.close()
+
+        output = run_process('sleep 10; cat > %s' % self.output_fifo, output_fifo=self.output_fifo)
+        start = time.time()
+        output.close()
+        self.assertTrue(time.time() - start < 1)
@@ -0,0 +1,100 @@
+from django.test import TestCase
+
+
+from django_bundles.processors import ExecutableProcessor, processor_pipeline
+from django_bundles.processors.base import Processor
+from django_bundles.utils.files import FileChunkGenerator
+from django_bundles.utils.profiling import InstrumentedOutput, ProcessorProfile, ProcessorStats, add_processor_listener, remove_processor_listener
+
+
+import os
+import time
+
+
+TEST_FILES_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'files')
+
+
+class SlowProcessor(Processor):
+    def process(self, iter_input):
+        for chunk in iter_input:
+            time.sleep(0.05)
+            yield chunk.upper()
+
+
+class ProcessorListenerTest(TestCase):
+    def setUp(self):
+        self.stats = []
+        add_processor_listener(self.stats.append)
+
+    def tearDown(self):
+        remove_processor_listener(self.stats.append)
+
+    def test_not_instrumented_without_listeners(self):
+        remove_processor_listener(self.stats.append)
+        output = processor_pipeline([SlowProcessor()], iter(['a']))
+        self.assertFalse(isinstance(output, InstrumentedOutput))
+        self.assertEqual(''.join(output), 'A')
+        self.assertEqual(self.stats, [])
+
+    def test_stats(self):
+        processors = [SlowProcessor(), ExecutableProcessor(command='cat {infile}')]
+        output = processor_pipeline(processors, iter(['abc', 'de']), bundle='test_bundle')
+
+        self.assertEqual(''.join(output), 'ABCDE')
+        self.assertEqual([stats.processor for stats in self.stats], processors)
+
+        slow, cat = self.stats
+        self.assertEqual(slow.name, 'SlowProcessor')
+        self.assertEqual(slow.bundle, 'test_bundle')
+        self.assertEqual(slow.file_path, None)
+        self.assertEqual((slow.bytes_in, slow.chunks_in, slow.bytes_out, slow.chunks_out, slow.spawns), (5, 2, 5, 2, 0))
+        self.assertTrue(slow.self_time >= 0.1)
+        self.assertTrue(slow.first_chunk_time >= 0.05)
+
+        self.assertEqual(cat.name, 'cat {infile}')
+        self.assertEqual((cat.bytes_in, cat.bytes_out, cat.spawns), (5, 5, 1))
+        # Waiting for SlowProcessor's output isn't counted against cat
+        self.assertTrue(cat.self_time < 0.1)
+        self.assertTrue(cat.wall_time >= slow.self_time)
+
+    def test_file_input(self):
+        file_path = os.path.join(TEST_FILES_PATH, 'test1.css')
+        output = processor_pipeline([ExecutableProcessor(command='cat {infile}'), ExecutableProcessor(command='cat'), ExecutableProcessor(command='cat')], FileChunkGenerator(open(file_path, 'rb')))
+
+        # The file is still passed by path
+        self.assertEqual(''.join(output), open(file_path, 'rb').read())
+
+        self.assertEqual([(stats.name, stats.spawns) for stats in self.stats], [('cat {infile}', 1), ('cat | cat', 2)])
+        self.assertEqual(self.stats[0].file_path, file_path)
+        self.assertEqual(self.stats[0].bytes_in, os.path.getsize(file_path))
+
+    def test_called_once_consumed(self):
+        output = processor_pipeline([SlowProcessor()], iter(['a', 'b']))
+        output.next()
+        self.assertEqual(self.stats, [])
+        list(output)
+        self.assertEqual(len(self.stats), 1)
+
+
+class ProcessorProfileTest(TestCase):
+    def make_stats(self, processor, file_path, self_time, bytes_out=0):
+        stats = ProcessorStats(processor, 'test_bundle', file_path)
+        stats.self_time = stats.wall_time = self_time
+        stats.bytes_out = bytes_out
+        return stats
+
+    def test_totals(self):
+        cat, slow = ExecutableProcessor(command='cat'), SlowProcessor()
+        profile = ProcessorProfile()
+        profile.add(self.make_stats(cat, '/a.css', 0.1, 10))
+        profile.add(self.make_stats(slow, '/a.css', 0.5))
+        profile.add(self.make_stats(cat, '/b.css', 0.2, 20))
+        profile.add(self.make_stats(cat, None, 0.3))
+
+        self.assertEqual([(total['file_path'], total['processors']) for total in profile.get_slowest_files()], [('/a.css', 2), (None, 1), ('/b.css', 1)])
+
+        processors = profile.get_slowest_processors()
+        self.assertEqual([(total['name'], total['runs']) for total in processors], [('cat', 3), ('SlowProcessor', 1)])
+        self.assertAlmostEqual(processors[0]['self_time'], 0.6)
+        self.assertEqual(processors[0]['bytes_out'], 30)
+        self.assertEqual(len(profile.get_slowest_processors(1)), 1)
@@ -0,0 +1,65 @@
+from django.test import TestCase
+
+
+from django_bundles.utils.tempfiles import TemporaryFilePool, get_temp_file_pool
+
+
+import os
+import shutil
+import stat
+import tempfile
+
+
+class TemporaryFilePoolTest(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.pool = TemporaryFilePool(self.tmp_dir)
+
+    def tearDown(self):
+        self.pool.clear()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_reused(self):
+        temp_file = self.pool.get_file()
+        self.assertEqual(os.path.dirname(temp_file.name), self.tmp_dir)
+        temp_file.write('test')
+        temp_file.flush()
+        name = temp_file.name
+        temp_file.close()
+
+        # Emptied when it's returned
+        self.assertEqual(os.path.getsize(name), 0)
+
+        temp_file = self.pool.get_file()
+        self.assertEqual(temp_file.name, name)
+        self.assertEqual(temp_file.read(), '')
+        self.assertEqual((self.pool.created, self.pool.reused), (1, 1))
+
+        # In use
+        other_file = self.pool.get_file()
+        self.assertNotEqual(other_file.name, name)
+        other_file.close()
+        temp_file.close()
+
+    def test_suffix(self):
+        self.pool.get_file().close()
+        temp_file = self.pool.get_file(suffix='.js')
+        self.assertTrue(temp_file.name.endswith('.js'))
+        self.assertEqual(self.pool.reused, 0)
+        temp_file.close()
+
+    def test_fifos(self):
+        fifo = self.pool.get_fifo()
+        self.assertTrue(stat.S_ISFIFO(os.stat(fifo).st_mode))
+        self.assertNotEqual(self.pool.get_fifo(), fifo)
+        self.pool.release_fifo(fifo)
+        self.assertEqual(self.pool.get_fifo(), fifo)
+        self.pool.release_fifo(fifo)
+        self.pool.clear()
+        self.assertFalse(os.path.exists(fifo))
+
+    def test_temp_dir_setting(self):
+        with self.settings(BUNDLES_TEMP_DIR=self.tmp_dir):
+            pool = get_temp_file_pool()
+            self.assertEqual(pool.dir, self.tmp_dir)
+            self.assertTrue(get_temp_file_pool() is pool)
@@ -0,0 +1,76 @@
+from django.test import TestCase
+
+
+from django_bundles import core
+from django_bundles.core import get_bundle_versions
+from django_bundles.utils.versions import read_bundle_versions, write_bundle_versions
+
+
+import os
+import shutil
+import tempfile
+
+
+class BundleVersionsFileTest(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.versions = {'master_css': 'abc', 'master_js': 'def'}
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_python_format(self):
+        path = os.path.join(self.tmp_dir, 'bundles_versions.py')
+        write_bundle_versions(path, self.versions)
+
+        locs = {}
+        execfile(path, locs)
+        self.assertEqual(locs['BUNDLES_VERSIONS'], self.versions)
+        self.assertEqual(read_bundle_versions(path), self.versions)
+
+    def test_json_format(self):
+        path = os.path.join(self.tmp_dir, 'bundles_versions.json')
+        write_bundle_versions(path, self.versions)
+
+        self.assertTrue(open(path).read().startswith('{'))
+        self.assertEqual(read_bundle_versions(path), self.versions)
+        self.assertEqual(os.listdir(self.tmp_dir), ['bundles_versions.json'])
+
+
+class GetBundleVersionsTest(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, 'bundles_versions.json')
+        write_bundle_versions(self.path, {'master_css': 'v1'})
+        self.state = core._cached_versions, core._versions_pinned
+        core._cached_versions, core._versions_pinned = None, False
+
+    def tearDown(self):
+        core._cached_versions, core._versions_pinned = self.state
+        shutil.rmtree(self.tmp_dir)
+
+    def deploy(self, version):
+        write_bundle_versions(self.path, {'master_css': version})
+        # Make sure the stat changes even within the file system's timestamp resolution
+        os.utime(self.path, (0, 0))
+
+    def test_loaded_once_without_interval(self):
+        with self.settings(BUNDLES_VERSION_FILE=self.path, BUNDLES_VERSION_FILE_CHECK_INTERVAL=None):
+            self.assertEqual(get_bundle_versions(), {'master_css': 'v1'})
+            self.deploy('v2')
+            self.assertEqual(get_bundle_versions(), {'master_css': 'v1'})
+
+    def test_reloaded_when_changed(self):
+        with self.settings(BUNDLES_VERSION_FILE=self.path, BUNDLES_VERSION_FILE_CHECK_INTERVAL=0):
+            versions = get_bundle_versions()
+            self.assertEqual(versions, {'master_css': 'v1'})
+            self.assertTrue(get_bundle_versions() is versions)
+
+            self.deploy('v2')
+            self.assertEqual(get_bundle_versions(), {'master_css': 'v2'})
+
+    def test_not_reloaded_during_build(self):
+        with self.settings(BUNDLES_VERSION_FILE=self.path, BUNDLES_VERSION_FILE_CHECK_INTERVAL=0):
+            core.set_bundle_versions({'master_css': 'building'})
+            self.deploy('v2')
+            self.assertEqual(get_bundle_versions(), {'master_css': 'building'})
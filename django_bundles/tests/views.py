@@ -0,0 +1,187 @@
+from django.test import TestCase
+from django.test.client import RequestFactory
+from django.test.utils import override_settings
+
+
+from django_bundles import views
+from django_bundles.core import BundleFile
+from django_bundles.processors.base import Processor
+from django_bundles.views import DevFileCache
+
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+
+class SlowUpperProcessor(Processor):
+    calls = 0
+
+    def process(self, iter_input):
+        SlowUpperProcessor.calls += 1
+        time.sleep(0.05)
+        yield ''.join(iter_input).upper()
+
+
+class FailingProcessor(Processor):
+    def process(self, iter_input):
+        raise ValueError('Failed')
+
+
+class BundleFilesTestCase(TestCase):
+    def setUp(self):
+        SlowUpperProcessor.calls = 0
+        self.tmp_dir = tempfile.mkdtemp()
+        self.bundle_files = {}
+        for filename in ('a.css', 'b.css'):
+            with open(os.path.join(self.tmp_dir, filename), 'wb') as f:
+                f.write('body { }\n' * 10)
+            self.bundle_files[self.path(filename)] = BundleFile(filename, self.tmp_dir, '/media/', None, 'css', False, extra={'processors': ('django_bundles.tests.views.SlowUpperProcessor',)})
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def path(self, filename):
+        return os.path.realpath(os.path.join(self.tmp_dir, filename))
+
+
+class DevFileCacheTest(BundleFilesTestCase):
+    def test_cached(self):
+        cache = DevFileCache(bundle_files=self.bundle_files)
+
+        self.assertEqual(cache.get(self.path('a.css'))['contents'], 'BODY { }\n' * 10)
+        self.assertEqual(cache.get(self.path('a.css'))['mimetype'], 'text/css')
+        self.assertEqual(SlowUpperProcessor.calls, 1)
+        self.assertEqual(cache.get(self.path('missing.css')), None)
+
+    def test_regenerated_when_file_changes(self):
+        cache = DevFileCache(bundle_files=self.bundle_files)
+        etag = cache.get(self.path('a.css'))['etag']
+
+        with open(self.path('a.css'), 'wb') as f:
+            f.write('p { }\n')
+        os.utime(self.path('a.css'), (1, 1))
+
+        cached = cache.get(self.path('a.css'))
+        self.assertEqual(cached['contents'], 'P { }\n')
+        self.assertNotEqual(cached['etag'], etag)
+        self.assertEqual(SlowUpperProcessor.calls, 2)
+
+    def test_regenerated_when_import_changes(self):
+        with open(self.path('a.css'), 'wb') as f:
+            f.write('@import "partial.css";\n')
+        with open(self.path('partial.css'), 'wb') as f:
+            f.write('p { }\n')
+
+        cache = DevFileCache(bundle_files=self.bundle_files)
+        cache.get(self.path('a.css'))
+        cache.get(self.path('a.css'))
+        self.assertEqual(SlowUpperProcessor.calls, 1)
+
+        with open(self.path('partial.css'), 'wb') as f:
+            f.write('p { margin: 0; }\n')
+        os.utime(self.path('partial.css'), (2000000000, 2000000000))
+
+        self.assertEqual(cache.get(self.path('a.css'))['last_modified'], 2000000000)
+        self.assertEqual(SlowUpperProcessor.calls, 2)
+
+    def test_max_size(self):
+        cache = DevFileCache(max_size=150, bundle_files=self.bundle_files)
+
+        cache.get(self.path('a.css'))
+        cache.get(self.path('b.css'))
+        cache.get(self.path('a.css'))
+
+        self.assertEqual(len(cache.files), 1)
+        self.assertEqual(SlowUpperProcessor.calls, 3)
+
+    def test_single_flight(self):
+        cache = DevFileCache(bundle_files=self.bundle_files)
+
+        threads = [threading.Thread(target=cache.get, args=(self.path('a.css'),)) for _ in xrange(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(SlowUpperProcessor.calls, 1)
+        self.assertEqual(cache.generated, 1)
+
+    def test_stream(self):
+        cache = DevFileCache(bundle_files=self.bundle_files)
+
+        cached, generating = cache.stream(self.path('a.css'))
+        self.assertEqual(cached, None)
+        self.assertEqual(''.join(generating), 'BODY { }\n' * 10)
+
+        cached, generating = cache.stream(self.path('a.css'))
+        self.assertEqual(cached['contents'], 'BODY { }\n' * 10)
+        self.assertEqual(generating, None)
+
+    def test_cached_without_being_read(self):
+        cache = DevFileCache(bundle_files=self.bundle_files)
+        cached, generating = cache.stream(self.path('a.css'))
+
+        # A request for it isn't held up by the one generating it never reading it (e.g. a stalled client)
+        result = {}
+        thread = threading.Thread(target=lambda: result.update(cached=cache.get(self.path('a.css'))))
+        thread.daemon = True
+        thread.start()
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(result['cached']['contents'], 'BODY { }\n' * 10)
+        self.assertEqual(SlowUpperProcessor.calls, 1)
+
+        self.assertEqual(''.join(generating), 'BODY { }\n' * 10)
+
+    def test_error(self):
+        self.bundle_files[self.path('a.css')] = BundleFile('a.css', self.tmp_dir, '/media/', None, 'css', False, extra={'processors': ('django_bundles.tests.views.FailingProcessor',)})
+        cache = DevFileCache(bundle_files=self.bundle_files)
+
+        cached, generating = cache.stream(self.path('a.css'))
+        self.assertRaises(ValueError, list, generating)
+
+        # Nothing cached, so the next request tries again
+        cached, generating = cache.stream(self.path('a.css'))
+        self.assertEqual(cached, None)
+        self.assertRaises(ValueError, list, generating)
+
+
+@override_settings(USE_BUNDLES=False)
+class ServeTest(BundleFilesTestCase):
+    def setUp(self):
+        super(ServeTest, self).setUp()
+        views._dev_file_cache = DevFileCache(bundle_files=self.bundle_files)
+
+    def tearDown(self):
+        views._dev_file_cache = None
+        super(ServeTest, self).tearDown()
+
+    def serve(self, **headers):
+        return views.serve(RequestFactory().get('/media/a.css', **headers), 'a.css', document_root=self.tmp_dir)
+
+    def test_serve(self):
+        response = self.serve()
+
+        self.assertTrue(response.streaming)
+        self.assertEqual(''.join(response.streaming_content), 'BODY { }\n' * 10)
+        self.assertTrue(response['Last-Modified'])
+
+        response = self.serve()
+
+        self.assertFalse(response.streaming)
+        self.assertEqual(response.content, 'BODY { }\n' * 10)
+        self.assertEqual(response['Content-Length'], '90')
+        self.assertTrue(response['ETag'])
+        self.assertTrue(response['Last-Modified'])
+
+    def test_not_modified(self):
+        ''.join(self.serve().streaming_content)
+        response = self.serve()
+
+        self.assertEqual(self.serve(HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        self.assertEqual(self.serve(HTTP_IF_NONE_MATCH='"other"').status_code, 200)
+        self.assertEqual(self.serve(HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 304)
+        self.assertEqual(SlowUpperProcessor.calls, 1)
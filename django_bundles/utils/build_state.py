@@ -0,0 +1,151 @@
+from django_bundles.conf.bundles_settings import bundles_settings
+from django_bundles.utils.compression import get_compressors
+from django_bundles.utils.dependencies import DependencyGraph
+
+import os
+import json
+from hashlib import md5
+
+
+class BuildState(object):
+    """
+    Persistent record of what went into each bundle the last time it was built - used by create_bundles to skip
+    bundles whose inputs haven't changed. Looks like:
+
+    {
+        'files': {
+            '/path/to/file.css': [mtime, size, content_digest],     # mtime and size avoid rehashing unchanged files
+        },
+        'bundles': {
+            'master_css': {
+                'fingerprint': '...',                               # hash of the bundle's inputs
+                'version': '...',                                   # hash version it was built with
+            },
+        },
+        'dependencies': {...},                                      # see DependencyGraph
+    }
+    """
+    def __init__(self, path):
+        self.path = path
+        self.files = {}
+        self.bundles = {}
+        dependencies = None
+
+        try:
+            with open(path, 'rb') as state_file:
+                state = json.load(state_file)
+            self.files = state.get('files', {})
+            self.bundles = state.get('bundles', {})
+            dependencies = state.get('dependencies')
+        except (IOError, ValueError):
+            pass
+
+        self.dependencies = DependencyGraph(dependencies)
+
+    def get_file_digest(self, file_path):
+        """
+        Returns the digest of a file's contents - only rereads the file if its mtime or size has changed
+        """
+        stat = os.stat(file_path)
+
+        previous = self.files.get(file_path)
+        if previous and previous[0] == stat.st_mtime and previous[1] == stat.st_size:
+            return str(previous[2])
+
+        m = md5()
+        with open(file_path, 'rb') as input_file:
+            for chunk in iter(lambda: input_file.read(65536), ''):
+                m.update(chunk)
+
+        self.files[file_path] = [stat.st_mtime, stat.st_size, m.hexdigest()]
+        return m.hexdigest()
+
+    def get_bundle_fingerprint(self, bundle):
+        """
+        Returns a hash of everything that goes into building a bundle, or None if the bundle can't be fingerprinted
+        (missing files or a processor whose output depends on more than its input)
+        """
+        processors = list(bundle.processors)
+        for bundle_file in bundle.files:
+            processors.extend(bundle_file.processors)
+
+        if not all(processor.cacheable for processor in processors):
+            return None
+
+        m = md5()
+        m.update(repr((
+            bundle.name,
+            bundle.bundle_type,
+            bundle.uglify_command,
+            bundle.source_map_file_root,
+            bundle.source_map_url_root,
+            bundle.source_map_files_url_root,
+            bundle.files_root,
+            [processor.get_fingerprint() for processor in bundle.processors],
+            bundles_settings.BUNDLES_VERSION_STRATEGY,
+            bundles_settings.BUNDLES_HASH_FUNCTION,
+        )))
+
+        try:
+            for bundle_file in bundle.files:
+                m.update(repr((
+                    bundle_file.file_path,
+                    bundle_file.file_type,
+                    [processor.get_fingerprint() for processor in bundle_file.processors],
+                    self.get_file_digest(bundle_file.file_path),
+                    self.dependencies.get_dependency_key(bundle_file.file_path, bundle_file.file_type),
+                )))
+        except OSError:
+            return None
+
+        return m.hexdigest()
+
+    def get_rebuild_reason(self, bundle, fingerprint, previous_version, fixed_version=None):
+        """
+        Returns why a bundle needs rebuilding, or None if the previous build can be reused
+        """
+        if fingerprint is None:
+            return 'cannot fingerprint inputs'
+
+        previous = self.bundles.get(bundle.name)
+        if not previous or not previous_version or previous.get('version') != previous_version:
+            return 'no previous build'
+
+        if previous.get('fingerprint') != fingerprint:
+            return 'inputs changed'
+
+        # A fixed (--dev) build is never reused for a hashed one or the other way around
+        if fixed_version != previous.get('fixed_version') or (fixed_version and fixed_version != previous_version):
+            return 'version changed'
+
+        if not os.path.exists(bundle.get_path(previous_version)):
+            return 'output missing'
+
+        if not all(os.path.exists(bundle.get_path(previous_version) + compressor_class.extension) for compressor_class, level in get_compressors()):
+            return 'compressed output missing'
+
+        return None
+
+    def set_bundle(self, bundle, fingerprint, hash_version, fixed_version=None):
+        if fingerprint is None:
+            self.bundles.pop(bundle.name, None)
+        else:
+            self.bundles[bundle.name] = {
+                'fingerprint': fingerprint,
+                'version': hash_version,
+            }
+            if fixed_version:
+                self.bundles[bundle.name]['fixed_version'] = fixed_version
+
+    def save(self):
+        """
+        Writes the state out via a temporary file so an interrupted build can't leave it half written
+        """
+        tmp_path = '%s.tmp' % self.path
+        with open(tmp_path, 'wb') as state_file:
+            json.dump({
+                'files': self.files,
+                'bundles': self.bundles,
+                'dependencies': self.dependencies.get_state(),
+            }, state_file)
+        os.rename(tmp_path, self.path)
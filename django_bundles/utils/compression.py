@@ -0,0 +1,170 @@
+"""
+Precompressed copies of bundles written next to them at build time (e.g. for nginx's gzip_static) - configured with
+settings.BUNDLES_COMPRESSION, e.g.
+
+BUNDLES_COMPRESSION = {
+    'gzip': 9,              # compression level
+    'brotli': 11,           # quality - only written if the brotli module is installed
+}
+"""
+from django.core.exceptions import ImproperlyConfigured
+
+from django_bundles.conf.bundles_settings import bundles_settings
+from django_bundles.utils.files import copy_file_contents, iter_file_buffers
+
+import os
+import zlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+# Compressors are given mapped files in pieces of this size, as strings
+COMPRESS_CHUNK_SIZE = 64 * 1024
+
+
+class GzipCompressor(object):
+    name = 'gzip'
+    extension = '.gz'
+
+    def __init__(self, level=9):
+        # 16 + MAX_WBITS writes a gzip header (without a file name or timestamp, so builds are reproducible)
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, chunk):
+        return self._compressor.compress(chunk)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+class BrotliCompressor(object):
+    name = 'brotli'
+    extension = '.br'
+
+    def __init__(self, level=11):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, chunk):
+        return self._compressor.process(chunk)
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+COMPRESSORS = {
+    'gzip': GzipCompressor,
+    'brotli': BrotliCompressor,
+}
+
+
+def get_compressors():
+    """
+    Returns a list of (compressor class, level) from settings.BUNDLES_COMPRESSION - brotli is left out if the module
+    isn't installed
+    """
+    compressors = []
+    for name, level in sorted(bundles_settings.BUNDLES_COMPRESSION.iteritems()):
+        if name not in COMPRESSORS:
+            raise ImproperlyConfigured("Unknown bundle compression: %s" % name)
+        if name == 'brotli' and brotli is None:
+            continue
+        compressors.append((COMPRESSORS[name], level))
+    return compressors
+
+
+def get_compressed_file_names(file_name):
+    """
+    All of the compressed copies a file could have, whether or not they're currently enabled
+    """
+    return [file_name + compressor_class.extension for compressor_class in COMPRESSORS.itervalues()]
+
+
+class CompressedFileWriter(object):
+    """
+    Writes a file and its compressed copies (file_name + '.gz' etc.) in a single pass
+    """
+    def __init__(self, file_name, compressors=None):
+        self.file_name = file_name
+        self.output_file = open(file_name, 'wb')
+        self.compressed = [
+            (compressor_class(level), open(file_name + compressor_class.extension, 'wb'))
+            for compressor_class, level in (get_compressors() if compressors is None else compressors)
+        ]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def write(self, chunk):
+        self.output_file.write(chunk)
+        for compressor, compressed_file in self.compressed:
+            compressed_file.write(compressor.compress(chunk))
+
+    def write_file(self, input_file, hash_object=None, map_files=True):
+        """
+        Appends the whole of input_file, updating hash_object with it - copied without reading it into Python when
+        there's nothing to hash or compress
+        """
+        if hash_object is None and not self.compressed:
+            copy_file_contents(input_file, self.output_file, map_files=map_files)
+            return
+
+        for buffer in iter_file_buffers(input_file, map_files=map_files):
+            if hash_object is not None:
+                hash_object.update(buffer)
+            self.output_file.write(buffer)
+            for compressor, compressed_file in self.compressed:
+                for i in xrange(0, len(buffer), COMPRESS_CHUNK_SIZE):
+                    compressed_file.write(compressor.compress(buffer[i:i + COMPRESS_CHUNK_SIZE]))
+
+    def close(self):
+        if self.output_file.closed:
+            return
+        self.output_file.close()
+        for compressor, compressed_file in self.compressed:
+            compressed_file.write(compressor.finish())
+            compressed_file.close()
+
+    def rename(self, file_name):
+        """
+        Moves the file and its compressed copies once they've been written
+        """
+        os.rename(self.file_name, file_name)
+        for compressor, compressed_file in self.compressed:
+            os.rename(self.file_name + compressor.extension, file_name + compressor.extension)
+        self.file_name = file_name
+
+
+def compress_file(file_name, compressors=None, chunk_size=64 * 1024):
+    """
+    Writes compressed copies of an existing file (e.g. one written by an external command)
+    """
+    compressors = get_compressors() if compressors is None else compressors
+
+    with open(file_name, 'rb') as input_file:
+        outputs = [(compressor_class(level), open(file_name + compressor_class.extension, 'wb')) for compressor_class, level in compressors]
+        try:
+            for chunk in iter(lambda: input_file.read(chunk_size), ''):
+                for compressor, compressed_file in outputs:
+                    compressed_file.write(compressor.compress(chunk))
+            for compressor, compressed_file in outputs:
+                compressed_file.write(compressor.finish())
+        finally:
+            for compressor, compressed_file in outputs:
+                compressed_file.close()
+
+
+def get_file_sizes(file_name):
+    """
+    Returns [(name, size)] for a file and whichever compressed copies of it exist
+    """
+    sizes = [('raw', os.path.getsize(file_name))]
+    for name, compressor_class in sorted(COMPRESSORS.iteritems(), reverse=True):
+        if os.path.exists(file_name + compressor_class.extension):
+            sizes.append((name, os.path.getsize(file_name + compressor_class.extension)))
+    return sizes
@@ -0,0 +1,119 @@
+import Queue
+import threading
+import time
+import traceback
+
+
+class DebouncedExecutor(object):
+    """
+    Runs work for a key (e.g. a file path) on a bounded pool of worker threads once its events have settled - each
+    submit for a key replaces any work still pending for it and restarts its delay, so a burst of events (an editor's
+    write, rename and chmod) runs once. Work for a key never runs concurrently: an event while it's running is run
+    again afterwards, and work that was waiting for a worker is cancelled if a newer event arrives.
+    """
+    def __init__(self, workers=4, delay=0.1, error_callback=None):
+        self.delay = delay
+        self.error_callback = error_callback
+        self.runs = 0
+        self.cancelled = 0
+
+        self._pending = {}          # key -> (due time, function, args)
+        self._running = set()       # keys queued for or running on a worker
+        self._generations = {}      # key -> number of submits, to spot superseded work
+        self._condition = threading.Condition()
+        self._queue = Queue.Queue()
+        self._stopped = False
+
+        self._threads = [threading.Thread(target=self._schedule)]
+        self._threads.extend(threading.Thread(target=self._work) for _ in xrange(workers))
+        for thread in self._threads:
+            thread.daemon = True
+            thread.start()
+
+    def submit(self, key, function, *args, **kwargs):
+        """
+        Runs function(*args) for key once no more work has been submitted for it for delay seconds (or the delay
+        keyword argument)
+        """
+        delay = kwargs.get('delay', self.delay)
+
+        with self._condition:
+            if key in self._pending:
+                self.cancelled += 1
+            self._generations[key] = self._generations.get(key, 0) + 1
+            self._pending[key] = (time.time() + delay, function, args)
+            self._condition.notify_all()
+
+    def wait(self, timeout=None):
+        """
+        Waits until there's no pending or running work - returns False if it timed out
+        """
+        end = None if timeout is None else time.time() + timeout
+        with self._condition:
+            while self._pending or self._running:
+                remaining = None if end is None else end - time.time()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+        return True
+
+    def stop(self):
+        """
+        Stops the workers once they've finished their current work - pending work is dropped
+        """
+        with self._condition:
+            self._stopped = True
+            self._pending.clear()
+            self._condition.notify_all()
+        for _ in self._threads[1:]:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+
+    def _schedule(self):
+        with self._condition:
+            while not self._stopped:
+                now = time.time()
+                next_due = None
+
+                for key, (due, function, args) in self._pending.items():
+                    if key in self._running:
+                        # Run again once the current run finishes
+                        continue
+                    if due <= now:
+                        del self._pending[key]
+                        self._running.add(key)
+                        self._queue.put((key, self._generations[key], function, args))
+                    elif next_due is None or due < next_due:
+                        next_due = due
+
+                self._condition.wait(None if next_due is None else next_due - now)
+
+    def _work(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+
+            key, generation, function, args = item
+            with self._condition:
+                # A newer event arrived while this was waiting for a worker - that one will run instead
+                superseded = self._generations[key] != generation and key in self._pending
+
+            if superseded:
+                with self._condition:
+                    self.cancelled += 1
+            else:
+                try:
+                    function(*args)
+                except Exception:
+                    if self.error_callback:
+                        self.error_callback(key, traceback.format_exc())
+                    else:
+                        traceback.print_exc()
+
+            with self._condition:
+                if not superseded:
+                    self.runs += 1
+                self._running.discard(key)
+                self._condition.notify_all()
@@ -0,0 +1,208 @@
+"""
+Dependencies between source files (e.g. the partials a .less file @imports) - so bundles, precompiled files and cached
+processor output are rebuilt when something a file imports changes. Dependencies are found by a scanner for each file
+type in settings.BUNDLES_DEPENDENCY_SCANNERS - a function (or dotted path to one) that takes a file's path and contents
+and returns the paths of the files it depends on.
+"""
+from django_bundles.conf.bundles_settings import bundles_settings
+from django_bundles.utils import get_class
+
+from hashlib import md5
+import os
+import re
+import threading
+
+
+COMMENTS_RE = re.compile(r'/\*.*?\*/', re.S)
+LINE_COMMENTS_RE = re.compile(r'^\s*//.*$', re.M)
+
+# @import "a";  @import url(a.css) screen;  @import (reference) 'a.less';
+IMPORT_RE = re.compile(r'''@import\s+(?:\([^)]*\)\s*)?(?:url\(\s*)?(['"]?)([^'"\s;)]+)\1\s*\)?[^;]*;''')
+
+
+def scan_css_imports(file_path, contents):
+    """
+    Returns the files a CSS or LessCSS file @imports - URLs (absolute or with a scheme) are skipped, and .less is
+    added to extensionless imports from .less files like lessc does
+    """
+    contents = COMMENTS_RE.sub('', contents)
+    is_less = file_path.endswith('.less')
+    if is_less:
+        contents = LINE_COMMENTS_RE.sub('', contents)
+
+    dependencies = []
+    for _, url in IMPORT_RE.findall(contents):
+        if url.startswith('/') or url.startswith('data:') or '://' in url:
+            continue
+        dependency = os.path.normpath(os.path.join(os.path.dirname(file_path), url))
+        if is_less and not os.path.splitext(url)[1]:
+            dependency += '.less'
+        dependencies.append(dependency)
+
+    return dependencies
+
+
+def get_dependency_scanners():
+    """
+    Returns a dict of file type to scanner function from settings.BUNDLES_DEPENDENCY_SCANNERS
+    """
+    scanners = {}
+    for file_type, scanner in bundles_settings.BUNDLES_DEPENDENCY_SCANNERS.iteritems():
+        scanners[file_type] = get_class(scanner) if isinstance(scanner, basestring) else scanner
+    return scanners
+
+
+class DependencyGraph(object):
+    """
+    Each file's direct dependencies (rescanned only when its mtime or size changes) and a reverse index from each
+    dependency to the source files (e.g. BundleFiles) that import it, directly or not. The scanned files can be saved
+    with get_state and passed back in as state:
+
+    {
+        '/path/to/master.less': [mtime, size, digest, ['/path/to/variables.less']],
+    }
+    """
+    def __init__(self, state=None, scanners=None):
+        self.scanners = get_dependency_scanners() if scanners is None else scanners
+        # Byte strings, like freshly scanned paths and digests (state loaded from JSON is unicode)
+        self.files = dict(
+            (file_path.encode('utf-8'), [mtime, size, str(digest), [dependency.encode('utf-8') for dependency in dependencies]])
+            for file_path, (mtime, size, digest, dependencies) in (state or {}).iteritems()
+        )
+        self.scans = 0
+        self._sources = {}          # source file path -> (file type, its dependencies)
+        self._dependents = {}       # dependency path -> set of source file paths
+        self._lock = threading.RLock()
+
+    def _get_entry(self, file_path, file_type=None):
+        """
+        Returns [mtime, size, digest, direct dependencies] for a file, or None if it doesn't exist
+        """
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            self.files.pop(file_path, None)
+            return None
+
+        entry = self.files.get(file_path)
+        if entry and entry[0] == stat.st_mtime and entry[1] == stat.st_size:
+            return entry
+
+        with open(file_path, 'rb') as input_file:
+            contents = input_file.read()
+
+        scanner = self.scanners.get(file_type or os.path.splitext(file_path)[1][1:])
+        dependencies = scanner(file_path, contents) if scanner else []
+        self.scans += 1
+
+        entry = self.files[file_path] = [stat.st_mtime, stat.st_size, md5(contents).hexdigest(), dependencies]
+        return entry
+
+    def get_dependencies(self, file_path, file_type=None):
+        """
+        Returns a sorted list of everything a file depends on, directly or not
+        """
+        with self._lock:
+            dependencies = set()
+            entry = self._get_entry(file_path, file_type)
+            to_scan = list(entry[3]) if entry else []
+
+            while to_scan:
+                dependency = to_scan.pop()
+                if dependency in dependencies or dependency == file_path:
+                    continue
+                dependencies.add(dependency)
+                entry = self._get_entry(dependency)
+                if entry:
+                    to_scan.extend(entry[3])
+
+            return sorted(dependencies)
+
+    def get_dependency_digests(self, file_path, file_type=None):
+        """
+        Returns a sorted list of (path, digest of its contents) for everything a file depends on - the digest is None
+        for missing files, as they may be found elsewhere (e.g. on lessc's include path)
+        """
+        with self._lock:
+            digests = []
+            for dependency in self.get_dependencies(file_path, file_type):
+                entry = self._get_entry(dependency)
+                digests.append((dependency, entry[2] if entry else None))
+            return digests
+
+    def get_dependency_key(self, file_path, file_type=None):
+        """
+        Returns a digest of the contents of everything a file depends on, or '' if it has no dependencies
+        """
+        digests = self.get_dependency_digests(file_path, file_type)
+        return md5(repr(digests)).hexdigest() if digests else ''
+
+    def add_file(self, file_path, file_type=None):
+        """
+        Adds (or refreshes) a source file in the reverse index
+        """
+        with self._lock:
+            if file_path in self._sources:
+                previous_type, previous_dependencies = self._sources[file_path]
+                file_type = file_type or previous_type
+                for dependency in previous_dependencies:
+                    self._dependents[dependency].discard(file_path)
+
+            dependencies = self.get_dependencies(file_path, file_type)
+            self._sources[file_path] = file_type, dependencies
+            for dependency in dependencies:
+                self._dependents.setdefault(dependency, set()).add(file_path)
+
+    def add_bundles(self, bundles):
+        for bundle in bundles:
+            for bundle_file in bundle.files:
+                self.add_file(bundle_file.file_path, bundle_file.file_type)
+
+    def get_dependents(self, file_path):
+        """
+        Returns a sorted list of the source files that depend on a file
+        """
+        with self._lock:
+            return sorted(self._dependents.get(file_path, ()))
+
+    def get_dependency_paths(self):
+        """
+        Returns a sorted list of every file the source files depend on
+        """
+        with self._lock:
+            return sorted(dependency for dependency, dependents in self._dependents.iteritems() if dependents)
+
+    def update(self, file_path):
+        """
+        Call when a file changes - refreshes the index for the source files it affects and returns them (including
+        the file itself if it's a source file)
+        """
+        with self._lock:
+            affected = set(self._dependents.get(file_path, ()))
+            if file_path in self._sources:
+                affected.add(file_path)
+
+            for source in affected:
+                self.add_file(source)
+
+            return sorted(affected)
+
+    def get_state(self):
+        with self._lock:
+            return dict(self.files)
+
+
+_dependency_graph = None
+_dependency_graph_lock = threading.Lock()
+def get_dependency_graph():
+    """
+    Returns a DependencyGraph shared by everything in this process
+    """
+    global _dependency_graph
+
+    if _dependency_graph is None:
+        with _dependency_graph_lock:
+            if _dependency_graph is None:
+                _dependency_graph = DependencyGraph()
+
+    return _dependency_graph
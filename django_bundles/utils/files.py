@@ -1,24 +1,177 @@
+from django_bundles.conf.bundles_settings import bundles_settings
+
 import os
+import re
+import mmap
 import fnmatch
+import tempfile
+import threading
+
+try:
+    from os import scandir
+except ImportError:
+    try:
+        from scandir import scandir
+    except ImportError:
+        scandir = None
+
+try:
+    from os import sendfile
+except ImportError:
+    try:
+        # The pysendfile module
+        from sendfile import sendfile
+    except ImportError:
+        sendfile = None
+
+copy_file_range = getattr(os, 'copy_file_range', None)
+
+# Most bytes copy_file_range/sendfile are asked to copy at once
+KERNEL_COPY_SIZE = 1024 * 1024 * 1024
+
+
+WILDCARDS = '*?['
+
+
+def has_wildcards(path):
+    return any(wildcard in path for wildcard in WILDCARDS)
+
+
+def glob_to_regex(pattern):
+    """
+    Compiles a glob pattern matched against a whole relative path - * and ? don't match /, ** matches any number of
+    directories
+    """
+    regex = ''
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith('**/', i):
+            regex += '(?:.*/)?'
+            i += 3
+        elif pattern.startswith('**', i):
+            regex += '.*'
+            i += 2
+        elif pattern[i] == '*':
+            regex += '[^/]*'
+            i += 1
+        elif pattern[i] == '?':
+            regex += '[^/]'
+            i += 1
+        elif pattern[i] == '[' and ']' in pattern[i + 2:]:
+            end = pattern.index(']', i + 2)
+            regex += fnmatch.translate(pattern[i:end + 1])[:-len('\\Z(?ms)')]
+            i = end + 1
+        else:
+            regex += re.escape(pattern[i])
+            i += 1
+    return re.compile(regex + r'\Z')
 
 
-def expand_file_names(path, files_root):
+class DirectoryListingCache(object):
     """
-    Expands paths (e.g. css/*.css in files_root /actual/path/to/css/files/)
+    Sorted directory listings, so bundles globbing the same directories only list them once (get_bundles uses one
+    per load of the bundle definitions)
+    """
+    def __init__(self):
+        self.listings = 0
+        self._listings = {}
+        self._lock = threading.Lock()
+
+    def list_dir(self, path):
+        """
+        Returns (file names, directory names), both sorted - raises OSError if path isn't a directory
+        """
+        with self._lock:
+            listing = self._listings.get(path)
+        if listing is None:
+            listing = self._listings[path] = self._list_dir(path)
+            self.listings += 1
+        return listing
+
+    def _list_dir(self, path):
+        files, dirs = [], []
+
+        if scandir:
+            for entry in scandir(path):
+                (dirs if entry.is_dir() else files).append(entry.name)
+        else:
+            for name in os.listdir(path):
+                (dirs if os.path.isdir(os.path.join(path, name)) else files).append(name)
+
+        return sorted(files), sorted(dirs)
+
+
+def _match_segments(files_root, dir_path, segments, listing_cache, must_exist):
+    segment, rest = segments[0], segments[1:]
+
+    if segment == '**':
+        # Zero or more directories - or everything below here if it's the last segment
+        try:
+            file_names, dir_names = listing_cache.list_dir(os.path.join(files_root, dir_path))
+        except OSError:
+            # e.g. lib in **/lib/**, which a previous ** doesn't check the directories it tries have
+            if must_exist:
+                raise
+            return []
+        if rest:
+            matches = _match_segments(files_root, dir_path, rest, listing_cache, must_exist)
+        else:
+            matches = [os.path.join(dir_path, file_name) for file_name in file_names]
+        for dir_name in dir_names:
+            matches.extend(_match_segments(files_root, os.path.join(dir_path, dir_name), segments, listing_cache, False))
+        return matches
+
+    if not has_wildcards(segment) and rest:
+        return _match_segments(files_root, os.path.join(dir_path, segment), rest, listing_cache, must_exist)
+
+    try:
+        file_names, dir_names = listing_cache.list_dir(os.path.join(files_root, dir_path))
+    except OSError:
+        # Only directories named in the pattern have to exist, not ones a wildcard might have matched
+        if must_exist:
+            raise
+        return []
+
+    if rest:
+        matches = []
+        for dir_name in fnmatch.filter(dir_names, segment):
+            matches.extend(_match_segments(files_root, os.path.join(dir_path, dir_name), rest, listing_cache, False))
+        return matches
+
+    return [os.path.join(dir_path, file_name) for file_name in fnmatch.filter(file_names, segment)]
+
+
+def expand_file_names(path, files_root, exclude=None, listing_cache=None):
+    """
+    Expands paths (e.g. css/*.css or js/**/*.js in files_root /actual/path/to/css/files/) in sorted order, leaving out
+    any that match the exclude patterns
     """
     # For non-wildcards just return the path. This allows us to detect when
     # explicitly listed files are missing.
-    if not any(wildcard in path for wildcard in '*?['):
+    if not has_wildcards(path):
         return [path]
-    else:
-        dir_path, filename = os.path.split(path)
-        return [os.path.join(dir_path, f) for f in fnmatch.filter(os.listdir(os.path.join(files_root, dir_path)), filename)]
+
+    # ** followed by ** matches nothing more than a single **
+    segments = []
+    for segment in path.split('/'):
+        if segment != '**' or segments[-1:] != ['**']:
+            segments.append(segment)
+
+    listing_cache = listing_cache or DirectoryListingCache()
+    # The same file can still be matched more than once - e.g. lib/lib/x.js by **/lib/** with either lib
+    file_names = sorted(set(_match_segments(files_root, '', segments, listing_cache, True)))
+
+    if exclude:
+        exclude_regexes = [glob_to_regex(pattern) for pattern in exclude]
+        file_names = [file_name for file_name in file_names if not any(regex.match(file_name) for regex in exclude_regexes)]
+
+    return file_names
 
 
 class FileChunkGenerator(object):
-    def __init__(self, input_file, chunk_size=1024, close=True):
+    def __init__(self, input_file, chunk_size=None, close=True):
         self.input_file = input_file
-        self.chunk_size = chunk_size
+        self.chunk_size = chunk_size or bundles_settings.BUNDLES_FILE_CHUNK_SIZE
         self.close = close
         self.file_path = input_file.name
 
@@ -32,3 +185,84 @@ class FileChunkGenerator(object):
                 self.input_file.close()
             raise StopIteration
         return chunk
+
+
+def map_file(input_file):
+    """
+    Returns a read only mmap of a file, or None if it can't be mapped (e.g. it's empty or not a regular file)
+    """
+    try:
+        return mmap.mmap(input_file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (EnvironmentError, ValueError, mmap.error):
+        return None
+
+
+def iter_file_buffers(input_file, chunk_size=None, map_files=True):
+    """
+    Yields read only buffers of a file's contents without copying them into strings - an mmap of the whole file, or
+    reads into a single reused buffer if it can't be mapped. Each buffer is only valid until the next is requested.
+
+    Pass map_files=False for files that could be being edited - reading a mapped file that's truncated kills the
+    process with SIGBUS.
+    """
+    mapped = map_file(input_file) if map_files else None
+    if mapped is not None:
+        try:
+            yield mapped
+        finally:
+            mapped.close()
+        return
+
+    data = bytearray(chunk_size or bundles_settings.BUNDLES_FILE_CHUNK_SIZE)
+    view = memoryview(data)
+    while True:
+        size = input_file.readinto(data)
+        if not size:
+            break
+        yield view[:size]
+
+
+def copy_file_contents(input_file, output_file, map_files=True):
+    """
+    Appends the whole of input_file to output_file (both real files) - by the kernel with copy_file_range or sendfile
+    where they're available, so the data never passes through Python, otherwise via iter_file_buffers
+    """
+    if copy_file_range or sendfile:
+        output_file.flush()
+        input_fd, output_fd = input_file.fileno(), output_file.fileno()
+        offset = 0
+        try:
+            while True:
+                if copy_file_range:
+                    copied = copy_file_range(input_fd, output_fd, KERNEL_COPY_SIZE, offset)
+                else:
+                    copied = sendfile(output_fd, input_fd, offset, KERNEL_COPY_SIZE)
+                if not copied:
+                    break
+                offset += copied
+        except OSError:
+            # e.g. sendfile to a regular file before Linux 2.6.33 - it can still be copied if nothing has been yet
+            if offset:
+                raise
+        else:
+            # Catch the file object's position up with what was written to its descriptor
+            output_file.seek(0, os.SEEK_END)
+            return
+
+    for buffer in iter_file_buffers(input_file, map_files=map_files):
+        output_file.write(buffer)
+
+
+def write_file_atomically(path, contents):
+    """
+    Writes a file via a temporary file and rename so nothing ever reads it half written
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), prefix='.%s' % os.path.basename(path))
+    try:
+        with os.fdopen(fd, 'wb') as output_file:
+            output_file.write(contents)
+        os.chmod(tmp_path, 0644)
+        os.rename(tmp_path, path)
+    except:
+        os.remove(tmp_path)
+        raise
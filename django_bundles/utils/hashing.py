@@ -0,0 +1,81 @@
+"""
+Hash functions for bundle versions (settings.BUNDLES_HASH_FUNCTION) - any hashlib algorithm, blake2b/blake2s (from
+hashlib or the pyblake2 module, shortened to 128 bits) or xxhash (64 bit, if the xxhash module is installed)
+"""
+from django.core.exceptions import ImproperlyConfigured
+
+from django_bundles.conf.bundles_settings import bundles_settings
+from django_bundles.utils.dependencies import get_dependency_graph
+from django_bundles.utils.files import iter_file_buffers
+
+import hashlib
+import os
+
+
+def get_hash_function(name=None):
+    """
+    Returns a function that creates a new hash object (with update and hexdigest)
+    """
+    name = name or bundles_settings.BUNDLES_HASH_FUNCTION
+
+    if name == 'xxhash':
+        try:
+            import xxhash
+        except ImportError:
+            raise ImproperlyConfigured("BUNDLES_HASH_FUNCTION xxhash needs the xxhash module")
+        return xxhash.xxh64
+
+    if name in ('blake2b', 'blake2s'):
+        blake2 = getattr(hashlib, name, None)
+        if blake2 is None:
+            try:
+                import pyblake2
+            except ImportError:
+                raise ImproperlyConfigured("BUNDLES_HASH_FUNCTION %s needs Python 3.6+ or the pyblake2 module" % name)
+            blake2 = getattr(pyblake2, name)
+        return lambda: blake2(digest_size=16)
+
+    try:
+        hashlib.new(name)
+    except ValueError:
+        raise ImproperlyConfigured("Unknown BUNDLES_HASH_FUNCTION: %s" % name)
+    return lambda: hashlib.new(name)
+
+
+def get_bundle_input_version(bundle, hash_function=None, chunk_size=64 * 1024, map_files=True):
+    """
+    Returns a version for a bundle from its raw input files, the files they import and processor definitions, without
+    running any processors - or None if a processor's output depends on more than its input (e.g. DjangoTemplateProcessor)
+    """
+    processors = list(bundle.processors)
+    for bundle_file in bundle.files:
+        processors.extend(bundle_file.processors)
+
+    if not all(processor.cacheable for processor in processors):
+        return None
+
+    h = (hash_function or get_hash_function())()
+    h.update(repr((
+        bundle.bundle_type,
+        bundle.uglify_command,
+        [processor.get_fingerprint() for processor in bundle.processors],
+    )))
+
+    for bundle_file in bundle.files:
+        with open(bundle_file.file_path, 'rb') as input_file:
+            # The size keeps one file's bytes from running into the next
+            h.update(repr((
+                os.path.relpath(bundle_file.file_path, bundle.files_root),
+                bundle_file.file_type,
+                [processor.get_fingerprint() for processor in bundle_file.processors],
+                os.fstat(input_file.fileno()).st_size,
+            )))
+            for buffer in iter_file_buffers(input_file, chunk_size, map_files=map_files):
+                h.update(buffer)
+
+        dependency_digests = get_dependency_graph().get_dependency_digests(bundle_file.file_path, bundle_file.file_type)
+        if dependency_digests:
+            # Relative paths, so the version is the same wherever the files are checked out
+            h.update(repr([(os.path.relpath(dependency, bundle.files_root), digest) for dependency, digest in dependency_digests]))
+
+    return h.hexdigest()
@@ -0,0 +1,73 @@
+from django_bundles.utils.files import write_file_atomically
+
+from hashlib import sha1
+import json
+import threading
+
+
+class LintCache(object):
+    """
+    Persistent record of lint results used by lint_bundles to skip files that have already been linted. Results are
+    keyed by the lint command, the file path (linters can pick up config relative to it) and the preprocessed content:
+
+    {
+        'results': {
+            '...': [success, error_message],
+        },
+    }
+    """
+    def __init__(self, path):
+        self.path = path
+        self.results = {}
+        self.used = set()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        try:
+            with open(path, 'rb') as cache_file:
+                self.results = json.load(cache_file).get('results', {})
+        except (IOError, ValueError):
+            pass
+
+    def get_key(self, command, file_path, contents):
+        m = sha1()
+        m.update(repr((command, file_path)))
+        m.update('\0')
+        m.update(contents)
+        return m.hexdigest()
+
+    def get(self, key):
+        """
+        Returns (success, error_message) or None if the file hasn't been linted with this command and content
+        """
+        with self._lock:
+            self.used.add(key)
+            result = self.results.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return bool(result[0]), result[1].encode('utf-8')
+
+    def set(self, key, success, error_message):
+        with self._lock:
+            self.used.add(key)
+            self.results[key] = [success, error_message.decode('utf-8', 'replace')]
+
+    def get_stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': float(self.hits) / total if total else 0.0,
+        }
+
+    def save(self, prune=True):
+        """
+        Writes the cache out atomically - prune drops results for anything not looked up in this run (deleted files
+        and old contents)
+        """
+        with self._lock:
+            results = dict((key, self.results[key]) for key in self.used if key in self.results) if prune else self.results
+        write_file_atomically(self.path, json.dumps({'results': results}, separators=(',', ':')))
@@ -0,0 +1,64 @@
+from collections import OrderedDict
+import threading
+
+
+class LRUCache(object):
+    """
+    Dictionary-like cache limited to max_size bytes (as measured by get_size) - the least recently used items are
+    evicted first
+    """
+    def __init__(self, max_size, get_size=len):
+        self.max_size = max_size
+        self.get_size = get_size
+        self.size = 0
+        self.evictions = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def __len__(self):
+        return len(self._items)
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._items.pop(key)
+            except KeyError:
+                return default
+            # Re-insert to mark as most recently used
+            self._items[key] = value
+            return value
+
+    def set(self, key, value):
+        size = self.get_size(value)
+
+        with self._lock:
+            if key in self._items:
+                self.size -= self.get_size(self._items.pop(key))
+
+            # Don't let one huge item clear out the whole cache
+            if self.max_size is not None and size > self.max_size:
+                return
+
+            self._items[key] = value
+            self.size += size
+
+            while self.max_size is not None and self.size > self.max_size:
+                _, evicted = self._items.popitem(last=False)
+                self.size -= self.get_size(evicted)
+                self.evictions += 1
+
+    def pop(self, key, default=None):
+        with self._lock:
+            if key not in self._items:
+                return default
+            value = self._items.pop(key)
+            self.size -= self.get_size(value)
+            return value
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.size = 0
@@ -1,86 +1,171 @@
+from django_bundles.utils.profiling import record_spawn
+
 import subprocess
 import errno
+import fcntl
 import select
 import os
 
 
-_PIPE_BUF = getattr(select, 'PIPE_BUF', 512)
+DEFAULT_CHUNK_SIZE = 64 * 1024
 
 
-def run_process(cmd, stdin=None, iterate_stdin=True, output_chunk_size=1024, shell=True, to_close=None, cwd=None):
+def run_process(cmd, stdin=None, iterate_stdin=True, output_chunk_size=DEFAULT_CHUNK_SIZE, shell=True, to_close=None, cwd=None, error_output_size=DEFAULT_CHUNK_SIZE, input_fifo=None, output_fifo=None):
     """
     This is a modification of subprocess.Popen.communicate that accepts an iterable stdin and is itself a generator for stdout
     """
+    return run_pipeline([(cmd, cwd)], stdin=stdin, iterate_stdin=iterate_stdin, output_chunk_size=output_chunk_size, shell=shell, to_close=to_close, error_output_size=error_output_size, input_fifo=input_fifo, output_fifo=output_fifo)
+
+
+def run_pipeline(cmds, stdin=None, iterate_stdin=True, output_chunk_size=DEFAULT_CHUNK_SIZE, shell=True, to_close=None, error_output_size=DEFAULT_CHUNK_SIZE, input_fifo=None, output_fifo=None):
+    """
+    Like run_process, but for a list of (cmd, cwd) tuples whose stdouts and stdins are connected directly with OS pipes
+    (like a shell pipeline) - only the first stdin and the last stdout pass through Python.
+
+    For commands that take file names rather than using stdin/stdout, input_fifo and output_fifo are named pipes to
+    write stdin to and to read the output from (the last stdout is then treated like stderr).
+
+    If any of the processes fail a CalledProcessError is raised for the last one to fail, with the tail of the
+    combined stdout/stderr output as e.output
+    """
+    processes = []
+    stdin_pipe = fifo_output = None
+
     try:
-        p = subprocess.Popen(cmd, shell=shell, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE, cwd=cwd)
+        if output_fifo:
+            # Opening the read end doesn't wait for a writer - it's readable once the process has written to or closed it
+            fifo_output = os.fdopen(os.open(output_fifo, os.O_RDONLY | os.O_NONBLOCK), 'rb', 0)
+
+        for cmd, cwd in cmds:
+            p = subprocess.Popen(cmd, shell=shell, stdin=processes[-1].stdout if processes else subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE, cwd=cwd, close_fds=True)
+            record_spawn()
+            if processes:
+                # The child has its own copy - closing ours means it sees EOF/SIGPIPE when its neighbour exits
+                processes[-1].stdout.close()
+            processes.append(p)
 
+        first, last = processes[0], processes[-1]
+        output = fifo_output or last.stdout
+
+        stdin_buffer = bytearray()
+        stdin_offset = 0
+        stdin_available = False
         if stdin:
             if iterate_stdin:
                 stdin_iter = iter(stdin)
-                stdin_buffer = ''
                 stdin_available = True
             else:
-                stdin_buffer = stdin
-                stdin_available = False
+                stdin_buffer = bytearray(stdin)
 
         write_set = []
-        read_set = []
-        output_buffer = ''
-
-        if p.stdin and stdin:
-            write_set.append(p.stdin)
-        if p.stdout:
-            read_set.append(p.stdout)
-        if p.stderr:
+        # The input fifo can only be opened once the process has opened it - it always is, so the process sees EOF
+        waiting_for_reader = bool(input_fifo)
+        if stdin and not input_fifo:
+            stdin_pipe = first.stdin
+            write_set.append(stdin_pipe)
+
+            # Non-blocking so large writes can't deadlock against a full stdout pipe
+            flags = fcntl.fcntl(stdin_pipe.fileno(), fcntl.F_GETFL)
+            fcntl.fcntl(stdin_pipe.fileno(), fcntl.F_SETFL, flags | os.O_NONBLOCK)
+        else:
+            first.stdin.close()
+
+        read_set = [output]
+        error_output = bytearray()
+
+        if fifo_output:
+            read_set.append(last.stdout)
+        for p in processes:
             read_set.append(p.stderr)
 
-        while read_set or write_set:
+        while read_set or write_set or waiting_for_reader:
+            if waiting_for_reader:
+                try:
+                    stdin_pipe = os.fdopen(os.open(input_fifo, os.O_WRONLY | os.O_NONBLOCK), 'wb', 0)
+                    write_set.append(stdin_pipe)
+                    waiting_for_reader = False
+                except OSError as e:
+                    if e.errno != errno.ENXIO:
+                        raise
+
+            timeout = None
+            if waiting_for_reader:
+                timeout = 0.001
+            elif fifo_output in read_set and len(read_set) == 1 and not write_set:
+                # The output fifo never becomes readable if the process exits without opening it
+                timeout = 0.05
+
             try:
-                rlist, wlist, xlist = select.select(read_set, write_set, [])
+                rlist, wlist, xlist = select.select(read_set, write_set, [], timeout)
             except select.error as e:
                 if e.args[0] == errno.EINTR:
                     continue
                 raise
 
-            if p.stdin in wlist:
-                while len(stdin_buffer) < _PIPE_BUF and stdin_available:
+            if stdin_pipe in wlist:
+                # Gather small chunks into a single write
+                if stdin_offset == len(stdin_buffer):
+                    del stdin_buffer[:]
+                    stdin_offset = 0
+                while len(stdin_buffer) - stdin_offset < output_chunk_size and stdin_available:
                     try:
-                        stdin_buffer += stdin_iter.next()
+                        stdin_buffer.extend(stdin_iter.next())
                     except StopIteration:
                         stdin_available = False
-                chunk = stdin_buffer[:_PIPE_BUF]
-                bytes_written = os.write(p.stdin.fileno(), chunk)
-                stdin_buffer = stdin_buffer[bytes_written:]
 
-                if not (stdin_buffer or stdin_available):
-                    p.stdin.close()
-                    write_set.remove(p.stdin)
+                try:
+                    stdin_offset += os.write(stdin_pipe.fileno(), memoryview(stdin_buffer)[stdin_offset:stdin_offset + output_chunk_size])
+                except OSError as e:
+                    if e.errno == errno.EPIPE:
+                        # The process has stopped reading - its exit code will tell us if that was a problem
+                        stdin_offset, stdin_available = len(stdin_buffer), False
+                    elif e.errno != errno.EAGAIN:
+                        raise
+
+                if stdin_offset == len(stdin_buffer) and not stdin_available:
+                    stdin_pipe.close()
+                    write_set.remove(stdin_pipe)
 
-            if p.stdout in rlist:
-                data = os.read(p.stdout.fileno(), output_chunk_size)
+            for ready in rlist:
+                data = os.read(ready.fileno(), output_chunk_size)
                 if data == '':
-                    p.stdout.close()
-                    read_set.remove(p.stdout)
-                if data:
-                    output_buffer += data
+                    ready.close()
+                    read_set.remove(ready)
+                    continue
+
+                if ready is output:
                     yield data
+                    if fifo_output:
+                        continue
 
-            if p.stderr in rlist:
-                data = os.read(p.stderr.fileno(), output_chunk_size)
-                if data == '':
-                    p.stderr.close()
-                    read_set.remove(p.stderr)
-                if data:
-                    output_buffer += data
-
-            if len(output_buffer) > output_chunk_size:
-                output_buffer = output_buffer[-output_chunk_size:]
-
-        return_code = p.poll()
-        if return_code:
-            e = subprocess.CalledProcessError(return_code, cmd)
-            e.output = output_buffer
-            raise e
+                error_output.extend(data[-error_output_size:])
+                if len(error_output) > error_output_size * 2:
+                    del error_output[:-error_output_size]
+
+            if not (rlist or wlist) and (waiting_for_reader or fifo_output in read_set) and all(p.poll() is not None for p in processes):
+                # Exited without opening the fifos - anything written to the output fifo before exiting is readable now
+                waiting_for_reader = False
+                if fifo_output in read_set and not select.select([fifo_output], [], [], 0)[0]:
+                    read_set.remove(fifo_output)
+
+        return_codes = [p.wait() for p in processes]
+
+        # Like pipefail - an upstream failure is often just a broken pipe caused by a failure further along
+        for return_code, (cmd, _) in reversed(zip(return_codes, cmds)):
+            if return_code:
+                e = subprocess.CalledProcessError(return_code, cmd)
+                e.output = str(error_output[-error_output_size:])
+                raise e
     finally:
+        for p in processes:
+            if p.returncode is None:
+                try:
+                    p.kill()
+                except OSError:
+                    pass
+                p.wait()
+        for pipe in (stdin_pipe, fifo_output):
+            if pipe and not pipe.closed:
+                pipe.close()
         if to_close:
             to_close.close()
@@ -0,0 +1,285 @@
+"""
+Hooks for profiling processors. Listeners added with add_processor_listener are called with a ProcessorStats for each
+processor processor_pipeline ran once the pipeline's output has been consumed, e.g.
+
+    from django_bundles.utils.profiling import add_processor_listener
+
+    def log_slow_processors(stats):
+        if stats.self_time > 1:
+            print '%s took %.1fs on %s' % (stats.name, stats.self_time, stats.file_path)
+
+    add_processor_listener(log_slow_processors)
+
+Pipelines are only instrumented while a listener is registered - otherwise processor_pipeline is unchanged.
+"""
+import os
+import threading
+import time
+
+
+_listeners = []
+_listeners_lock = threading.Lock()
+_local = threading.local()
+
+
+def add_processor_listener(listener):
+    global _listeners
+    with _listeners_lock:
+        # Replaced rather than changed in place so pipelines running on other threads can iterate over it safely
+        _listeners = _listeners + [listener]
+
+
+def remove_processor_listener(listener):
+    global _listeners
+    with _listeners_lock:
+        _listeners = [existing for existing in _listeners if existing != listener]
+
+
+def has_processor_listeners():
+    return bool(_listeners)
+
+
+def record_spawn():
+    """
+    Called whenever a subprocess is started - it's counted against the processor running on this thread, if any
+    """
+    stack = getattr(_local, 'stack', None)
+    if stack:
+        stack[-1].spawns += 1
+
+
+def get_processor_name(processor):
+    if hasattr(processor, 'processors'):
+        return ' | '.join(get_processor_name(inner) for inner in processor.processors)
+    if getattr(processor, 'command', None):
+        return processor.command
+    return processor.__class__.__name__
+
+
+def _enter(stats):
+    stack = _local.__dict__.setdefault('stack', [])
+    stack.append(stats)
+    return time.time()
+
+
+def _exit(stats, start):
+    elapsed = time.time() - start
+    stack = _local.stack
+    stack.pop()
+    stats.self_time += elapsed
+    if stack:
+        # The processor this one was called from was waiting for it
+        stack[-1].self_time -= elapsed
+
+
+class ProcessorStats(object):
+    """
+    What one processor did for one file (or for a bundle's postprocessors, file_path is None):
+
+    wall_time           seconds from process() being called until its output was exhausted
+    self_time           seconds spent in the processor itself, not waiting for the processors before it
+    first_chunk_time    seconds from process() being called until its first chunk of output (None if it had none)
+    bytes_in/out        bytes read from the previous processor (or file) and output
+    chunks_in/out       number of chunks read and output
+    spawns              subprocesses started
+    """
+    def __init__(self, processor, bundle=None, file_path=None):
+        self.processor = processor
+        self.name = get_processor_name(processor)
+        self.bundle = bundle
+        self.file_path = file_path
+        self.wall_time = None
+        self.self_time = 0.0
+        self.first_chunk_time = None
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.chunks_in = 0
+        self.chunks_out = 0
+        self.spawns = 0
+        self.started = time.time()
+
+    def __repr__(self):
+        return '<ProcessorStats %s (%s, %s): %.3fs>' % (self.name, self.bundle, self.file_path, self.self_time)
+
+
+class InstrumentedOutput(object):
+    """
+    Wraps a processor's output (or the pipeline's input, with no producer) to time and count it
+    """
+    def __init__(self, output, producer, profile):
+        self.producer = producer
+        self.consumer = None
+        self._profile = profile
+        self._iterator = iter(output)
+        self._finished = False
+        self._read_as_file = False
+
+    def __iter__(self):
+        return self
+
+    def next(self):
+        producer = self.producer
+        exhausted = False
+
+        if producer:
+            start = _enter(producer)
+        try:
+            chunk = self._iterator.next()
+        except StopIteration:
+            exhausted = True
+        finally:
+            if producer:
+                _exit(producer, start)
+
+        if exhausted:
+            self._finish()
+            raise StopIteration
+
+        if not self._read_as_file:
+            self._count(len(chunk), 1)
+            if producer and producer.first_chunk_time is None:
+                producer.first_chunk_time = time.time() - producer.started
+        return chunk
+
+    def _count(self, size, chunks):
+        if self.producer:
+            self.producer.bytes_out += size
+            self.producer.chunks_out += chunks
+        if self.consumer:
+            self.consumer.bytes_in += size
+            self.consumer.chunks_in += chunks
+
+    def _finish(self):
+        if self._finished:
+            return
+        self._finished = True
+        if self.producer:
+            self.producer.wall_time = time.time() - self.producer.started
+        if not self.consumer:
+            self._profile.finish()
+
+
+class InstrumentedFileOutput(InstrumentedOutput):
+    """
+    An InstrumentedOutput for output in a file (a FileChunkGenerator) - processors that read the file themselves (see
+    ExecutableProcessor's {infile}) get its path
+    """
+    def __init__(self, output, producer, profile):
+        super(InstrumentedFileOutput, self).__init__(output, producer, profile)
+        self._file_path = output.file_path
+
+    @property
+    def file_path(self):
+        if not self._read_as_file and not self._finished:
+            self._read_as_file = True
+            try:
+                self._count(os.path.getsize(self._file_path), 0)
+            except OSError:
+                pass
+            self._finish()
+        return self._file_path
+
+
+def instrument(output, producer, profile):
+    if hasattr(output, 'file_path'):
+        return InstrumentedFileOutput(output, producer, profile)
+    return InstrumentedOutput(output, producer, profile)
+
+
+class PipelineProfile(object):
+    """
+    Instruments one run of processor_pipeline - the listeners are called once its output has been consumed
+    """
+    def __init__(self, iter_input, bundle=None, file_path=None):
+        self.bundle = bundle
+        self.file_path = file_path
+        self.stats = []
+        self.output = instrument(iter_input, None, self)
+        self._finished = False
+
+    def run(self, processor, process, iter_input):
+        """
+        Calls process(processor, iter_input) and returns its instrumented output
+        """
+        stats = ProcessorStats(processor, self.bundle, self.file_path)
+        self.stats.append(stats)
+        self.output.consumer = stats
+
+        start = _enter(stats)
+        try:
+            output = process(processor, iter_input)
+        finally:
+            _exit(stats, start)
+
+        self.output = instrument(output, stats, self)
+        return self.output
+
+    def finish(self):
+        if self._finished:
+            return
+        self._finished = True
+
+        now = time.time()
+        for stats in self.stats:
+            if stats.wall_time is None:
+                stats.wall_time = now - stats.started
+
+        listeners = _listeners
+        for stats in self.stats:
+            for listener in listeners:
+                listener(stats)
+
+
+class ProcessorProfile(object):
+    """
+    Collects ProcessorStats (add is a listener) and totals them by file and by processor
+    """
+    def __init__(self):
+        self.stats = []
+        self._lock = threading.Lock()
+
+    def add(self, stats):
+        with self._lock:
+            self.stats.append(stats)
+
+    def get_slowest_files(self, limit=None):
+        """
+        Returns dicts of bundle, file_path, self_time, wall_time and processors for each file (or bundle's
+        postprocessors), slowest first
+        """
+        totals = {}
+        with self._lock:
+            for stats in self.stats:
+                key = stats.bundle, stats.file_path
+                total = totals.get(key)
+                if not total:
+                    total = totals[key] = {'bundle': stats.bundle, 'file_path': stats.file_path, 'self_time': 0.0, 'wall_time': 0.0, 'processors': 0}
+                total['self_time'] += stats.self_time
+                total['wall_time'] = max(total['wall_time'], stats.wall_time)
+                total['processors'] += 1
+        return sorted(totals.itervalues(), key=lambda total: total['self_time'], reverse=True)[:limit]
+
+    def get_slowest_processors(self, limit=None):
+        """
+        Returns dicts of name, runs, self_time, first_chunk_time (the mean), bytes_in, bytes_out, chunks_in, chunks_out
+        and spawns for each processor, slowest first
+        """
+        totals = {}
+        with self._lock:
+            for stats in self.stats:
+                total = totals.get(stats.name)
+                if not total:
+                    total = totals[stats.name] = dict(name=stats.name, runs=0, self_time=0.0, first_chunk_time=0.0,
+                        bytes_in=0, bytes_out=0, chunks_in=0, chunks_out=0, spawns=0, _first_chunks=0)
+                total['runs'] += 1
+                total['self_time'] += stats.self_time
+                if stats.first_chunk_time is not None:
+                    total['first_chunk_time'] += stats.first_chunk_time
+                    total['_first_chunks'] += 1
+                for field in ('bytes_in', 'bytes_out', 'chunks_in', 'chunks_out', 'spawns'):
+                    total[field] += getattr(stats, field)
+
+        for total in totals.itervalues():
+            first_chunks = total.pop('_first_chunks')
+            total['first_chunk_time'] = total['first_chunk_time'] / first_chunks if first_chunks else None
+        return sorted(totals.itervalues(), key=lambda total: total['self_time'], reverse=True)[:limit]
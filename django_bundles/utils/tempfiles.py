@@ -0,0 +1,152 @@
+"""
+Temporary files and named pipes for commands that read or write files ({infile}/{outfile} ExecutableProcessors and
+uglify's inputs). They're made in settings.BUNDLES_TEMP_DIR - e.g. a RAM backed /dev/shm rather than a slow disk - and
+reused between files rather than created and deleted for each one.
+"""
+from django_bundles.conf.bundles_settings import bundles_settings
+
+from tempfile import NamedTemporaryFile
+import atexit
+import os
+import shutil
+import tempfile
+import threading
+
+
+class PooledTemporaryFile(object):
+    """
+    A NamedTemporaryFile that's emptied and returned to its pool when it's closed - it can be used like a file,
+    including as FileChunkGenerator's input_file and run_process's to_close
+    """
+    def __init__(self, pool, temp_file, suffix=''):
+        self.pool = pool
+        self.temp_file = temp_file
+        self.suffix = suffix
+        self.name = temp_file.name
+        self.closed = False
+
+    def __getattr__(self, name):
+        return getattr(self.temp_file, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.pool.release(self.temp_file, self.suffix)
+
+
+class TemporaryFilePool(object):
+    """
+    Temporary files and named pipes in dir (the system temp directory if None), kept open between uses. Files that
+    are never closed (e.g. output that's read by path and not iterated over) are deleted when they're garbage collected
+    like any NamedTemporaryFile.
+    """
+    def __init__(self, dir=None, max_free=32):
+        self.dir = dir
+        self.max_free = max_free
+        self.created = 0
+        self.reused = 0
+        self._free_files = {}        # suffix -> NamedTemporaryFiles
+        self._free_fifos = []
+        self._fifo_dir = None
+        self._fifo_count = 0
+        self._lock = threading.Lock()
+
+    def get_file(self, suffix=''):
+        """
+        Returns an empty PooledTemporaryFile open for reading and writing - suffix is for commands that look at the
+        file's extension
+        """
+        with self._lock:
+            free_files = self._free_files.get(suffix)
+            if free_files:
+                self.reused += 1
+                temp_file = free_files.pop()
+            else:
+                self.created += 1
+                temp_file = None
+
+        if temp_file is None:
+            temp_file = NamedTemporaryFile(dir=self.dir, suffix=suffix)
+        return PooledTemporaryFile(self, temp_file, suffix)
+
+    def release(self, temp_file, suffix=''):
+        try:
+            # Emptied straight away so a tmpfs doesn't hold on to the memory
+            temp_file.seek(0)
+            temp_file.truncate()
+        except (IOError, OSError, ValueError):
+            temp_file.close()
+            return
+
+        with self._lock:
+            free_files = self._free_files.setdefault(suffix, [])
+            if len(free_files) < self.max_free:
+                free_files.append(temp_file)
+                return
+        temp_file.close()
+
+    def get_fifo(self):
+        """
+        Returns the path of a named pipe no one else is using - pass it back to release_fifo when done
+        """
+        with self._lock:
+            if self._free_fifos:
+                self.reused += 1
+                return self._free_fifos.pop()
+
+            if self._fifo_dir is None:
+                self._fifo_dir = tempfile.mkdtemp(dir=self.dir, prefix='bundles-fifos-')
+                atexit.register(remove_fifo_dir, self._fifo_dir, os.getpid())
+            self._fifo_count += 1
+            self.created += 1
+            path = os.path.join(self._fifo_dir, str(self._fifo_count))
+
+        os.mkfifo(path, 0600)
+        return path
+
+    def release_fifo(self, path):
+        with self._lock:
+            self._free_fifos.append(path)
+
+    def clear(self):
+        """
+        Deletes the free files and named pipes
+        """
+        with self._lock:
+            free_files = [temp_file for temp_files in self._free_files.itervalues() for temp_file in temp_files]
+            free_fifos = self._free_fifos
+            self._free_files = {}
+            self._free_fifos = []
+
+        for temp_file in free_files:
+            temp_file.close()
+        for path in free_fifos:
+            os.remove(path)
+
+
+def remove_fifo_dir(path, pid):
+    # Not from forked processes that inherited the exit handler
+    if os.getpid() == pid:
+        shutil.rmtree(path, True)
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+def get_temp_file_pool():
+    """
+    Returns the TemporaryFilePool for settings.BUNDLES_TEMP_DIR - each process has its own, so forked workers never
+    share a file
+    """
+    key = bundles_settings.BUNDLES_TEMP_DIR, os.getpid()
+
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = TemporaryFilePool(key[0])
+    return pool
@@ -0,0 +1,55 @@
+"""
+Reading and writing the bundle versions file (settings.BUNDLES_VERSION_FILE). Files ending in .json are written as
+JSON, anything else in the original Python format:
+
+    BUNDLES_VERSIONS = {
+        "master_css": "...",
+    }
+
+Either format can be read whatever the file is called, so servers can be upgraded before the build switches over.
+"""
+from django_bundles.utils.files import write_file_atomically
+
+import json
+import os
+
+
+def read_bundle_versions(path):
+    with open(path, 'rb') as versions_file:
+        contents = versions_file.read()
+
+    if contents.lstrip().startswith('{'):
+        return dict((str(name), str(version)) for name, version in json.loads(contents).iteritems())
+
+    locs = {}
+    exec contents in locs
+    return locs['BUNDLES_VERSIONS']
+
+
+def write_bundle_versions(path, bundle_versions):
+    """
+    Writes the versions file via a temporary file and rename so a running server never reads it half written
+    """
+    if path.endswith('.json'):
+        contents = json.dumps(bundle_versions, indent=4, sort_keys=True) + '\n'
+    else:
+        contents = """\
+#!/usr/bin/env python
+
+BUNDLES_VERSIONS = {
+%s
+}
+""" % '\n'.join(['    "%s": "%s",' % version for version in bundle_versions.iteritems()])
+
+    write_file_atomically(path, contents)
+
+
+def get_file_signature(path):
+    """
+    Cheap check for a changed file - None if it doesn't exist
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime, stat.st_size, stat.st_ino
@@ -0,0 +1,91 @@
+"""
+Protocol for long-lived processor workers (see django_bundles.processors.PersistentProcessor). A worker reads jobs
+from stdin and writes results to stdout, one at a time:
+
+    request:    4 byte big-endian length, then the input
+    response:   1 byte status (0 for success), 4 byte big-endian length, then the output (or an error message)
+
+Anything a worker writes to stderr is passed straight through. This module is also a reference worker that applies
+a Python function to each job:
+
+    python -m django_bundles.utils.workers string.upper
+"""
+import struct
+import sys
+import traceback
+
+
+REQUEST_HEADER = struct.Struct('>I')
+RESPONSE_HEADER = struct.Struct('>BI')
+
+STATUS_OK = 0
+STATUS_ERROR = 1
+
+
+class WorkerClosed(Exception):
+    pass
+
+
+def read_exactly(stream, length):
+    data = stream.read(length)
+    if len(data) < length:
+        raise WorkerClosed
+    return data
+
+
+def write_request(stream, data):
+    stream.write(REQUEST_HEADER.pack(len(data)))
+    stream.write(data)
+    stream.flush()
+
+
+def read_request(stream):
+    """
+    Returns the next job's input, or None when there are no more jobs
+    """
+    header = stream.read(REQUEST_HEADER.size)
+    if not header:
+        return None
+    if len(header) < REQUEST_HEADER.size:
+        raise WorkerClosed
+    length, = REQUEST_HEADER.unpack(header)
+    return read_exactly(stream, length)
+
+
+def write_response(stream, status, data):
+    stream.write(RESPONSE_HEADER.pack(status, len(data)))
+    stream.write(data)
+    stream.flush()
+
+
+def read_response(stream):
+    """
+    Returns (status, output) - raises WorkerClosed if the worker has gone away
+    """
+    status, length = RESPONSE_HEADER.unpack(read_exactly(stream, RESPONSE_HEADER.size))
+    return status, read_exactly(stream, length)
+
+
+def serve(handler, stdin=None, stdout=None):
+    """
+    Runs handler (input string -> output string) for each job until stdin is closed
+    """
+    stdin = stdin or sys.stdin
+    stdout = stdout or sys.stdout
+
+    while True:
+        data = read_request(stdin)
+        if data is None:
+            return
+
+        try:
+            status, output = STATUS_OK, handler(data)
+        except Exception:
+            status, output = STATUS_ERROR, traceback.format_exc()
+
+        write_response(stdout, status, output)
+
+
+if __name__ == '__main__':
+    from django_bundles.utils import get_class
+    serve(get_class(sys.argv[1]))
@@ -1,48 +1,200 @@
+import hashlib
 import mimetypes
 import posixpath
+import sys
+import threading
 import urllib
 import os
-from operator import concat
-from django.http import HttpResponse
-from django.views.static import serve as django_serve
-
+from django.http import HttpResponse, HttpResponseNotModified
+try:
+    from django.http import StreamingHttpResponse
+except ImportError:
+    # Django 1.4 - an HttpResponse given an iterator sends it as it's iterated over
+    StreamingHttpResponse = HttpResponse
+from django.utils.http import http_date
+from django.views.static import serve as django_serve, was_modified_since
+
+from django_bundles.conf.bundles_settings import bundles_settings
 from django_bundles.core import get_bundles
 from django_bundles.processors import processor_pipeline
+from django_bundles.utils.dependencies import get_dependency_graph
 from django_bundles.utils.files import FileChunkGenerator
+from django_bundles.utils.lru import LRUCache
 
 from django.conf import settings
 
 
-file_cache = {}
+class GeneratingFile(object):
+    """
+    A file's processed output, generated in a background thread so the cache is filled (and waiting requests are
+    released) however fast the request that started it reads - iterating over it yields the output as it's generated
+    """
+    def __init__(self, dev_file_cache, path, bundle_file, stat, signature):
+        self.dev_file_cache = dev_file_cache
+        self.path = path
+        self.bundle_file = bundle_file
+        self.signature = signature
+        self.mimetype = get_mimetype(path)
+        # Changes to the files it imports count as changes to the file
+        self.last_modified = max([stat.st_mtime] + [
+            os.path.getmtime(dependency) for dependency in get_dependency_graph().get_dependencies(bundle_file.file_path, bundle_file.file_type)
+            if os.path.exists(dependency)
+        ])
+        self.cached = None
+        self._chunks = []
+        self._done = False
+        self._exc_info = None
+        self._condition = threading.Condition()
+
+        thread = threading.Thread(target=self._generate)
+        thread.daemon = True
+        thread.start()
+
+    def _generate(self):
+        # TODO: less files need to change the way they are rendered in the template
+        print "Generating", self.path
+
+        try:
+            for chunk in processor_pipeline(self.bundle_file.processors, FileChunkGenerator(open(self.bundle_file.file_path, 'rb'))):
+                with self._condition:
+                    self._chunks.append(chunk)
+                    self._condition.notify_all()
+
+            contents = ''.join(self._chunks)
+            self.cached = {
+                'contents': contents,
+                'mimetype': self.mimetype,
+                'etag': '"%s"' % hashlib.md5(contents).hexdigest(),
+                'last_modified': self.last_modified,
+                'signature': self.signature,
+            }
+            self.dev_file_cache.set(self.path, self.cached)
+        except Exception:
+            # Raised to whoever is reading it
+            self._exc_info = sys.exc_info()
+        finally:
+            with self._condition:
+                self._done = True
+                self._condition.notify_all()
+            self.dev_file_cache.finished_generating(self.path)
+
+    def __iter__(self):
+        sent = 0
+        while True:
+            with self._condition:
+                while sent == len(self._chunks) and not self._done:
+                    self._condition.wait()
+                chunks = self._chunks[sent:]
+                done = self._done
+
+            for chunk in chunks:
+                yield chunk
+            sent += len(chunks)
+
+            if done and not chunks:
+                break
+
+        if self._exc_info:
+            raise self._exc_info[0], self._exc_info[1], self._exc_info[2]
+
+
+class DevFileCache(object):
+    """
+    Processed bundle files for serving in development. Entries are regenerated when the file's mtime or size changes
+    (or the contents of a file it imports), limited to max_size bytes (least recently used are evicted first) and each
+    file is only generated by one request at a time - others wait for it to finish
+    """
+    def __init__(self, max_size=None, bundle_files=None):
+        self.files = LRUCache(max_size, get_size=lambda cached: len(cached['contents']))
+        self.generated = 0
+        self._bundle_files = bundle_files
+        self._generating = {}
+        self._lock = threading.Lock()
+
+    def get_bundle_file(self, path):
+        with self._lock:
+            if self._bundle_files is None:
+                self._bundle_files = {}
+                for bundle in get_bundles():
+                    for bundle_file in bundle.files:
+                        self._bundle_files[os.path.realpath(bundle_file.file_path)] = bundle_file
+            return self._bundle_files.get(path)
+
+    def stream(self, path):
+        """
+        Returns (cached, generating) - cached is a dict of contents, mimetype, etag and last_modified if the file is
+        cached, otherwise generating is a GeneratingFile to iterate over. Both are None if path isn't in a bundle
+        """
+        bundle_file = self.get_bundle_file(path)
+        if not bundle_file:
+            return None, None
+
+        try:
+            stat = os.stat(bundle_file.file_path)
+        except OSError:
+            return None, None
+
+        signature = (stat.st_mtime, stat.st_size, get_dependency_graph().get_dependency_key(bundle_file.file_path, bundle_file.file_type))
+
+        while True:
+            cached = self.files.get(path)
+            if cached and cached['signature'] == signature:
+                return cached, None
+
+            with self._lock:
+                finished = self._generating.get(path)
+                if finished is None:
+                    self._generating[path] = threading.Event()
+                    self.generated += 1
+                    return None, GeneratingFile(self, path, bundle_file, stat, signature)
+
+            # Another request is generating it - wait for it to be cached (or to fail, then generate it ourselves)
+            finished.wait()
+
+    def get(self, path):
+        """
+        Returns a dict of contents, mimetype, etag and last_modified - or None if path isn't in a bundle
+        """
+        cached, generating = self.stream(path)
+        if generating:
+            for chunk in generating:
+                pass
+            return generating.cached
+        return cached
+
+    def set(self, path, cached):
+        self.files.set(path, cached)
+
+    def finished_generating(self, path):
+        with self._lock:
+            finished = self._generating.pop(path)
+        finished.set()
+
+
+_dev_file_cache = None
+def get_dev_file_cache():
+    global _dev_file_cache
+
+    if _dev_file_cache is None:
+        _dev_file_cache = DevFileCache(max_size=bundles_settings.BUNDLES_DEV_CACHE_SIZE)
+    return _dev_file_cache
 
 
 def get_file(path):
-    global file_cache
-
-    if not file_cache:
-        for bundle in get_bundles():
-            for bundle_file in bundle.files:
-                file_cache[os.path.realpath(bundle_file.file_path)] = {
-                    'bundle_file': bundle_file,
-                    'cache': None
-                }
-
-    if path in file_cache:
-        if not file_cache[path]['cache']:
-            mimetype, encoding = mimetypes.guess_type(path)
-            mimetype = mimetype or 'application/octet-stream'
-            # TODO: less files need to change the way they are rendered in the template
-            print "Generating", path
-
-            file_cache[path]['cache'] = {
-                'contents': reduce(concat, (chunk for chunk in processor_pipeline(file_cache[path]['bundle_file'].processors, FileChunkGenerator(open(file_cache[path]['bundle_file'].file_path, 'rb'))))),
-                'mimetype': mimetype,
-            }
+    return get_dev_file_cache().get(path)
+
 
-        return file_cache[path]['cache']
+def get_mimetype(path):
+    mimetype, encoding = mimetypes.guess_type(path)
+    return mimetype or 'application/octet-stream'
 
-    return None
 
+def is_not_modified(request, cached):
+    if 'HTTP_IF_NONE_MATCH' in request.META:
+        return cached['etag'] in (etag.strip() for etag in request.META['HTTP_IF_NONE_MATCH'].split(','))
+    if 'HTTP_IF_MODIFIED_SINCE' in request.META:
+        return not was_modified_since(request.META['HTTP_IF_MODIFIED_SINCE'], cached['last_modified'], len(cached['contents']))
+    return False
 
 
 def serve(request, path, document_root=None, show_indexes=False):
@@ -63,8 +215,21 @@ def serve(request, path, document_root=None, show_indexes=False):
 
         fullpath = os.path.join(document_root, newpath)
 
-        cached = get_file(fullpath)
+        cached, generating = get_dev_file_cache().stream(fullpath)
         if cached:
-            return HttpResponse(cached['contents'], content_type=cached['mimetype'])
+            if is_not_modified(request, cached):
+                response = HttpResponseNotModified()
+            else:
+                response = HttpResponse(cached['contents'], content_type=cached['mimetype'])
+                response['Content-Length'] = len(cached['contents'])
+            response['ETag'] = cached['etag']
+            response['Last-Modified'] = http_date(cached['last_modified'])
+            return response
+
+        if generating:
+            # Send the output as it's generated - it's cached once it's finished
+            response = StreamingHttpResponse(generating, content_type=generating.mimetype)
+            response['Last-Modified'] = http_date(generating.last_modified)
+            return response
 
     return django_serve(request, path, document_root=document_root, show_indexes=show_indexes)